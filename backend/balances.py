@@ -0,0 +1,197 @@
+"""
+Materialized Token Balance Ledger for BanKa
+One document per (wallet, token) in the `balances` collection, kept current
+with atomic $inc updates on every purchase, offline transfer and transfer
+
+The first API start after upgrading builds the ledger from purchase and
+transfer history (`migrate_balance_ledger`); every worker waits for that
+before serving requests, so users whose purchases predate the ledger can
+transfer right away. Deploy the upgrade with all old workers stopped, as
+writes from code that does not update the ledger are not picked up.
+
+Rebuild or reconcile from history later, while no sales or transfers are
+being written (e.g. with the API stopped), with:
+    python backend/balances.py reconcile [--dry-run]
+"""
+
+import os
+import asyncio
+import argparse
+import datetime
+from typing import Dict, Any, List, Tuple, Optional
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+# `migrations` document recording the one-time ledger build
+LEDGER_MIGRATION_ID = "balance_ledger"
+
+
+async def ensure_balance_indexes(db):
+    """The unique index keeps concurrent upserts from creating duplicate rows"""
+    await db.balances.create_index([("wallet_address", 1), ("token_address", 1)], unique=True)
+
+
+async def apply_balance_deltas(db, deltas: List[Tuple[str, str, int]], token_info: Optional[Dict[str, Dict[str, Any]]] = None):
+    """
+    Atomically add (wallet, token_address, amount) deltas to the ledger
+
+    `token_info` optionally maps token addresses to {"name", "event_name"}
+    so new ledger rows carry display names.
+    """
+    if not deltas:
+        return
+    now = datetime.datetime.utcnow()
+    operations = []
+    for wallet_address, token_address, amount in deltas:
+        info = (token_info or {}).get(token_address, {})
+        operations.append(UpdateOne(
+            {"wallet_address": wallet_address, "token_address": token_address},
+            {
+                "$inc": {"balance": amount},
+                "$set": {"updated_at": now},
+                "$setOnInsert": {
+                    "name": info.get("name", "Unknown"),
+                    "event_name": info.get("event_name", "Unknown Event")
+                }
+            },
+            upsert=True
+        ))
+    await db.balances.bulk_write(operations, ordered=False)
+
+
+async def debit_balance(db, wallet_address: str, token_address: str, amount: int) -> bool:
+    """Atomically take `amount` from a ledger row; False if the balance is too low"""
+    result = await db.balances.update_one(
+        {"wallet_address": wallet_address, "token_address": token_address, "balance": {"$gte": amount}},
+        {"$inc": {"balance": -amount}, "$set": {"updated_at": datetime.datetime.utcnow()}}
+    )
+    return result.modified_count == 1
+
+
+async def get_wallet_balances(db, wallet_address: str) -> List[Dict[str, Any]]:
+    """Token balances for one wallet from the ledger (single indexed read)"""
+    tokens = []
+    async for row in db.balances.find(
+        {"wallet_address": wallet_address, "balance": {"$ne": 0}},
+        {"_id": 0, "token_address": 1, "balance": 1, "name": 1, "event_name": 1}
+    ):
+        tokens.append({
+            "address": row["token_address"],
+            "balance": row["balance"],
+            "name": row.get("name", "Unknown"),
+            "event_name": row.get("event_name", "Unknown Event")
+        })
+    return tokens
+
+
+async def compute_balances_from_history(db) -> Dict[Tuple[str, str], int]:
+    """Recompute every (wallet, token) balance from purchases and transfers"""
+    expected: Dict[Tuple[str, str], int] = {}
+
+    pipelines = [
+        (db.purchases, "$user_wallet", 1),
+        (db.transfers, "$to_address", 1),
+        (db.transfers, "$from_wallet", -1),
+    ]
+    for collection, wallet_field, sign in pipelines:
+        cursor = collection.aggregate([
+            {"$group": {
+                "_id": {"wallet": wallet_field, "token": "$token_address"},
+                "amount": {"$sum": "$amount"}
+            }}
+        ])
+        async for group in cursor:
+            key = (group["_id"]["wallet"], group["_id"]["token"])
+            if key[0] is None or key[1] is None:
+                continue
+            expected[key] = expected.get(key, 0) + sign * group["amount"]
+    return expected
+
+
+async def reconcile_balances(db, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Bring the ledger in line with purchase/transfer history
+
+    Needs a quiet window: history is aggregated before the ledger is read,
+    so a sale recorded in between (history written, ledger not yet) would
+    be corrected for and then applied again. Run it with no purchases,
+    transfers or cashier syncs in flight. With an empty ledger this is a
+    full rebuild.
+    """
+    expected = await compute_balances_from_history(db)
+
+    current: Dict[Tuple[str, str], int] = {}
+    async for row in db.balances.find({}, {"_id": 0, "wallet_address": 1, "token_address": 1, "balance": 1}):
+        current[(row["wallet_address"], row["token_address"])] = row.get("balance", 0)
+
+    corrections = []
+    for key in set(expected) | set(current):
+        difference = expected.get(key, 0) - current.get(key, 0)
+        if difference:
+            corrections.append((key[0], key[1], difference))
+
+    if corrections and not dry_run:
+        token_info = {}
+        async for token in db.tokens.find(
+            {"contract_address": {"$in": list({c[1] for c in corrections})}},
+            {"_id": 0, "contract_address": 1, "name": 1, "event_name": 1}
+        ):
+            token_info[token["contract_address"]] = token
+        await apply_balance_deltas(db, corrections, token_info)
+
+    return {"rows_checked": len(set(expected) | set(current)), "corrections": len(corrections)}
+
+
+async def migrate_balance_ledger(db, lease_seconds: float = 600.0, poll_interval: float = 1.0) -> bool:
+    """
+    Build the ledger from history once, before any worker serves requests
+
+    One worker claims the migration and reconciles; the others wait until it
+    is done, or take it over if the claim's lease runs out (e.g. that worker
+    died). Returns True when this call ran the reconcile.
+    """
+    while True:
+        now = datetime.datetime.utcnow()
+        lease = {"status": "running", "locked_until": now + datetime.timedelta(seconds=lease_seconds)}
+        record = await db.migrations.find_one({"_id": LEDGER_MIGRATION_ID})
+        if record and record["status"] == "done":
+            return False
+        if record is None:
+            try:
+                await db.migrations.insert_one({"_id": LEDGER_MIGRATION_ID, "started_at": now, **lease})
+            except DuplicateKeyError:
+                continue
+        elif record["locked_until"] >= now or not await db.migrations.find_one_and_update(
+            {"_id": LEDGER_MIGRATION_ID, "status": "running", "locked_until": {"$lt": now}},
+            {"$set": lease}
+        ):
+            await asyncio.sleep(poll_interval)
+            continue
+
+        result = await reconcile_balances(db)
+        await db.migrations.update_one(
+            {"_id": LEDGER_MIGRATION_ID},
+            {"$set": {"status": "done", "completed_at": datetime.datetime.utcnow(), **result}}
+        )
+        return True
+
+
+def main():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Rebuild/reconcile the materialized token balance ledger")
+    parser.add_argument("command", choices=["reconcile"])
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many rows differ")
+    args = parser.parse_args()
+
+    async def run():
+        db = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017')).banka_db
+        await ensure_balance_indexes(db)
+        result = await reconcile_balances(db, dry_run=args.dry_run)
+        print(f"{'Would correct' if args.dry_run else 'Corrected'} {result['corrections']} of {result['rows_checked']} balance rows")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+BanKa stress test: concurrent buyers on one token must never oversell
+
+Creates a fresh event and token with a small supply, then lets hundreds of
+concurrent buyers hit POST /api/purchase/online for it at once. Checks that
+the accepted purchases never exceed the supply, that everything past the
+supply was rejected with 409, and (after the inventory flush) that the
+token's total_sold matches. Exits non-zero on oversell. Creates real
+records, so run it against a disposable database.
+
+Usage:
+    python backend/benchmarks/inventory_stress.py --base-url http://localhost:8001 \\
+        --supply 100 --buyers 500 --amount 1
+"""
+
+import sys
+import math
+import time
+import argparse
+import datetime
+import threading
+
+import requests
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--email", default="participante@banka.com")
+    parser.add_argument("--password", default="123456")
+    parser.add_argument("--supply", type=int, default=100)
+    parser.add_argument("--buyers", type=int, default=500)
+    parser.add_argument("--amount", type=int, default=1)
+    parser.add_argument("--flush-wait", type=float, default=7.0,
+                        help="seconds to wait for the total_sold roll-up before checking it")
+    args = parser.parse_args()
+
+    login = requests.post(f"{args.base_url}/api/auth/login",
+                          json={"email": args.email, "password": args.password}, timeout=30)
+    login.raise_for_status()
+    headers = {"Authorization": f"Bearer {login.json()['token']}"}
+
+    event = requests.post(f"{args.base_url}/api/events", headers=headers, timeout=30, json={
+        "name": f"Inventory stress {int(time.time())}",
+        "date": datetime.datetime.utcnow().isoformat()
+    })
+    event.raise_for_status()
+    token = requests.post(f"{args.base_url}/api/events/{event.json()['event']['id']}/tokens",
+                          headers=headers, timeout=30, json={
+                              "name": "Stress",
+                              "price_cents": 100,
+                              "initial_supply": args.supply,
+                              "sale_mode": "both"
+                          })
+    token.raise_for_status()
+    event_id = event.json()["event"]["id"]
+    token_id = token.json()["token"]["id"]
+    token_address = token.json()["token"]["contract_address"]
+
+    outcomes = {"accepted": 0, "sold_out": 0, "errors": 0}
+    samples = []
+    lock = threading.Lock()
+    start_gate = threading.Event()
+
+    def buy():
+        session = requests.Session()
+        start_gate.wait()
+        started = time.perf_counter()
+        try:
+            response = session.post(f"{args.base_url}/api/purchase/online", headers=headers, timeout=120, json={
+                "token_address": token_address,
+                "amount": args.amount,
+                "payment_method": "bnb"
+            })
+            outcome = {200: "accepted", 409: "sold_out"}.get(response.status_code, "errors")
+        except requests.RequestException:
+            outcome = "errors"
+        with lock:
+            outcomes[outcome] += 1
+            samples.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=buy) for _ in range(args.buyers)]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    start_gate.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    sold = outcomes["accepted"] * args.amount
+    expected = min(args.supply // args.amount, args.buyers) * args.amount
+
+    print("=" * 80)
+    print(f"  {args.buyers} concurrent buyers x {args.amount} on a token with supply {args.supply}")
+    print("=" * 80)
+    print(f"accepted={outcomes['accepted']} sold_out={outcomes['sold_out']} errors={outcomes['errors']} "
+          f"in {elapsed:.2f}s ({args.buyers / elapsed:.1f} req/s)")
+    print(f"latency p50={percentile(samples, 50):.1f}ms p99={percentile(samples, 99):.1f}ms")
+
+    time.sleep(args.flush_wait)
+    # The embedded event copy is what organizers see; it is rolled up with the token
+    event_tokens = requests.get(f"{args.base_url}/api/events/{event_id}", headers=headers, timeout=30).json()["tokens"]
+    total_sold = next((t.get("total_sold") for t in event_tokens if t["id"] == token_id), None)
+    print(f"units sold={sold} expected={expected} token.total_sold={total_sold}")
+
+    failed = False
+    if sold > args.supply:
+        print(f"❌ OVERSOLD by {sold - args.supply} units")
+        failed = True
+    if outcomes["errors"] == 0 and sold != expected:
+        print(f"⚠️  {expected - sold} units left unsold despite demand")
+    if total_sold is not None and total_sold != sold:
+        print(f"❌ total_sold {total_sold} does not match accepted purchases {sold}")
+        failed = True
+    if not failed:
+        print("✅ No oversell")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+BanKa benchmark: login throughput under concurrency
+
+Runs N concurrent clients that log in back to back for a fixed duration
+and reports successful logins per second plus latency percentiles. While
+it runs, GET /api/metrics shows the crypto executor's queue depth and wait
+times; compare CRYPTO_EXECUTOR_WORKERS settings or a slower password hash.
+
+Usage:
+    python backend/benchmarks/login_throughput.py --base-url http://localhost:8001 \\
+        --concurrency 1 8 32 --duration 20
+"""
+
+import math
+import time
+import argparse
+import threading
+
+import requests
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def login_loop(base_url, email, password, deadline, samples, errors):
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = session.post(f"{base_url}/api/auth/login",
+                                    json={"email": email, "password": password}, timeout=60)
+            if response.status_code == 200:
+                samples.append((time.perf_counter() - started) * 1000)
+            else:
+                errors.append(response.status_code)
+        except requests.RequestException as e:
+            errors.append(str(e))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--email", default="participante@banka.com")
+    parser.add_argument("--password", default="123456")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"  POST /api/auth/login throughput, {args.duration:.0f}s per level")
+    print("=" * 80)
+    for concurrency in args.concurrency:
+        samples, errors = [], []
+        deadline = time.perf_counter() + args.duration
+        threads = [
+            threading.Thread(target=login_loop, args=(args.base_url, args.email, args.password, deadline, samples, errors))
+            for _ in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        crypto = requests.get(f"{args.base_url}/api/metrics", timeout=10).json().get("crypto_executor", {})
+        print(f"concurrency={concurrency:<4} logins/s={len(samples) / args.duration:8.1f} "
+              f"p50={percentile(samples, 50):7.1f}ms p99={percentile(samples, 99):7.1f}ms "
+              f"errors={len(errors)} crypto_max_wait={crypto.get('max_wait_ms', 0):.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+BanKa benchmark: offline cashier transfers, single vs batch
+
+Pushes the same number of top-ups through POST /api/transfer/offline (one
+request per transfer, run by several concurrent cashier threads) and
+through POST /api/transfer/offline/batch (fixed-size batches), and reports
+transfers per second for each. The transfers are real records, so run it
+against a disposable database.
+
+Usage:
+    python backend/benchmarks/offline_transfer_throughput.py --base-url http://localhost:8001 \\
+        --token-address 0x... --recipients participante@banka.com --transfers 1000 --batch-size 100
+"""
+
+import math
+import time
+import argparse
+import threading
+
+import requests
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def make_items(args, count):
+    return [
+        {
+            "user_email": args.recipients[i % len(args.recipients)],
+            "token_address": args.token_address,
+            "amount": 1,
+            "cashier_id": "benchmark"
+        }
+        for i in range(count)
+    ]
+
+
+def run_workers(worker, jobs, concurrency):
+    """Drain `jobs` with `concurrency` threads; returns (elapsed seconds, per-request ms)"""
+    samples = []
+    lock = threading.Lock()
+
+    def loop():
+        while True:
+            with lock:
+                if not jobs:
+                    return
+                job = jobs.pop()
+            started = time.perf_counter()
+            worker(job)
+            samples.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=loop) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--email", default="participante@banka.com", help="cashier account")
+    parser.add_argument("--password", default="123456")
+    parser.add_argument("--token-address", required=True)
+    parser.add_argument("--recipients", nargs="+", default=["participante@banka.com"])
+    parser.add_argument("--transfers", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    login = requests.post(f"{args.base_url}/api/auth/login",
+                          json={"email": args.email, "password": args.password}, timeout=30)
+    login.raise_for_status()
+    headers = {"Authorization": f"Bearer {login.json()['token']}"}
+    failures = {"single": 0, "batch": 0}
+
+    def send_single(item):
+        response = requests.post(f"{args.base_url}/api/transfer/offline", json=item, headers=headers, timeout=60)
+        if response.status_code != 200:
+            failures["single"] += 1
+
+    def send_batch(items):
+        response = requests.post(f"{args.base_url}/api/transfer/offline/batch",
+                                 json={"transfers": items}, headers=headers, timeout=120)
+        if response.status_code != 200:
+            failures["batch"] += len(items)
+        else:
+            failures["batch"] += response.json()["failed"]
+
+    print("=" * 80)
+    print(f"  Offline transfers: {args.transfers} top-ups, {args.concurrency} concurrent cashiers")
+    print("=" * 80)
+
+    elapsed, samples = run_workers(send_single, make_items(args, args.transfers), args.concurrency)
+    print(f"{'single (/api/transfer/offline)':<40} transfers/s={args.transfers / elapsed:8.1f} "
+          f"p50={percentile(samples, 50):7.1f}ms p99={percentile(samples, 99):7.1f}ms failed={failures['single']}")
+
+    items = make_items(args, args.transfers)
+    batches = [items[i:i + args.batch_size] for i in range(0, len(items), args.batch_size)]
+    elapsed, samples = run_workers(send_batch, batches, args.concurrency)
+    print(f"{f'batch of {args.batch_size} (/batch)':<40} transfers/s={args.transfers / elapsed:8.1f} "
+          f"p50={percentile(samples, 50):7.1f}ms p99={percentile(samples, 99):7.1f}ms failed={failures['batch']}")
+
+
+if __name__ == "__main__":
+    main()
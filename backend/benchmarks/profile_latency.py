@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+BanKa latency benchmark: GET /api/profile
+
+Reports p50/p95/p99 latency of the full profile and of field-limited
+variants (e.g. `fields=wallet`). Run it against a build before and after a
+change to compare; the numbers depend heavily on RPC and Mongo latency, so
+use the same environment for both runs.
+
+Usage:
+    python backend/benchmarks/profile_latency.py --base-url http://localhost:8001 \\
+        --email participante@banka.com --password 123456
+"""
+
+import math
+import time
+import argparse
+import statistics
+
+import requests
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--email", default="participante@banka.com")
+    parser.add_argument("--password", default="123456")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--variants", nargs="*", default=["", "wallet", "user,settings", "transactions"],
+                        help="fields= values to measure; empty string means the full profile")
+    args = parser.parse_args()
+
+    login = requests.post(f"{args.base_url}/api/auth/login",
+                          json={"email": args.email, "password": args.password}, timeout=30)
+    login.raise_for_status()
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {login.json()['token']}"
+
+    print("=" * 80)
+    print(f"  GET /api/profile latency, {args.requests} sequential requests per variant")
+    print("=" * 80)
+    for fields in args.variants:
+        params = {"fields": fields} if fields else {}
+        samples = []
+        partial = 0
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            response = session.get(f"{args.base_url}/api/profile", params=params, timeout=60)
+            samples.append((time.perf_counter() - started) * 1000)
+            partial += bool(response.json().get("partial"))
+        print(f"{('fields=' + fields) if fields else 'full profile':<26} "
+              f"p50={percentile(samples, 50):7.1f}ms p95={percentile(samples, 95):7.1f}ms "
+              f"p99={percentile(samples, 99):7.1f}ms mean={statistics.mean(samples):7.1f}ms partial={partial}")
+
+
+if __name__ == "__main__":
+    main()
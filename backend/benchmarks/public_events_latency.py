@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+BanKa latency benchmark: GET /api/events/public while token deployments run
+
+Measures p50/p95/p99 latency of the public events listing twice: once on an
+idle server (baseline) and once while organizers are deploying token
+contracts through POST /api/events/{event_id}/tokens. With a blocking Web3
+provider the second run shows latencies close to the receipt wait time; with
+the async provider both runs should look alike.
+
+Usage:
+    python backend/benchmarks/public_events_latency.py \\
+        --base-url http://localhost:8001 --email organizador@banka.com --password 123456
+"""
+
+import argparse
+import math
+import statistics
+import threading
+import time
+import uuid
+import datetime
+
+import requests
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def login(base_url, email, password):
+    response = requests.post(f"{base_url}/api/auth/login", json={"email": email, "password": password}, timeout=30)
+    response.raise_for_status()
+    return response.json()["token"]
+
+
+def create_event(base_url, token):
+    response = requests.post(
+        f"{base_url}/api/events",
+        json={
+            "name": f"Bench {uuid.uuid4().hex[:6]}",
+            "date": (datetime.datetime.utcnow() + datetime.timedelta(days=30)).isoformat(),
+            "description": "Latency benchmark event",
+            "location": "Benchmark"
+        },
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=30
+    )
+    response.raise_for_status()
+    return response.json()["event"]["id"]
+
+
+def sample_public_events(base_url, duration, samples):
+    """Hit the public listing back to back for `duration` seconds"""
+    deadline = time.perf_counter() + duration
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        session.get(f"{base_url}/api/events/public", timeout=120)
+        samples.append((time.perf_counter() - started) * 1000)
+
+
+def deploy_tokens(base_url, token, event_id, stop):
+    """Keep creating tokens (and therefore contract deployments) until stopped"""
+    session = requests.Session()
+    while not stop.is_set():
+        session.post(
+            f"{base_url}/api/events/{event_id}/tokens",
+            json={
+                "name": f"T{uuid.uuid4().hex[:4]}",
+                "price_cents": 500,
+                "initial_supply": 1000,
+                "sale_mode": "both"
+            },
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=180
+        )
+
+
+def report(label, samples):
+    print(f"{label:<28} n={len(samples):<6} "
+          f"p50={percentile(samples, 50):8.1f}ms "
+          f"p95={percentile(samples, 95):8.1f}ms "
+          f"p99={percentile(samples, 99):8.1f}ms "
+          f"mean={statistics.mean(samples) if samples else 0:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--email", default="organizador@banka.com")
+    parser.add_argument("--password", default="123456")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per phase")
+    parser.add_argument("--deployers", type=int, default=4, help="Concurrent deploying clients")
+    args = parser.parse_args()
+
+    token = login(args.base_url, args.email, args.password)
+    event_id = create_event(args.base_url, token)
+
+    baseline = []
+    sample_public_events(args.base_url, args.duration, baseline)
+
+    under_load = []
+    stop = threading.Event()
+    deployers = [
+        threading.Thread(target=deploy_tokens, args=(args.base_url, token, event_id, stop), daemon=True)
+        for _ in range(args.deployers)
+    ]
+    for thread in deployers:
+        thread.start()
+    sample_public_events(args.base_url, args.duration, under_load)
+    stop.set()
+
+    print("=" * 80)
+    print("  GET /api/events/public latency")
+    print("=" * 80)
+    report("idle", baseline)
+    report(f"{args.deployers} concurrent deployers", under_load)
+
+
+if __name__ == "__main__":
+    main()
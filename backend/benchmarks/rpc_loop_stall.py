@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+BanKa benchmark: event loop stalls caused by contract manager RPC calls
+
+Runs N concurrent "requests" that each make the calls a route makes before
+answering (is_connected, then a balance lookup) and reports their wall time
+and the longest stall of the event loop meanwhile. With a blocking Web3
+provider the calls run one after another on the loop, so the stall equals
+the wall time; with AsyncWeb3 they overlap and the loop keeps serving.
+
+--backend-dir runs the same probe against another checkout (e.g. one from
+before the AsyncWeb3 migration, whose calls are synchronous). Use a node
+with realistic latency; a local dev node answers too fast to show much.
+
+Usage:
+    python backend/benchmarks/rpc_loop_stall.py --rpc-url http://127.0.0.1:8545 --requests 10
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Any well-formed key; the probe never signs
+PROBE_KEY = "0x" + "a" * 64
+PROBE_ADDRESS = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+
+PROBE = """
+import sys, time, json, asyncio, inspect
+sys.path.insert(0, ".")
+from contracts.simple_contract_manager import ContractManager
+
+rpc_url, key, address, requests = sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4])
+
+async def maybe(value):
+    return await value if inspect.isawaitable(value) else value
+
+async def request(manager):
+    await maybe(manager.is_connected())
+    await maybe(manager.w3.eth.get_balance(address))
+
+async def main():
+    manager = ContractManager(rpc_url, key)
+    await request(manager)  # warm up connections
+    stall, done = [0.0], asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            stall[0] = max(stall[0], time.perf_counter() - started - 0.005)
+
+    ticking = asyncio.create_task(ticker())
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    await asyncio.gather(*[request(manager) for _ in range(requests)])
+    wall = time.perf_counter() - started
+    done.set()
+    await ticking
+    print(json.dumps({"wall_ms": wall * 1000, "stall_ms": stall[0] * 1000}))
+
+asyncio.run(main())
+"""
+
+
+def measure_once(backend_dir, rpc_url, requests):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, rpc_url, PROBE_KEY, PROBE_ADDRESS, str(requests)],
+        cwd=backend_dir, capture_output=True, text=True, check=True, timeout=600
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpc-url", default="http://127.0.0.1:8545")
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--backend-dir", default=BACKEND_DIR)
+    args = parser.parse_args()
+
+    samples = [measure_once(args.backend_dir, args.rpc_url, args.requests) for _ in range(args.runs)]
+
+    print("=" * 80)
+    print(f"  {args.requests} concurrent requests x 2 RPC calls ({args.rpc_url}), {args.runs} run(s)")
+    print("=" * 80)
+    for key, label in [("wall_ms", "wall time"), ("stall_ms", "max loop stall")]:
+        values = [sample[key] for sample in samples]
+        print(f"{label:<16} median={statistics.median(values):8.1f}ms  max={max(values):8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
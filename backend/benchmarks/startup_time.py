@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+BanKa benchmark: API cold start with the RPC endpoint unreachable
+
+Measures, in fresh interpreters, how long it takes to import `server` and
+to run the FastAPI lifespan startup while WEB3_PROVIDER_URL points at a
+closed port. Neither should wait on the network: chain clients are built
+and retried in the background.
+
+Usage:
+    python backend/benchmarks/startup_time.py --runs 5
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+import server
+imported = time.perf_counter()
+
+async def start():
+    async with server.app.router.lifespan_context(server.app):
+        return time.perf_counter()
+
+ready = asyncio.run(start())
+print(json.dumps({"import_ms": (imported - started) * 1000, "startup_ms": (ready - imported) * 1000}))
+"""
+
+
+def measure_once(rpc_url):
+    env = dict(os.environ, WEB3_PROVIDER_URL=rpc_url)
+    # Startup refuses a wallet pool without WALLET_POOL_KEY; the pool is not what is measured
+    env.setdefault("WALLET_POOL_SIZE", "0")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True, timeout=120
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--rpc-url", default="http://127.0.0.1:9", help="An endpoint nothing listens on")
+    args = parser.parse_args()
+
+    samples = [measure_once(args.rpc_url) for _ in range(args.runs)]
+
+    print("=" * 80)
+    print(f"  Cold start with unreachable RPC ({args.rpc_url}), {args.runs} run(s)")
+    print("=" * 80)
+    for key, label in [("import_ms", "import server"), ("startup_ms", "lifespan startup")]:
+        values = [sample[key] for sample in samples]
+        print(f"{label:<18} median={statistics.median(values):8.1f}ms  max={max(values):8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+BanKa benchmark: sequential vs. batched ERC-20 metadata reads
+
+Reads name/symbol/decimals/totalSupply/owner for a set of deployed tokens
+two ways against a dev node (e.g. `npx hardhat node` in blockchain/):
+one eth_call per field per token, and ContractManager.get_tokens_info,
+which aggregates everything through Multicall3 or a JSON-RPC batch.
+
+Usage:
+    python backend/benchmarks/token_info_reads.py --rpc-url http://127.0.0.1:8545 \\
+        --private-key 0x... 0xTokenA 0xTokenB ...
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from contracts.simple_contract_manager import create_contract_manager, TOKEN_INFO_CALLS
+
+
+async def sequential_reads(manager, addresses):
+    abi = manager.get_simple_erc20_contract()['abi']
+    for address in addresses:
+        contract = manager.get_contract_instance(address, abi)
+        for field, _, _ in TOKEN_INFO_CALLS:
+            await getattr(contract.functions, field)().call()
+    return len(addresses) * len(TOKEN_INFO_CALLS)
+
+
+async def batched_reads(manager, addresses):
+    before = manager.batch_reader.round_trips
+    await manager.get_tokens_info(addresses)
+    return manager.batch_reader.round_trips - before
+
+
+async def run(args):
+    manager = create_contract_manager(args.rpc_url, args.private_key)
+    addresses = [manager.w3.to_checksum_address(a) for a in args.addresses]
+
+    print("=" * 80)
+    print(f"  Token metadata reads for {len(addresses)} token(s), {args.rounds} round(s)")
+    print("=" * 80)
+    for label, reader in [("sequential eth_call", sequential_reads), ("batched", batched_reads)]:
+        started = time.perf_counter()
+        round_trips = 0
+        for _ in range(args.rounds):
+            round_trips += await reader(manager, addresses)
+        elapsed_ms = (time.perf_counter() - started) * 1000 / args.rounds
+        print(f"{label:<22} round trips/read={round_trips / args.rounds:6.1f}  latency={elapsed_ms:8.1f}ms")
+    print(f"multicall available: {manager.batch_reader.multicall_available}")
+    await manager.batch_reader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpc-url", default="http://127.0.0.1:8545")
+    parser.add_argument("--private-key", default="0x" + "a" * 64, help="Any key; reads do not sign")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("addresses", nargs="+")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
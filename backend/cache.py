@@ -0,0 +1,174 @@
+"""
+In-process caches for the BanKa API
+"""
+
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Callable, Awaitable
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after `ttl` seconds (None = never)"""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return entry[0] if entry else default
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+class TokenInfoCache:
+    """
+    Per-field cache of on-chain ERC-20 metadata keyed by contract address
+
+    name/symbol/decimals/owner never change after deployment and are kept
+    until evicted; totalSupply changes on mint/burn and expires after
+    `supply_ttl` seconds. Concurrent misses for the same tokens share one
+    chain read.
+
+    Writers call `invalidate` after changing a token; mints and pauses sent
+    from the owner's own wallet are only seen once `supply_ttl` runs out.
+    """
+
+    IMMUTABLE_FIELDS = ("name", "symbol", "decimals", "owner")
+    MUTABLE_FIELDS = ("totalSupply",)
+
+    def __init__(self, maxsize: int = 10000, supply_ttl: float = 15.0):
+        self.immutable = TTLCache(maxsize=maxsize)
+        self.mutable = TTLCache(maxsize=maxsize, ttl=supply_ttl)
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        # Bumped by invalidate(); reads that straddle it are not cached
+        self._epoch = 0
+
+    async def get_many(
+        self,
+        addresses: List[str],
+        fetch: Callable[[List[str], Optional[List[str]]], Awaitable[Dict[str, Dict[str, Any]]]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Return token info for `addresses`, calling `fetch(addresses, fields)`
+        only for what is missing or expired
+        """
+        results = {}
+        need_all, need_supply = [], []
+        for address in addresses:
+            static = self.immutable.get(address)
+            supply = self.mutable.get(address)
+            if static is None:
+                need_all.append(address)
+            elif supply is None:
+                need_supply.append(address)
+            else:
+                results[address] = {**static, **supply}
+
+        epoch = self._epoch
+        if need_all:
+            fetched = await self._fetch_once(need_all, None, fetch)
+            for address, info in fetched.items():
+                if info and epoch == self._epoch:
+                    self.immutable.set(address, {f: info[f] for f in self.IMMUTABLE_FIELDS if f in info})
+                    self.mutable.set(address, {f: info[f] for f in self.MUTABLE_FIELDS if f in info})
+                results[address] = info
+
+        if need_supply:
+            fetched = await self._fetch_once(need_supply, list(self.MUTABLE_FIELDS), fetch)
+            for address, info in fetched.items():
+                static = self.immutable.get(address) or {}
+                if info:
+                    if epoch == self._epoch:
+                        self.mutable.set(address, info)
+                    results[address] = {**static, **info}
+                else:
+                    results[address] = {}
+
+        return results
+
+    async def get(self, address: str, fetch) -> Dict[str, Any]:
+        return (await self.get_many([address], fetch)).get(address, {})
+
+    def invalidate(self, address: str):
+        """Drop cached data for a token (e.g. after a mint)"""
+        self.immutable.pop(address)
+        self.mutable.pop(address)
+        self._epoch += 1
+
+    async def _fetch_once(self, addresses, fields, fetch):
+        key = (tuple(addresses), tuple(fields) if fields else None)
+        while key in self._inflight:
+            future = self._inflight[key]
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leading read was cancelled rather than this caller:
+                # read again instead of failing
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fetch(addresses, fields)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not logged as lost
+            future.exception()
+            raise
+        finally:
+            # Cancelled mid-read: release the waiters instead of leaving
+            # them on a future that never completes
+            if not future.done():
+                future.cancel()
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "immutable_fields": self.immutable.stats(),
+            "total_supply": self.mutable.stats()
+        }
@@ -0,0 +1,385 @@
+"""
+Offline-First Cashier Sync for BanKa
+Cashier stations record sales locally and upload them as a journal of
+entries with client-generated ids and per-station sequence numbers. Entries
+land in the `cashier_journal` collection (unique per station and client
+id), are applied in bulk exactly once, and each sync returns the token
+catalog and balance changes since the station's last checkpoint.
+"""
+
+import uuid
+import hashlib
+import datetime
+from typing import Dict, Any, List, Optional
+from bson import ObjectId
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from balances import apply_balance_deltas
+from inventory import has_final_address, TokenNotReadyError, UnknownTokenError
+
+# Namespace for the deterministic ids of records created from journal entries
+SYNC_NAMESPACE = uuid.UUID("8d3c4f0e-6b1a-4c8e-9f57-2a1d7e5b9c30")
+
+# Changes newer than this are left for the next sync, so writes that commit
+# slightly out of timestamp order are not skipped by a checkpoint
+SYNC_SETTLE_SECONDS = 2
+
+DUPLICATE_KEY_ERROR = 11000
+
+TOKEN_DELTA_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "name": 1,
+    "symbol": 1,
+    "price_cents": 1,
+    "initial_supply": 1,
+    "total_sold": 1,
+    "sale_mode": 1,
+    "contract_address": 1,
+    "deployment_status": 1,
+    "is_active": 1,
+    "updated_at": 1
+}
+
+
+async def ensure_cashier_sync_indexes(db):
+    """Unique keys make journal uploads and station registration idempotent"""
+    await db.cashier_journal.create_index([("station_id", 1), ("client_id", 1)], unique=True)
+    await db.cashier_journal.create_index([("station_id", 1), ("applied", 1), ("sequence", 1)])
+    await db.cashier_stations.create_index("station_id", unique=True)
+    await db.balances.create_index([("token_address", 1), ("updated_at", 1), ("_id", 1)])
+    await db.tokens.create_index([("event_id", 1), ("updated_at", 1)])
+
+
+async def register_station(db, station_id: str, event_id: str, cashier: Dict[str, Any]) -> bool:
+    """
+    Bind a station to the event and cashier that first synced it
+
+    Returns False when the station already belongs to another cashier or event.
+    """
+    now = datetime.datetime.utcnow()
+    station = await db.cashier_stations.find_one_and_update(
+        {"station_id": station_id},
+        {
+            "$setOnInsert": {
+                "station_id": station_id,
+                "event_id": event_id,
+                "cashier_user_id": cashier["id"],
+                "acknowledged_sequence": 0,
+                "created_at": now
+            },
+            "$set": {"last_sync_at": now}
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return station["cashier_user_id"] == cashier["id"] and station["event_id"] == event_id
+
+
+async def record_journal_entries(db, station_id: str, cashier: Dict[str, Any], entries: List[Dict[str, Any]]) -> set:
+    """Store uploaded entries once; returns the client ids that were already journaled"""
+    if not entries:
+        return set()
+    now = datetime.datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {"station_id": station_id, "client_id": entry["client_id"]},
+            {"$setOnInsert": {
+                "station_id": station_id,
+                "client_id": entry["client_id"],
+                "sequence": entry["sequence"],
+                "cashier_user_id": cashier["id"],
+                "cashier_name": cashier["name"],
+                "user_email": entry["user_email"],
+                "token_address": entry["token_address"],
+                "amount": entry["amount"],
+                "recorded_at": entry.get("recorded_at") or now,
+                "received_at": now,
+                "applied": False,
+                "status": "pending",
+                "claim": None,
+                "claimed_at": None
+            }},
+            upsert=True
+        )
+        for entry in entries
+    ]
+    try:
+        result = await db.cashier_journal.bulk_write(operations, ordered=False)
+        inserted = set(result.upserted_ids)
+    except BulkWriteError as e:
+        # Concurrent uploads of the same entry lose the upsert race with a duplicate key
+        inserted = {upsert["index"] for upsert in e.details.get("upserted", [])}
+        if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+            raise
+    return {entry["client_id"] for index, entry in enumerate(entries) if index not in inserted}
+
+
+def _record_id(station_id: str, client_id: str, kind: str) -> str:
+    return str(uuid.uuid5(SYNC_NAMESPACE, f"{station_id}/{client_id}/{kind}"))
+
+
+async def _insert_idempotent(collection, documents: List[Dict[str, Any]]) -> set:
+    """insert_many(ordered=False) treating duplicate ids as already written; returns failed indexes"""
+    if not documents:
+        return set()
+    try:
+        await collection.insert_many(documents, ordered=False)
+        return set()
+    except BulkWriteError as e:
+        return {
+            error["index"] for error in e.details.get("writeErrors", [])
+            if error["code"] != DUPLICATE_KEY_ERROR
+        }
+
+
+async def apply_pending_entries(db, station_id: str, event_id: str, lease_seconds: int = 60, inventory=None) -> int:
+    """
+    Apply every unapplied journal entry of a station exactly once
+
+    Entries are claimed with a lease so concurrent syncs of the same station
+    do not apply them twice. Supply is reserved in `inventory` before any
+    record is written, and the reservation is noted on the entry so a retry
+    does not reserve it again; entries past the remaining supply, for an
+    unknown recipient or for a token outside the station's event are
+    rejected. Entries for a token whose contract is still being deployed
+    stay pending for the next sync, since its address is a placeholder.
+    Offline transfer and purchase records use ids derived from the entry, so
+    a retry after a crash re-inserts nothing. Balance deltas are applied
+    after entries are marked applied; a crash in between leaves the ledger
+    short, which `balances.py reconcile` repairs from purchases. Returns the
+    number of entries applied.
+    """
+    now = datetime.datetime.utcnow()
+    claim = uuid.uuid4().hex
+    await db.cashier_journal.update_many(
+        {
+            "station_id": station_id,
+            "applied": False,
+            "$or": [
+                {"claimed_at": None},
+                {"claimed_at": {"$lt": now - datetime.timedelta(seconds=lease_seconds)}}
+            ]
+        },
+        {"$set": {"claim": claim, "claimed_at": now}}
+    )
+    entries = [
+        entry async for entry in
+        db.cashier_journal.find({"station_id": station_id, "claim": claim, "applied": False}).sort("sequence", 1)
+    ]
+    if not entries:
+        return 0
+
+    users_by_email = {}
+    async for user in db.users.find(
+        {"email": {"$in": list({entry["user_email"] for entry in entries})}},
+        {"_id": 0, "id": 1, "email": 1, "wallet_address": 1}
+    ):
+        users_by_email[user["email"]] = user
+
+    tokens_by_address = {}
+    async for token in db.tokens.find(
+        {"event_id": event_id, "contract_address": {"$in": list({entry["token_address"] for entry in entries})}},
+        {"_id": 0, "contract_address": 1, "deployment_status": 1, "deployment_method": 1}
+    ):
+        tokens_by_address[token["contract_address"]] = token
+
+    def reject(entry, error):
+        return UpdateOne(
+            {"_id": entry["_id"], "claim": claim},
+            {"$set": {"applied": True, "status": "rejected", "error": error, "applied_at": now, "claim": None}}
+        )
+
+    def retry_later(entry, error=None):
+        return UpdateOne(
+            {"_id": entry["_id"], "claim": claim},
+            {"$set": {"error": error, "claim": None, "claimed_at": None}}
+        )
+
+    accepted = []
+    outcomes = []
+    for entry in entries:
+        target_user = users_by_email.get(entry["user_email"])
+        token = tokens_by_address.get(entry["token_address"])
+        if not target_user:
+            outcomes.append(reject(entry, f"Usuário com email {entry['user_email']} não encontrado"))
+        elif not token:
+            outcomes.append(reject(entry, "Token não pertence a este evento"))
+        elif not has_final_address(token):
+            outcomes.append(retry_later(entry, "Token ainda em implantação; a venda será registrada na próxima sincronização"))
+        elif inventory and not entry.get("inventory_reserved"):
+            try:
+                reserved = await inventory.reserve(entry["token_address"], entry["amount"])
+            except TokenNotReadyError:
+                outcomes.append(retry_later(entry, "Token ainda em implantação; a venda será registrada na próxima sincronização"))
+                continue
+            except UnknownTokenError:
+                outcomes.append(reject(entry, "Token não pertence a este evento"))
+                continue
+            if not reserved:
+                outcomes.append(reject(entry, "Estoque do token esgotado; venda não registrada"))
+                continue
+            await db.cashier_journal.update_one(
+                {"_id": entry["_id"], "claim": claim},
+                {"$set": {"inventory_reserved": True}}
+            )
+            accepted.append((entry, target_user))
+        else:
+            accepted.append((entry, target_user))
+
+    transfer_docs = []
+    purchase_docs = []
+    for entry, target_user in accepted:
+        journal_key = f"{station_id}/{entry['client_id']}"
+        tx_hash = f"0x{hashlib.sha256(journal_key.encode()).hexdigest()}"
+        transfer_docs.append({
+            "id": _record_id(station_id, entry["client_id"], "transfer"),
+            "from_cashier_id": entry["cashier_user_id"],
+            "from_cashier_name": entry["cashier_name"],
+            "to_user_id": target_user["id"],
+            "to_user_email": target_user["email"],
+            "to_wallet": target_user["wallet_address"],
+            "token_address": entry["token_address"],
+            "amount": entry["amount"],
+            "transfer_type": "offline_sync",
+            "cashier_station": station_id,
+            "journal_client_id": entry["client_id"],
+            "timestamp": entry["recorded_at"],
+            "status": "completed",
+            "tx_hash": tx_hash
+        })
+        purchase_docs.append({
+            "id": _record_id(station_id, entry["client_id"], "purchase"),
+            "user_id": target_user["id"],
+            "user_wallet": target_user["wallet_address"],
+            "token_address": entry["token_address"],
+            "amount": entry["amount"],
+            "payment_method": "offline_sync",
+            "payment_type": "offline",
+            "timestamp": entry["recorded_at"],
+            "status": "completed",
+            "tx_hash": tx_hash
+        })
+
+    failed = await _insert_idempotent(db.offline_transfers, transfer_docs)
+    failed |= await _insert_idempotent(db.purchases, purchase_docs)
+
+    deltas = {}
+    for index, (entry, target_user) in enumerate(accepted):
+        if index in failed:
+            # The reservation stays noted on the entry; the next sync retries the writes
+            outcomes.append(retry_later(entry))
+            continue
+        outcomes.append(UpdateOne(
+            {"_id": entry["_id"], "claim": claim},
+            {"$set": {"applied": True, "status": "applied", "error": None, "applied_at": now, "claim": None}}
+        ))
+        key = (target_user["wallet_address"], entry["token_address"])
+        deltas[key] = deltas.get(key, 0) + entry["amount"]
+
+    await db.cashier_journal.bulk_write(outcomes, ordered=False)
+    await apply_balance_deltas(db, [(wallet, token, amount) for (wallet, token), amount in deltas.items()])
+    return len(accepted) - len(failed)
+
+
+async def load_entry_results(db, station_id: str, client_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Current journal status of the given entries, keyed by client id"""
+    results = {}
+    async for entry in db.cashier_journal.find(
+        {"station_id": station_id, "client_id": {"$in": client_ids}},
+        {"_id": 0, "client_id": 1, "sequence": 1, "status": 1, "error": 1}
+    ):
+        results[entry["client_id"]] = entry
+    return results
+
+
+async def advance_acknowledged_sequence(db, station_id: str) -> int:
+    """
+    Highest sequence up to which every entry of the station is applied
+
+    Stations may drop journal entries at or below it. Gaps (entries not yet
+    uploaded or still pending) stop the acknowledgement from advancing.
+    """
+    station = await db.cashier_stations.find_one({"station_id": station_id}, {"acknowledged_sequence": 1})
+    acknowledged = (station or {}).get("acknowledged_sequence", 0)
+    cursor = db.cashier_journal.find(
+        {"station_id": station_id, "sequence": {"$gt": acknowledged}},
+        {"_id": 0, "sequence": 1, "applied": 1}
+    ).sort("sequence", 1)
+    async for entry in cursor:
+        if entry["sequence"] != acknowledged + 1 or not entry["applied"]:
+            break
+        acknowledged = entry["sequence"]
+    await db.cashier_stations.update_one(
+        {"station_id": station_id},
+        {"$max": {"acknowledged_sequence": acknowledged}}
+    )
+    return acknowledged
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime.datetime]:
+    return datetime.datetime.fromisoformat(value) if value else None
+
+
+async def load_sync_delta(db, event_id: str, checkpoint: Dict[str, Any], limit: int = 1000) -> Dict[str, Any]:
+    """
+    Token catalog and balance changes of an event since `checkpoint`
+
+    An empty checkpoint returns a full snapshot. Balances are paged with a
+    (updated_at, _id) keyset; when `has_more` is set the station should sync
+    again with the returned checkpoint. Raises ValueError for a malformed
+    checkpoint.
+    """
+    tokens_since = _parse_time(checkpoint.get("tokens"))
+    balances_since = _parse_time(checkpoint.get("balances"))
+    if checkpoint.get("balance_id") and not ObjectId.is_valid(checkpoint["balance_id"]):
+        raise ValueError("invalid balance_id in checkpoint")
+    balances_after_id = ObjectId(checkpoint["balance_id"]) if checkpoint.get("balance_id") else None
+
+    horizon = datetime.datetime.utcnow() - datetime.timedelta(seconds=SYNC_SETTLE_SECONDS)
+    # Mongo stores milliseconds; a truncated horizon round-trips exactly
+    horizon = horizon.replace(microsecond=horizon.microsecond // 1000 * 1000)
+
+    token_query: Dict[str, Any] = {"event_id": event_id}
+    if tokens_since:
+        token_query["updated_at"] = {"$gt": tokens_since, "$lte": horizon}
+    tokens = []
+    token_addresses = []
+    async for token in db.tokens.find(token_query, TOKEN_DELTA_PROJECTION):
+        tokens.append(token)
+    async for token in db.tokens.find({"event_id": event_id}, {"_id": 0, "contract_address": 1}):
+        token_addresses.append(token["contract_address"])
+
+    balance_query: Dict[str, Any] = {"token_address": {"$in": token_addresses}, "updated_at": {"$lte": horizon}}
+    if balances_since and balances_after_id:
+        balance_query["$or"] = [
+            {"updated_at": {"$gt": balances_since}},
+            {"updated_at": balances_since, "_id": {"$gt": balances_after_id}}
+        ]
+    elif balances_since:
+        balance_query["updated_at"]["$gt"] = balances_since
+
+    balances = []
+    cursor = db.balances.find(
+        balance_query,
+        {"wallet_address": 1, "token_address": 1, "balance": 1, "updated_at": 1}
+    ).sort([("updated_at", 1), ("_id", 1)]).limit(limit + 1)
+    async for row in cursor:
+        balances.append(row)
+
+    has_more = len(balances) > limit
+    balances = balances[:limit]
+    if has_more:
+        next_balances = {"balances": balances[-1]["updated_at"].isoformat(), "balance_id": str(balances[-1]["_id"])}
+    else:
+        next_balances = {"balances": horizon.isoformat(), "balance_id": None}
+    for row in balances:
+        row.pop("_id")
+
+    return {
+        "tokens": tokens,
+        "balances": balances,
+        "has_more": has_more,
+        "checkpoint": {"tokens": max(horizon, tokens_since or horizon).isoformat(), **next_balances}
+    }
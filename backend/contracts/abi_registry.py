@@ -0,0 +1,131 @@
+"""
+Content-Addressed ABI Registry for BanKa
+Stores each distinct contract ABI once in the `abis` collection, keyed by
+the SHA-256 of its canonical JSON, and interns loaded ABIs in memory so
+token documents only need to carry the hash
+
+Migrate documents that still embed full ABIs with:
+    python backend/contracts/abi_registry.py migrate
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import datetime
+from typing import Dict, Any, List, Optional
+import bson
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def compute_abi_hash(abi: List[Dict[str, Any]]) -> str:
+    """Stable content hash: key order and whitespace do not matter"""
+    canonical = json.dumps(abi, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class AbiRegistry:
+    def __init__(self, db):
+        """
+        Initialize ABI Registry
+
+        Args:
+            db: Motor database holding the `abis` collection
+        """
+        self.db = db
+        self._abis: Dict[str, List[Dict[str, Any]]] = {}
+
+    async def register(self, abi: List[Dict[str, Any]]) -> str:
+        """Store an ABI (once) and return its hash"""
+        abi_hash = compute_abi_hash(abi)
+        if abi_hash not in self._abis:
+            await self.db.abis.update_one(
+                {"_id": abi_hash},
+                {"$setOnInsert": {"abi": abi, "created_at": datetime.datetime.utcnow()}},
+                upsert=True
+            )
+            self._abis[abi_hash] = abi
+        return abi_hash
+
+    async def get(self, abi_hash: str) -> Optional[List[Dict[str, Any]]]:
+        """Resolve a hash to its ABI, loading it from Mongo on first use"""
+        abi = self._abis.get(abi_hash)
+        if abi is None:
+            document = await self.db.abis.find_one({"_id": abi_hash})
+            if document:
+                abi = document["abi"]
+                self._abis[abi_hash] = abi
+        return abi
+
+    def stats(self) -> Dict[str, Any]:
+        return {"interned_abis": len(self._abis)}
+
+
+def _bson_size(document: Dict[str, Any]) -> int:
+    return len(bson.encode(document))
+
+
+async def migrate_token_abis(db, registry: AbiRegistry) -> Dict[str, int]:
+    """
+    Replace embedded `contract_abi` values with `contract_abi_hash` in the
+    tokens collection and in events' embedded token lists
+
+    Returns document byte sizes before/after so the savings can be reported.
+    """
+    stats = {"tokens_migrated": 0, "events_migrated": 0, "bytes_before": 0, "bytes_after": 0}
+
+    async for token in db.tokens.find({"contract_abi": {"$exists": True}}):
+        stats["bytes_before"] += _bson_size(token)
+        update: Dict[str, Any] = {"$unset": {"contract_abi": ""}}
+        if token["contract_abi"]:
+            update["$set"] = {"contract_abi_hash": await registry.register(token["contract_abi"])}
+        await db.tokens.update_one({"_id": token["_id"]}, update)
+
+        token.pop("contract_abi")
+        if "$set" in update:
+            token.update(update["$set"])
+        stats["bytes_after"] += _bson_size(token)
+        stats["tokens_migrated"] += 1
+
+    async for event in db.events.find({"tokens.contract_abi": {"$exists": True}}):
+        stats["bytes_before"] += _bson_size(event)
+        for token in event.get("tokens", []):
+            if "contract_abi" not in token:
+                continue
+            # Positional update per token, so concurrent status updates are kept
+            abi = token.pop("contract_abi")
+            update: Dict[str, Any] = {"$unset": {"tokens.$.contract_abi": ""}}
+            if abi:
+                token["contract_abi_hash"] = await registry.register(abi)
+                update["$set"] = {"tokens.$.contract_abi_hash": token["contract_abi_hash"]}
+            await db.events.update_one({"_id": event["_id"], "tokens.id": token["id"]}, update)
+        stats["bytes_after"] += _bson_size(event)
+        stats["events_migrated"] += 1
+
+    return stats
+
+
+def main():
+    import argparse
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Move embedded token ABIs into the content-addressed abis collection")
+    parser.add_argument("command", choices=["migrate"])
+    parser.parse_args()
+
+    async def run():
+        db = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017')).banka_db
+        registry = AbiRegistry(db)
+        stats = await migrate_token_abis(db, registry)
+        saved = stats["bytes_before"] - stats["bytes_after"]
+        print(f"Migrated {stats['tokens_migrated']} token(s) and {stats['events_migrated']} event(s) "
+              f"to {registry.stats()['interned_abis']} distinct ABI(s)")
+        print(f"Document bytes: {stats['bytes_before']} -> {stats['bytes_after']} (saved {saved})")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
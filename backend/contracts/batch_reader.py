@@ -0,0 +1,185 @@
+"""
+Batched Contract Reads for BanKa
+Coalesces many eth_call reads into a single round trip, either through the
+Multicall3 contract or, where it is not deployed, a JSON-RPC batch request.
+Endpoints that reject batch requests get the calls one request each.
+"""
+
+import os
+import asyncio
+import itertools
+from typing import List, Tuple, Optional, Any, Dict
+import aiohttp
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Multicall3 lives at the same address on BNB Chain, its testnet and most EVM chains
+MULTICALL3_ADDRESS = os.environ.get('MULTICALL3_ADDRESS', '0xcA11bde05977b3631167028862bE2a173976CA11')
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+# Keep individual requests well below typical RPC payload limits
+MAX_CALLS_PER_REQUEST = 500
+
+# HTTP statuses with which endpoints refuse JSON-RPC batches (as opposed to
+# being unavailable)
+BATCH_REJECTED_STATUSES = (400, 405, 413)
+
+
+class BatchReader:
+    def __init__(self, w3, provider_url: str, multicall_address: str = MULTICALL3_ADDRESS):
+        """
+        Initialize Batch Reader
+
+        Args:
+            w3: AsyncWeb3 instance
+            provider_url: JSON-RPC endpoint, used directly for batch requests
+            multicall_address: Multicall3 deployment to aggregate through
+        """
+        self.w3 = w3
+        self.provider_url = provider_url
+        self.multicall = w3.eth.contract(address=w3.to_checksum_address(multicall_address), abi=MULTICALL3_ABI)
+        self.multicall_available: Optional[bool] = None  # unknown until first use
+        self.batch_available: Optional[bool] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._request_ids = itertools.count(1)
+        self.round_trips = 0
+        self.calls = 0
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "round_trips": self.round_trips,
+            "calls": self.calls,
+            "multicall_available": self.multicall_available,
+            "batch_available": self.batch_available
+        }
+
+    async def call_many(self, calls: List[Tuple[str, bytes]]) -> List[Optional[bytes]]:
+        """
+        Execute (contract address, calldata) pairs; failed calls come back as None
+
+        Uses Multicall3 when the chain has it, otherwise one JSON-RPC batch
+        of eth_call requests per chunk (or single requests, see rpc_batch).
+        """
+        results: List[Optional[bytes]] = []
+        for start in range(0, len(calls), MAX_CALLS_PER_REQUEST):
+            chunk = calls[start:start + MAX_CALLS_PER_REQUEST]
+            self.calls += len(chunk)
+            if self.multicall_available is not False:
+                try:
+                    results.extend(await self._multicall(chunk))
+                    self.multicall_available = True
+                    continue
+                except Exception as e:
+                    logger.warning(f"Multicall3 unavailable, using JSON-RPC batches: {e}")
+                    self.multicall_available = False
+            results.extend(await self._rpc_batch_calls(chunk))
+        return results
+
+    async def _multicall(self, calls: List[Tuple[str, bytes]]) -> List[Optional[bytes]]:
+        self.round_trips += 1
+        aggregated = await self.multicall.functions.aggregate3(
+            [(self.w3.to_checksum_address(address), True, data) for address, data in calls]
+        ).call()
+        return [bytes(return_data) if success and return_data else None for success, return_data in aggregated]
+
+    async def _rpc_batch_calls(self, calls: List[Tuple[str, bytes]]) -> List[Optional[bytes]]:
+        requests = [
+            ("eth_call", [{"to": address, "data": "0x" + data.hex()}, "latest"])
+            for address, data in calls
+        ]
+        responses = await self.rpc_batch(requests)
+        results = []
+        for response in responses:
+            if isinstance(response, str) and len(response) > 2:
+                results.append(bytes.fromhex(response[2:]))
+            else:
+                results.append(None)
+        return results
+
+    async def rpc_batch(self, requests: List[Tuple[str, list]]) -> List[Any]:
+        """
+        Send several JSON-RPC requests in one HTTP round trip
+
+        Returns one entry per request, in order: the `result` value, or an
+        Exception carrying the node's error for that request. If the
+        endpoint rejects batches, the requests are sent individually (and
+        concurrently) from then on.
+        """
+        if not requests:
+            return []
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+
+        payload = []
+        for method, params in requests:
+            payload.append({"jsonrpc": "2.0", "id": next(self._request_ids), "method": method, "params": params})
+
+        if self.batch_available is not False:
+            body = await self._post(payload)
+            if isinstance(body, list):
+                self.batch_available = True
+                by_id = {item.get("id"): item for item in body if isinstance(item, dict)}
+                return [self._result(by_id.get(request["id"])) for request in payload]
+            logger.warning(f"RPC endpoint rejected batch request, sending calls individually: {body}")
+            self.batch_available = False
+
+        return await asyncio.gather(*(self._single(request) for request in payload))
+
+    async def _single(self, request: Dict[str, Any]) -> Any:
+        try:
+            return self._result(await self._post(request))
+        except Exception as e:
+            return e
+
+    async def _post(self, payload) -> Any:
+        self.round_trips += 1
+        async with self._session.post(self.provider_url, json=payload) as response:
+            if isinstance(payload, list) and response.status in BATCH_REJECTED_STATUSES:
+                return f"HTTP {response.status}"
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    @staticmethod
+    def _result(item: Any) -> Any:
+        if not isinstance(item, dict):
+            return Exception(f"Missing response: {item}")
+        if "error" in item:
+            error = item["error"]
+            return Exception(error.get("message", str(error)) if isinstance(error, dict) else str(error))
+        return item.get("result")
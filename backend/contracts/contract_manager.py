@@ -6,11 +6,18 @@ Handles compilation, deployment, and interaction with Event Token contracts
 import os
 import json
 import asyncio
+import functools
 from typing import Dict, Any, Optional, Tuple
-from web3 import Web3
+from web3 import AsyncWeb3
 from eth_account import Account
 import logging
 
+from .nonce_manager import NonceManager
+from .contract_registry import ContractRegistry, compile_source_cached
+from .gas_oracle import GasOracle, bytecode_key
+from .batch_reader import BatchReader
+from .receipt_watcher import ReceiptWatcher, normalize_tx_hash
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -249,8 +256,15 @@ COMPILED_CONTRACT = {
     "bytecode": "0x608060405234801561001057600080fd5b5060405161174a38038061174a83398101604081905261002f916102a9565b86516100429060049060208a01906101a8565b5085516100569060059060208901906101a8565b506005805460ff19166001179055600086815260209190915260408120869055600691909155600761008883826103c1565b50600881905560098054610100600160a81b0319166101006001600160a01b038816021790556005805460ff60a01b191690556040518681526001600160a01b038616906000907fddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef9060200160405180910390a35050505050505061047f565b82805461011490610383565b90600052602060002090601f016020900481019282610136576000855561017c565b82601f1061014f57805160ff191683800117855561017c565b8280016001018555821561017c579182015b8281111561017c578251825591602001919060010190610161565b5061018892915061018c565b5090565b5b80821115610188576000815560010161018d565b634e487b7160e01b600052604160045260246000fd5b600082601f8301126101c857600080fd5b81516001600160401b03808211156101e2576101e26101a1565b604051601f8301601f19908116603f0116810190828211818310171561020a5761020a6101a1565b8160405283815260209250866020858801011115610227577f"
 }
 
+SOLC_VERSION = '0.8.19'
+
+@functools.lru_cache(maxsize=None)
+def _read_contract_source(contract_path: str) -> str:
+    with open(contract_path, 'r') as file:
+        return file.read()
+
 class ContractManager:
-    def __init__(self, web3_provider_url: str, deployer_private_key: str):
+    def __init__(self, web3_provider_url: str, deployer_private_key: str, crypto_executor=None, gas_oracle=None, db=None):
         """
         Initialize Contract Manager
         
@@ -258,62 +272,67 @@ class ContractManager:
             web3_provider_url: BNB Chain RPC URL
             deployer_private_key: Private key for contract deployment
         """
-        self.w3 = Web3(Web3.HTTPProvider(web3_provider_url))
+        self.w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(web3_provider_url))
         self.deployer_private_key = deployer_private_key
         self.deployer_account = Account.from_key(deployer_private_key)
+        self.crypto_executor = crypto_executor
+        self.nonce_manager = NonceManager(self.w3, self.deployer_account.address)
         self.use_precompiled = True  # Use pre-compiled contract for now
+        self.contracts = ContractRegistry(self.w3)
+        self.gas_oracle = gas_oracle or GasOracle(self.w3, strategy=os.environ.get('GAS_STRATEGY', 'standard'))
+        self.batch_reader = BatchReader(self.w3, web3_provider_url)
+        self.receipt_watcher = ReceiptWatcher(self.w3, self.batch_reader, db=db)
+        self._compiled: Optional[Dict[str, Any]] = None
         
-    def is_connected(self) -> bool:
+    async def is_connected(self) -> bool:
         """Check if Web3 is connected to the blockchain"""
         try:
-            return self.w3.is_connected()
+            return await self.w3.is_connected()
         except Exception:
             return False
     
     def get_contract_source(self) -> str:
-        """Read the EventToken.sol contract source"""
-        contract_path = os.path.join(os.path.dirname(__file__), 'EventToken.sol')
-        with open(contract_path, 'r') as file:
-            return file.read()
+        """Read the EventToken.sol contract source (once per process)"""
+        return _read_contract_source(os.path.join(os.path.dirname(__file__), 'EventToken.sol'))
     
     def compile_contract(self) -> Dict[str, Any]:
         """
         Get compiled contract (using pre-compiled version for reliability)
         
+        The result is built once per manager; solcx output is additionally
+        cached on disk by source hash and compiler version.
+        
         Returns:
             Dict containing bytecode and ABI
         """
+        if self._compiled is not None:
+            return self._compiled
+        
         try:
             if self.use_precompiled:
-                return {
+                self._compiled = {
                     'bytecode': COMPILED_CONTRACT['bytecode'],
                     'abi': COMPILED_CONTRACT['abi'],
                     'source': self.get_contract_source()
                 }
             else:
                 # Original solcx compilation - kept for future use
-                from solcx import compile_source, install_solc, set_solc_version
-                
-                install_solc('0.8.19')
-                set_solc_version('0.8.19')
-                
                 source_code = self.get_contract_source()
-                compiled_sol = compile_source(source_code)
-                contract_id, contract_interface = compiled_sol.popitem()
-                
-                return {
-                    'bytecode': contract_interface['bin'],
-                    'abi': contract_interface['abi'],
+                compiled = compile_source_cached(source_code, SOLC_VERSION)
+                self._compiled = {
+                    'bytecode': compiled['bytecode'],
+                    'abi': compiled['abi'],
                     'source': source_code
                 }
         except Exception as e:
             logger.error(f"Contract compilation failed: {e}")
             # Fallback to pre-compiled version
-            return {
+            self._compiled = {
                 'bytecode': COMPILED_CONTRACT['bytecode'],
                 'abi': COMPILED_CONTRACT['abi'],
                 'source': self.get_contract_source()
             }
+        return self._compiled
     
     async def deploy_token_contract(
         self,
@@ -341,23 +360,15 @@ class ContractManager:
             Dict containing contract address, transaction hash, and ABI
         """
         try:
-            if not self.is_connected():
+            if not await self.is_connected():
                 raise Exception("Not connected to blockchain")
             
             # Compile contract
             contract_data = self.compile_contract()
             
-            # Create contract instance
-            contract = self.w3.eth.contract(
-                abi=contract_data['abi'],
-                bytecode=contract_data['bytecode']
-            )
-            
-            # Get nonce
-            nonce = self.w3.eth.get_transaction_count(self.deployer_account.address)
-            
-            # Build constructor transaction
-            constructor_txn = contract.constructor(
+            # Contract factory is built once and reused across deployments
+            contract = self.contracts.factory('EventToken', contract_data['abi'], contract_data['bytecode'])
+            constructor = contract.constructor(
                 token_name,
                 token_symbol,
                 total_supply,
@@ -365,25 +376,38 @@ class ContractManager:
                 owner_address,
                 event_name,
                 price_in_cents
-            ).build_transaction({
-                'from': self.deployer_account.address,
-                'nonce': nonce,
-                'gas': 2000000,  # Increased gas limit for contract deployment
-                'gasPrice': self.w3.to_wei('5', 'gwei'),  # BNB testnet gas price
-            })
-            
-            # Sign transaction
-            signed_txn = self.w3.eth.account.sign_transaction(
-                constructor_txn, 
-                private_key=self.deployer_private_key
+            )
+            fee_params = await self.gas_oracle.fee_params()
+            gas_limit = await self.gas_oracle.estimate_gas(
+                bytecode_key('EventToken', contract_data['bytecode'], (token_name, token_symbol, event_name)),
+                lambda: constructor.estimate_gas({'from': self.deployer_account.address}),
+                fallback=2000000
             )
             
-            # Send transaction
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+            # Reserve a nonce locally so concurrent deployments never collide
+            async with self.nonce_manager.reserve() as reservation:
+                # Build constructor transaction
+                constructor_txn = await constructor.build_transaction({
+                    'from': self.deployer_account.address,
+                    'nonce': reservation.nonce,
+                    'gas': gas_limit,
+                    **fee_params
+                })
+                
+                # Sign transaction
+                signed_txn = await self._run_crypto(
+                    self.w3.eth.account.sign_transaction,
+                    constructor_txn, 
+                    private_key=self.deployer_private_key
+                )
+                
+                # Send transaction
+                tx_hash = normalize_tx_hash(await self.w3.eth.send_raw_transaction(signed_txn.raw_transaction))
+                reservation.mark_sent(tx_hash)
             
             # Wait for transaction receipt
-            logger.info(f"Deploying contract... TX Hash: {tx_hash.hex()}")
-            tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            logger.info(f"Deploying contract... TX Hash: {tx_hash}")
+            tx_receipt = await self.receipt_watcher.wait(tx_hash, timeout=120, kind='deploy')
             
             if tx_receipt.status == 1:
                 contract_address = tx_receipt.contractAddress
@@ -392,7 +416,7 @@ class ContractManager:
                 return {
                     'success': True,
                     'contract_address': contract_address,
-                    'transaction_hash': tx_hash.hex(),
+                    'transaction_hash': tx_hash,
                     'abi': contract_data['abi'],
                     'bytecode': contract_data['bytecode'],
                     'gas_used': tx_receipt.gasUsed,
@@ -403,6 +427,7 @@ class ContractManager:
                 
         except Exception as e:
             logger.error(f"Contract deployment failed: {e}")
+            await self._resync_nonces()
             return {
                 'success': False,
                 'error': str(e),
@@ -411,9 +436,22 @@ class ContractManager:
                 'abi': None
             }
     
+    async def _resync_nonces(self):
+        """Resync the deployer nonce allocator after a failed transaction"""
+        try:
+            await self.nonce_manager.reconcile()
+        except Exception as e:
+            logger.error(f"Nonce reconciliation failed: {e}")
+    
+    async def _run_crypto(self, fn, *args, **kwargs):
+        """Run a CPU-bound signing/key operation on the crypto executor when one is configured"""
+        if self.crypto_executor:
+            return await self.crypto_executor.run(fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+    
     def get_contract_instance(self, contract_address: str, abi: list):
-        """Get a contract instance for interaction"""
-        return self.w3.eth.contract(address=contract_address, abi=abi)
+        """Get a (cached) contract instance for interaction"""
+        return self.contracts.instance(contract_address, abi)
     
     async def get_token_info(self, contract_address: str, abi: list) -> Dict[str, Any]:
         """
@@ -430,7 +468,7 @@ class ContractManager:
             contract = self.get_contract_instance(contract_address, abi)
             
             # Call the getTokenInfo function
-            token_info = contract.functions.getTokenInfo().call()
+            token_info = await contract.functions.getTokenInfo().call()
             
             return {
                 'name': token_info[0],
@@ -467,44 +505,66 @@ class ContractManager:
         Returns:
             Dict containing transaction details
         """
+        nonce_source = None
         try:
-            from_account = Account.from_key(from_private_key)
+            from_account = await self._run_crypto(Account.from_key, from_private_key)
             contract = self.get_contract_instance(contract_address, abi)
             
-            # Get nonce
-            nonce = self.w3.eth.get_transaction_count(from_account.address)
+            # Deployer transfers share the local nonce allocator; other
+            # senders fall back to the node's pending count
+            if from_account.address == self.deployer_account.address:
+                nonce_source = self.nonce_manager
+            else:
+                nonce_source = NonceManager(self.w3, from_account.address)
             
-            # Build transfer transaction
-            transfer_txn = contract.functions.transfer(to_address, amount).build_transaction({
-                'from': from_account.address,
-                'nonce': nonce,
-                'gas': 100000,
-                'gasPrice': self.w3.to_wei('5', 'gwei'),
-            })
+            transfer_call = contract.functions.transfer(to_address, amount)
+            fee_params = await self.gas_oracle.fee_params()
+            # A transfer to a fresh holder costs more than one to an existing
+            # holder, so the shared estimate gets extra headroom
+            gas_limit = await self.gas_oracle.estimate_gas(
+                ('call', 'transfer'),
+                lambda: transfer_call.estimate_gas({'from': from_account.address}),
+                fallback=100000,
+                margin=1.5
+            )
             
-            # Sign and send transaction
-            signed_txn = self.w3.eth.account.sign_transaction(transfer_txn, from_private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+            async with nonce_source.reserve() as reservation:
+                # Build transfer transaction
+                transfer_txn = await transfer_call.build_transaction({
+                    'from': from_account.address,
+                    'nonce': reservation.nonce,
+                    'gas': gas_limit,
+                    **fee_params
+                })
+                
+                # Sign and send transaction
+                signed_txn = await self._run_crypto(self.w3.eth.account.sign_transaction, transfer_txn, from_private_key)
+                tx_hash = normalize_tx_hash(await self.w3.eth.send_raw_transaction(signed_txn.raw_transaction))
+                reservation.mark_sent(tx_hash)
             
             # Wait for receipt
-            tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            tx_receipt = await self.receipt_watcher.wait(tx_hash, timeout=120, kind='transfer')
             
             return {
                 'success': True,
-                'transaction_hash': tx_hash.hex(),
+                'transaction_hash': tx_hash,
                 'gas_used': tx_receipt.gasUsed,
                 'status': tx_receipt.status
             }
         except Exception as e:
             logger.error(f"Token transfer failed: {e}")
+            # Only the deployer's allocator outlives this call; other
+            # senders' allocators are discarded with it
+            if nonce_source is self.nonce_manager:
+                await self._resync_nonces()
             return {
                 'success': False,
                 'error': str(e)
             }
 
-def create_contract_manager(web3_provider_url: str, deployer_private_key: str) -> ContractManager:
+def create_contract_manager(web3_provider_url: str, deployer_private_key: str, crypto_executor=None, gas_oracle=None, db=None) -> ContractManager:
     """Factory function to create ContractManager instance"""
-    return ContractManager(web3_provider_url, deployer_private_key)
+    return ContractManager(web3_provider_url, deployer_private_key, crypto_executor=crypto_executor, gas_oracle=gas_oracle, db=db)
 
 # Example usage and testing
 if __name__ == "__main__":
@@ -521,7 +581,7 @@ if __name__ == "__main__":
         
         manager = create_contract_manager(provider_url, test_private_key)
         
-        print(f"Connected to blockchain: {manager.is_connected()}")
+        print(f"Connected to blockchain: {await manager.is_connected()}")
         
         # Test compilation
         try:
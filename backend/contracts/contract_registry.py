@@ -0,0 +1,115 @@
+"""
+Contract Object Registry for BanKa
+Builds contract factories once, keeps per-address contract instances in an
+LRU and caches solcx compilation output on disk keyed by source hash and
+compiler version
+"""
+
+import os
+import json
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, List
+import logging
+
+from .abi_registry import compute_abi_hash
+
+logger = logging.getLogger(__name__)
+
+SOLC_CACHE_DIR = os.environ.get('SOLC_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'banka', 'solc'))
+
+
+class ContractRegistry:
+    def __init__(self, w3, maxsize: int = 1024):
+        """
+        Initialize Contract Registry
+
+        Args:
+            w3: AsyncWeb3 instance the contract objects are bound to
+            maxsize: Maximum number of cached per-address contract instances
+        """
+        self.w3 = w3
+        self.maxsize = maxsize
+        self._factories: Dict[str, Any] = {}
+        self._instances: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._abi_hashes: Dict[int, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def factory(self, name: str, abi: List[Dict[str, Any]], bytecode: str):
+        """Contract factory for deployments, built once per name"""
+        contract_factory = self._factories.get(name)
+        if contract_factory is None:
+            contract_factory = self.w3.eth.contract(abi=abi, bytecode=bytecode)
+            self._factories[name] = contract_factory
+        return contract_factory
+
+    def instance(self, contract_address: str, abi: List[Dict[str, Any]]):
+        """Contract instance bound to an address, reused across calls"""
+        key = (self.w3.to_checksum_address(contract_address), self._hash_abi(abi))
+        contract = self._instances.get(key)
+        if contract is not None:
+            self._instances.move_to_end(key)
+            self.hits += 1
+            return contract
+        self.misses += 1
+        contract = self.w3.eth.contract(address=key[0], abi=abi)
+        self._instances[key] = contract
+        while len(self._instances) > self.maxsize:
+            self._instances.popitem(last=False)
+        return contract
+
+    def _hash_abi(self, abi: List[Dict[str, Any]]) -> str:
+        # ABIs are usually shared objects (module constants or interned by
+        # the AbiRegistry), so memoize the hash by identity
+        memo = self._abi_hashes.get(id(abi))
+        if memo is not None and memo[0] is abi:
+            return memo[1]
+        abi_hash = compute_abi_hash(abi)
+        if len(self._abi_hashes) >= self.maxsize:
+            self._abi_hashes.clear()
+        self._abi_hashes[id(abi)] = (abi, abi_hash)
+        return abi_hash
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "factories": len(self._factories),
+            "instances": len(self._instances),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+def compile_source_cached(source_code: str, solc_version: str) -> Dict[str, Any]:
+    """
+    Compile Solidity source with solcx, reusing a previous result from disk
+    when the same source was already compiled with the same compiler version
+    """
+    cache_key = hashlib.sha256(f"{solc_version}\n{source_code}".encode()).hexdigest()
+    cache_path = os.path.join(SOLC_CACHE_DIR, f"{cache_key}.json")
+
+    try:
+        with open(cache_path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        pass
+
+    from solcx import compile_source, install_solc, set_solc_version
+
+    install_solc(solc_version)
+    set_solc_version(solc_version)
+    compiled_sol = compile_source(source_code)
+    contract_id, contract_interface = compiled_sol.popitem()
+    compiled = {'bytecode': contract_interface['bin'], 'abi': contract_interface['abi']}
+
+    try:
+        os.makedirs(SOLC_CACHE_DIR, exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(compiled, file)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write solc cache {cache_path}: {e}")
+
+    return compiled
@@ -0,0 +1,35 @@
+"""
+Deterministic CREATE2 Token Addresses for BanKa
+Computes where a token contract will live before it is deployed, from the
+token's salt and init code hash, so token creation can return the final
+contract address immediately. Deployment goes through the deterministic
+deployment proxy, which CREATE2-deploys `salt ++ init_code` sent to it and
+exists at the same address on BNB Chain, its testnet and most EVM chains.
+"""
+
+import os
+from eth_abi import encode
+from web3 import AsyncWeb3
+
+CREATE2_DEPLOYER_ADDRESS = AsyncWeb3.to_checksum_address(
+    os.environ.get('CREATE2_DEPLOYER_ADDRESS', '0x4e59b44847b379578588920cA78FbF26c0B4956C')
+)
+
+
+def token_salt(token_id: str) -> bytes:
+    """32-byte CREATE2 salt of a token, unique per token id"""
+    return bytes(AsyncWeb3.keccak(text=f"banka-token:{token_id}"))
+
+
+def encode_init_code(bytecode: str, argument_types: list, arguments: list) -> bytes:
+    """Contract creation bytecode followed by its ABI-encoded constructor arguments"""
+    bytecode = bytecode[2:] if bytecode.startswith("0x") else bytecode
+    return bytes.fromhex(bytecode) + encode(argument_types, arguments)
+
+
+def create2_address(salt: bytes, init_code: bytes, deployer: str = CREATE2_DEPLOYER_ADDRESS) -> str:
+    """keccak256(0xff ++ deployer ++ salt ++ keccak256(init_code))[12:]"""
+    digest = AsyncWeb3.keccak(
+        b"\xff" + bytes.fromhex(deployer[2:]) + salt + bytes(AsyncWeb3.keccak(init_code))
+    )
+    return AsyncWeb3.to_checksum_address(bytes(digest)[12:])
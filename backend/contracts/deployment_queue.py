@@ -0,0 +1,307 @@
+"""
+Background Token Deployment Queue for BanKa
+Runs contract deployments in an in-process worker pool so token creation
+returns immediately, using the `tokens` collection as the durable job store.
+"""
+
+import os
+import uuid
+import asyncio
+import datetime
+from typing import Dict, Any, Optional, Callable, Awaitable
+from pymongo import ReturnDocument
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Statuses that still need work from a deployment worker
+ACTIVE_STATUSES = ("queued", "pending")
+
+# A claimed job is considered abandoned (e.g. its worker died) after this long
+DEFAULT_LEASE_SECONDS = 300
+
+# CREATE2 tokens keep their address for good, so failed attempts are retried
+# this many times before the token is marked failed
+CREATE2_MAX_ATTEMPTS = 5
+
+
+class DeploymentQueue:
+    def __init__(
+        self,
+        db,
+        contract_manager,
+        abi_registry=None,
+        concurrency: int = 1,
+        lease_seconds: int = DEFAULT_LEASE_SECONDS,
+        rescan_interval: float = 30.0,
+        on_change: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ):
+        """
+        Initialize Deployment Queue
+
+        Args:
+            db: Motor database holding the `tokens` and `events` collections
+            contract_manager: ContractManager used to deploy (may be None)
+            abi_registry: AbiRegistry storing deployed ABIs by hash
+            concurrency: Maximum number of deployments in flight
+            lease_seconds: How long a claimed job stays owned by this worker
+            rescan_interval: Seconds between scans for orphaned jobs
+            on_change: Optional coroutine called with each status update
+        """
+        self.db = db
+        self.contract_manager = contract_manager
+        self.abi_registry = abi_registry
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.rescan_interval = rescan_interval
+        self.on_change = on_change
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks = []
+        self._waiters: Dict[str, asyncio.Event] = {}
+        self._scheduled = set()
+
+    async def start(self):
+        """Start the worker pool and resume unfinished jobs from the database"""
+        for _ in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._worker()))
+        self._tasks.append(asyncio.create_task(self._rescan_loop()))
+        logger.info(f"Deployment queue started with {self.concurrency} worker(s)")
+
+    async def stop(self):
+        """Cancel workers; unfinished jobs stay in the database for the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, token_id: str):
+        """Schedule a queued token for deployment"""
+        if token_id in self._scheduled:
+            return
+        self._scheduled.add(token_id)
+        await self._queue.put(token_id)
+
+    async def resume(self) -> int:
+        """Re-enqueue queued jobs and pending jobs whose lease has expired"""
+        now = datetime.datetime.utcnow()
+        resumed = 0
+        cursor = self.db.tokens.find(
+            {
+                "$or": [
+                    {"deployment_status": "queued"},
+                    {"deployment_status": "pending", "deployment_lease_until": {"$lt": now}},
+                    {"deployment_status": "pending", "deployment_lease_until": None}
+                ]
+            },
+            {"id": 1}
+        )
+        async for token in cursor:
+            await self.enqueue(token["id"])
+            resumed += 1
+        if resumed:
+            logger.info(f"Resumed {resumed} token deployment job(s)")
+        return resumed
+
+    async def wait_for_change(self, token_id: str, timeout: float) -> bool:
+        """Wait until this worker updates the token's deployment, or timeout"""
+        event = self._waiters.setdefault(token_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and worker information for monitoring"""
+        return {
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "running": self.running,
+            "queued_in_memory": self._queue.qsize()
+        }
+
+    async def _rescan_loop(self):
+        while True:
+            try:
+                await self.resume()
+            except Exception as e:
+                logger.error(f"Deployment queue rescan failed: {e}")
+            await asyncio.sleep(self.rescan_interval)
+
+    async def _worker(self):
+        while True:
+            token_id = await self._queue.get()
+            self._scheduled.discard(token_id)
+            try:
+                await self._process(token_id)
+            except Exception as e:
+                logger.error(f"Deployment job {token_id} crashed: {e}")
+                await self._update(token_id, {
+                    "deployment_status": "failed",
+                    "deployment_error": str(e)
+                })
+            finally:
+                self._queue.task_done()
+
+    async def _claim(self, token_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically take ownership of a job so only one worker deploys it"""
+        now = datetime.datetime.utcnow()
+        return await self.db.tokens.find_one_and_update(
+            {
+                "id": token_id,
+                "$or": [
+                    {"deployment_status": "queued"},
+                    {"deployment_status": "pending", "deployment_lease_until": {"$lt": now}},
+                    {"deployment_status": "pending", "deployment_lease_until": None}
+                ]
+            },
+            {"$set": {
+                "deployment_status": "pending",
+                "deployment_worker": self.worker_id,
+                "deployment_lease_until": now + datetime.timedelta(seconds=self.lease_seconds)
+            }}
+        )
+
+    async def _process(self, token_id: str):
+        token = await self._claim(token_id)
+        if not token:
+            # Already finished or owned by another worker
+            return
+        await self._notify(token_id, token)
+
+        if not self.contract_manager:
+            await self._update(token_id, {"deployment_status": "mock"})
+            return
+
+        if token.get("deployment_method") == "create2":
+            await self._process_create2(token)
+            return
+
+        if token.get("deployment_tx_hash"):
+            # Transaction was broadcast before a restart: just wait for it
+            result = await self.contract_manager.get_deployment_receipt(token["deployment_tx_hash"])
+            if result["success"]:
+                await self._update(token_id, {
+                    "deployment_status": "deployed",
+                    "contract_address": result["contract_address"],
+                    "contract_abi_hash": await self._register_abi(self.contract_manager.get_simple_erc20_contract()['abi']),
+                    "deployed_at": datetime.datetime.utcnow()
+                })
+                return
+            if result.get("status") == "timeout":
+                # Still unmined: release the claim so the next rescan retries
+                await self._update(token_id, {"deployment_lease_until": None})
+                return
+            logger.warning(f"Deployment tx for {token_id} did not succeed, redeploying")
+
+        async def on_submitted(tx_hash: str):
+            await self._update(token_id, {"deployment_tx_hash": tx_hash})
+
+        deployment_result = await self.contract_manager.deploy_simple_token(
+            token_name=token["full_name"],
+            token_symbol=token["symbol"],
+            total_supply=token["initial_supply"],
+            owner_address=token["owner_address"],
+            on_submitted=on_submitted
+        )
+        if deployment_result.get("status") == "timeout":
+            # Broadcast but still unmined: keep the hash and release the
+            # claim, so the next rescan resumes waiting for it
+            await self._update(token_id, {
+                "deployment_tx_hash": deployment_result["transaction_hash"],
+                "deployment_lease_until": None
+            })
+            return
+
+        update = {
+            "contract_address": deployment_result["contract_address"],
+            "contract_abi_hash": await self._register_abi(deployment_result["abi"]),
+            "deployment_tx_hash": deployment_result["transaction_hash"],
+            "deployment_status": "deployed" if deployment_result["success"] else "fallback",
+            "deployment_error": deployment_result.get("error"),
+            "deployed_at": datetime.datetime.utcnow()
+        }
+        await self._update(token_id, update)
+        logger.info(f"Token {token_id} deployment finished: {update['deployment_status']} at {update['contract_address']}")
+
+    async def _process_create2(self, token: Dict[str, Any]):
+        """Deploy a token at the CREATE2 address it was given on creation"""
+        token_id = token["id"]
+        if token.get("deployment_tx_hash"):
+            result = await self.contract_manager.get_create2_deployment(token["deployment_tx_hash"], token["contract_address"])
+        else:
+            async def on_submitted(tx_hash: str):
+                await self._update(token_id, {"deployment_tx_hash": tx_hash})
+
+            result = await self.contract_manager.deploy_create2_token(
+                token_name=token["full_name"],
+                token_symbol=token["symbol"],
+                total_supply=token["initial_supply"],
+                owner_address=token["owner_address"],
+                salt=bytes.fromhex(token["deployment_salt"][2:]),
+                expected_address=token["contract_address"],
+                on_submitted=on_submitted
+            )
+
+        if result["success"]:
+            await self._update(token_id, {
+                "deployment_status": "deployed",
+                "contract_abi_hash": await self._register_abi(result["abi"]),
+                "deployment_error": None,
+                "deployed_at": datetime.datetime.utcnow()
+            })
+            logger.info(f"Token {token_id} deployed at its CREATE2 address {token['contract_address']}")
+            return
+        if result["status"] == "timeout":
+            # Still unmined: release the claim so the next rescan retries
+            await self._update(token_id, {"deployment_lease_until": None})
+            return
+
+        attempts = token.get("deployment_attempts", 0) + 1
+        if result["status"] == "unsupported" or attempts >= CREATE2_MAX_ATTEMPTS:
+            logger.error(f"CREATE2 deployment of {token_id} failed for good: {result.get('error')}")
+            await self._update(token_id, {"deployment_status": "failed", "deployment_error": result.get("error")})
+            return
+        await self._update(token_id, {
+            "deployment_tx_hash": None,
+            "deployment_attempts": attempts,
+            "deployment_error": result.get("error"),
+            "deployment_lease_until": None
+        })
+
+    async def _register_abi(self, abi) -> Optional[str]:
+        if not abi or not self.abi_registry:
+            return None
+        return await self.abi_registry.register(abi)
+
+    async def _update(self, token_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Apply a deployment update to the token and its embedded event copy"""
+        token = await self.db.tokens.find_one_and_update(
+            {"id": token_id},
+            {"$set": {**fields, "updated_at": datetime.datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not token:
+            return None
+        await self.db.events.update_one(
+            {"id": token["event_id"], "tokens.id": token_id},
+            {"$set": {f"tokens.$.{key}": value for key, value in fields.items()}}
+        )
+        await self._notify(token_id, token)
+        return token
+
+    async def _notify(self, token_id: str, token: Dict[str, Any]):
+        event = self._waiters.pop(token_id, None)
+        if event:
+            event.set()
+        if self.on_change:
+            try:
+                await self.on_change(token)
+            except Exception as e:
+                logger.error(f"Deployment on_change hook failed: {e}")
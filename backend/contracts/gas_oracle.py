@@ -0,0 +1,229 @@
+"""
+Gas Price Oracle for BanKa
+Samples fee history in the background and serves cached fee suggestions
+for a percentile strategy (slow/standard/fast): EIP-1559 max fee and
+priority fee where the chain reports a base fee, legacy gas prices
+otherwise. Also caches gas estimates per contract bytecode and constructor
+string sizes, so deployments do not estimate (or hardcode) the gas limit
+every time.
+"""
+
+import time
+import asyncio
+import hashlib
+from collections import deque
+from typing import Dict, Any, Optional, Callable, Awaitable, Hashable, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Strategy -> percentile of recent priority fees (EIP-1559) or gas prices (legacy)
+STRATEGY_PERCENTILES = {"slow": 25, "standard": 50, "fast": 90}
+
+
+def bytecode_key(name: str, bytecode: str, strings: Sequence[str] = ()) -> tuple:
+    """
+    Gas estimate cache key for a contract's deployment
+
+    Constructor strings change both the calldata and the storage slots
+    written (strings over 31 bytes take extra slots), so deployments are
+    bucketed by the 32-byte word count of each string argument.
+    """
+    words = tuple(len(value.encode()) // 32 for value in strings)
+    return ("deploy", name, hashlib.sha256(bytecode.encode()).hexdigest(), words)
+
+
+def _percentile(values, pct: float) -> int:
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class GasOracle:
+    def __init__(
+        self,
+        w3,
+        strategy: str = "standard",
+        sample_interval: float = 10.0,
+        history_blocks: int = 20,
+        max_age: float = 60.0,
+        base_fee_multiplier: float = 2.0,
+        gas_limit_margin: float = 1.2
+    ):
+        """
+        Initialize Gas Oracle
+
+        Args:
+            w3: AsyncWeb3 instance
+            strategy: Default strategy (a key of STRATEGY_PERCENTILES)
+            sample_interval: Seconds between background fee samples
+            history_blocks: Blocks of fee history per sample
+            max_age: A suggestion older than this is refreshed on demand
+            base_fee_multiplier: Max fee headroom over the next base fee, so
+                a transaction survives several full blocks of base fee growth
+            gas_limit_margin: Safety factor applied to cached gas estimates
+        """
+        if strategy not in STRATEGY_PERCENTILES:
+            raise ValueError(f"Unknown gas strategy '{strategy}'")
+        self.w3 = w3
+        self.strategy = strategy
+        self.sample_interval = sample_interval
+        self.history_blocks = history_blocks
+        self.max_age = max_age
+        self.base_fee_multiplier = base_fee_multiplier
+        self.gas_limit_margin = gas_limit_margin
+
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self._legacy_samples = deque(maxlen=history_blocks)
+        self._gas_estimates: Dict[Hashable, int] = {}
+        self._refresh_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.decisions = {name: 0 for name in STRATEGY_PERCENTILES}
+        self.estimate_hits = 0
+        self.estimate_misses = 0
+        self.estimate_fallbacks = 0
+        self.last_decision: Optional[Dict[str, Any]] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._sample_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _sample_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Gas oracle sample failed: {e}")
+            await asyncio.sleep(self.sample_interval)
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Take a fee sample now"""
+        async with self._refresh_lock:
+            try:
+                self.snapshot = await self._sample()
+                self.refreshes += 1
+            except Exception:
+                self.refresh_errors += 1
+                raise
+            return self.snapshot
+
+    async def _sample(self) -> Dict[str, Any]:
+        percentiles = list(STRATEGY_PERCENTILES.values())
+        try:
+            history = await self.w3.eth.fee_history(self.history_blocks, 'latest', percentiles)
+            base_fees = history.get("baseFeePerGas") or []
+        except Exception as e:
+            logger.debug(f"eth_feeHistory unavailable, using legacy gas prices: {e}")
+            base_fees = []
+
+        if base_fees:
+            rewards = history.get("reward") or []
+            floor = 0
+            try:
+                floor = await self.w3.eth.max_priority_fee
+            except Exception:
+                pass
+            priority_fees = {}
+            for index, (name, pct) in enumerate(STRATEGY_PERCENTILES.items()):
+                # Each block reports the requested percentile; take the median over blocks
+                per_block = [block_rewards[index] for block_rewards in rewards if len(block_rewards) > index]
+                suggested = _percentile(per_block, 50) if per_block else 0
+                priority_fees[name] = max(suggested, floor)
+            return {
+                "eip1559": True,
+                # The last entry is the base fee of the next block
+                "base_fee": base_fees[-1],
+                "priority_fees": priority_fees,
+                "sampled_at": time.time()
+            }
+
+        current = await self.w3.eth.gas_price
+        self._legacy_samples.append(current)
+        gas_prices = {name: _percentile(self._legacy_samples, pct) for name, pct in STRATEGY_PERCENTILES.items()}
+        # Only "slow" may bid under the node's current suggestion
+        for name in gas_prices:
+            if name != "slow":
+                gas_prices[name] = max(gas_prices[name], current)
+        return {
+            "eip1559": False,
+            "gas_prices": gas_prices,
+            "sampled_at": time.time()
+        }
+
+    async def fee_params(self, strategy: Optional[str] = None) -> Dict[str, int]:
+        """Fee fields for a transaction: maxFeePerGas/maxPriorityFeePerGas, or gasPrice"""
+        strategy = strategy or self.strategy
+        snapshot = self.snapshot
+        if snapshot is None or time.time() - snapshot["sampled_at"] > self.max_age:
+            snapshot = await self.refresh()
+
+        if snapshot["eip1559"]:
+            priority_fee = snapshot["priority_fees"][strategy]
+            params = {
+                "maxPriorityFeePerGas": priority_fee,
+                "maxFeePerGas": int(snapshot["base_fee"] * self.base_fee_multiplier) + priority_fee
+            }
+        else:
+            params = {"gasPrice": snapshot["gas_prices"][strategy]}
+
+        self.decisions[strategy] += 1
+        self.last_decision = {"strategy": strategy, **params}
+        return params
+
+    @staticmethod
+    def max_price(fee_params: Dict[str, int]) -> int:
+        """Highest per-gas price a transaction with these fee fields can pay"""
+        return fee_params.get("maxFeePerGas", fee_params.get("gasPrice", 0))
+
+    async def estimate_gas(
+        self,
+        key: Hashable,
+        estimate: Callable[[], Awaitable[int]],
+        fallback: int,
+        margin: Optional[float] = None
+    ) -> int:
+        """
+        Gas limit for an operation, estimated once per `key` and cached
+
+        Falls back to `fallback` (without caching it) when estimation fails.
+        """
+        cached = self._gas_estimates.get(key)
+        if cached is not None:
+            self.estimate_hits += 1
+            return cached
+        self.estimate_misses += 1
+        try:
+            estimated = await estimate()
+        except Exception as e:
+            logger.warning(f"Gas estimation for {key} failed, using {fallback}: {e}")
+            self.estimate_fallbacks += 1
+            return fallback
+        gas_limit = int(estimated * (margin or self.gas_limit_margin))
+        self._gas_estimates[key] = gas_limit
+        return gas_limit
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self.snapshot or {}
+        return {
+            "strategy": self.strategy,
+            "eip1559": snapshot.get("eip1559"),
+            "base_fee": snapshot.get("base_fee"),
+            "priority_fees": snapshot.get("priority_fees"),
+            "gas_prices": snapshot.get("gas_prices"),
+            "sample_age_seconds": (time.time() - snapshot["sampled_at"]) if snapshot else None,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "decisions": self.decisions,
+            "last_decision": self.last_decision,
+            "cached_gas_estimates": len(self._gas_estimates),
+            "estimate_hits": self.estimate_hits,
+            "estimate_misses": self.estimate_misses,
+            "estimate_fallbacks": self.estimate_fallbacks
+        }
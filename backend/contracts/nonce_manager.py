@@ -0,0 +1,179 @@
+"""
+Local Nonce Manager for BanKa
+Hands out transaction nonces for one sending account without a
+get_transaction_count round trip per transaction, so many signed
+transactions can be in flight from the same key at once
+"""
+
+import time
+import heapq
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional, Set, Dict, List, Tuple, Callable, Awaitable
+from web3.exceptions import TransactionNotFound
+import logging
+
+from .receipt_watcher import normalize_tx_hash
+
+logger = logging.getLogger(__name__)
+
+# A broadcast transaction the node does not know about is only presumed
+# dropped after this long, since load-balanced RPC nodes can lag behind the
+# one that accepted it
+DROP_GRACE_SECONDS = 60
+
+
+class NonceReservation:
+    """A nonce held by one caller until it is broadcast or released"""
+
+    def __init__(self, nonce: int):
+        self.nonce = nonce
+        self.tx_hash: Optional[str] = None
+
+    def mark_sent(self, tx_hash: str):
+        """Record that a transaction using this nonce reached the node"""
+        self.tx_hash = tx_hash
+
+
+class NonceManager:
+    def __init__(self, w3, address: str, drop_grace_seconds: float = DROP_GRACE_SECONDS):
+        """
+        Initialize Nonce Manager
+
+        Args:
+            w3: AsyncWeb3 instance
+            address: Account whose nonces are managed
+            drop_grace_seconds: How long a broadcast transaction may be
+                unknown to the node before its nonce is reused
+        """
+        self.w3 = w3
+        self.address = address
+        self.drop_grace_seconds = drop_grace_seconds
+        self._lock = asyncio.Lock()
+        self._next_nonce: Optional[int] = None
+        self._reserved: Set[int] = set()
+        # nonce -> (tx hash, broadcast at) of transactions not yet mined
+        self._sent: Dict[int, Tuple[str, float]] = {}
+        self._free: List[int] = []  # min-heap of nonces handed back unused
+
+    async def reconcile(self) -> int:
+        """Resync with the node's pending transaction count"""
+        async with self._lock:
+            return await self._reconcile_locked()
+
+    async def _reconcile_locked(self) -> int:
+        pending = await self.w3.eth.get_transaction_count(self.address, 'pending')
+
+        # Anything below the pending count is spoken for on-chain
+        self._sent = {n: sent for n, sent in self._sent.items() if n >= pending}
+        free = {n for n in self._free if n >= pending}
+
+        if self._next_nonce is None or pending >= self._next_nonce:
+            self._next_nonce = pending
+        else:
+            # The pending count does not cover [pending, next). Nonces that
+            # were never broadcast are free again; broadcast ones are only
+            # freed once the node confirms their transaction is gone, since
+            # it may merely not have reached this node yet
+            unsent = [n for n in range(pending, self._next_nonce) if n not in self._reserved and n not in self._sent]
+            free.update(unsent)
+            for nonce in await self._dropped([n for n in self._sent if n < self._next_nonce]):
+                del self._sent[nonce]
+                free.add(nonce)
+
+        self._free = list(free)
+        heapq.heapify(self._free)
+        logger.info(f"Nonce manager reconciled {self.address}: pending={pending}, next={self._next_nonce}, gaps={sorted(self._free)}")
+        return pending
+
+    async def _dropped(self, nonces: List[int]) -> List[int]:
+        """Broadcast nonces whose transaction the node no longer knows"""
+        now = time.monotonic()
+        candidates = [n for n in nonces if now - self._sent[n][1] >= self.drop_grace_seconds]
+
+        async def is_dropped(nonce: int) -> bool:
+            try:
+                await self.w3.eth.get_transaction(self._sent[nonce][0])
+                return False
+            except TransactionNotFound:
+                return True
+            except Exception as e:
+                logger.warning(f"Could not look up transaction of nonce {nonce}: {e}")
+                return False
+
+        results = await asyncio.gather(*(is_dropped(n) for n in candidates))
+        dropped = [n for n, gone in zip(candidates, results) if gone]
+        if dropped:
+            logger.warning(f"Transactions of nonces {dropped} from {self.address} were dropped")
+        return dropped
+
+    async def allocate(self) -> int:
+        """Reserve the lowest available nonce"""
+        async with self._lock:
+            if self._next_nonce is None:
+                await self._reconcile_locked()
+            if self._free:
+                nonce = heapq.heappop(self._free)
+            else:
+                nonce = self._next_nonce
+                self._next_nonce += 1
+            self._reserved.add(nonce)
+            return nonce
+
+    async def release(self, nonce: int, tx_hash: Optional[str] = None):
+        """
+        Return a reservation
+
+        With the hash of the transaction that used it the nonce stays taken
+        until that transaction is mined or dropped; unsent nonces are
+        reused by the next allocation.
+        """
+        async with self._lock:
+            self._reserved.discard(nonce)
+            if tx_hash is not None:
+                self._sent[nonce] = (normalize_tx_hash(tx_hash), time.monotonic())
+            else:
+                heapq.heappush(self._free, nonce)
+
+    @asynccontextmanager
+    async def reserve(self):
+        """
+        Reserve a nonce for one transaction
+
+        Call `mark_sent` on the yielded reservation once the node accepted
+        the transaction; otherwise the nonce is handed back on exit.
+        """
+        reservation = NonceReservation(await self.allocate())
+        try:
+            yield reservation
+        finally:
+            await self.release(reservation.nonce, reservation.tx_hash)
+
+    async def fill_gaps(self, send_filler: Callable[[int], Awaitable[str]]) -> List[int]:
+        """
+        Fill unused nonces that sit below already-broadcast transactions
+
+        Those transactions can never be mined while the gap exists, so each
+        gap nonce is consumed by `send_filler` (typically a zero-value
+        self-transfer). Returns the nonces that were filled.
+        """
+        async with self._lock:
+            await self._reconcile_locked()
+            highest_sent = max(self._sent, default=-1)
+            gaps = [n for n in self._free if n < highest_sent]
+            # Held as reservations until each filler is sent, so a
+            # reconcile in the meantime does not free them again
+            for nonce in gaps:
+                self._free.remove(nonce)
+                self._reserved.add(nonce)
+            heapq.heapify(self._free)
+
+        filled = []
+        for nonce in gaps:
+            try:
+                await self.release(nonce, await send_filler(nonce))
+                filled.append(nonce)
+            except Exception as e:
+                logger.error(f"Failed to fill nonce gap {nonce}: {e}")
+                await self.release(nonce)
+        return filled
@@ -0,0 +1,302 @@
+"""
+Transaction Receipt Watcher for BanKa
+Follows new block headers and checks every pending transaction hash in one
+batched eth_getTransactionReceipt request per block, resolving the futures
+of everyone waiting on them. Replaces one wait_for_transaction_receipt
+polling loop per in-flight transaction. Pending hashes are persisted in the
+`pending_transactions` collection, so in-flight deployments are picked up
+again after a restart.
+"""
+
+import time
+import asyncio
+import datetime
+from typing import Dict, Any, List, Optional
+from web3 import AsyncWeb3
+from web3.datastructures import AttributeDict
+import logging
+
+from .batch_reader import MAX_CALLS_PER_REQUEST
+
+logger = logging.getLogger(__name__)
+
+# Resolved records are kept this long, so a restarted worker can still read
+# the outcome of a transaction it was waiting on
+RESOLVED_TTL_SECONDS = 7 * 86400
+
+
+class ReceiptTimeout(TimeoutError):
+    """No receipt arrived within the caller's timeout"""
+
+
+def normalize_tx_hash(tx_hash) -> str:
+    """Lowercase 0x-prefixed hex for a transaction hash given as str or bytes"""
+    if not isinstance(tx_hash, str):
+        tx_hash = bytes(tx_hash).hex()
+    tx_hash = tx_hash.lower()
+    return tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash
+
+
+def _format_receipt(raw: Dict[str, Any]) -> AttributeDict:
+    """The receipt fields the contract managers use, decoded from JSON-RPC hex"""
+    # JSON-RPC returns lowercase addresses; token records and the transfer
+    # indexer key on the checksummed form
+    contract_address = raw.get("contractAddress")
+    if contract_address is not None:
+        contract_address = AsyncWeb3.to_checksum_address(contract_address)
+    return AttributeDict({
+        "transactionHash": normalize_tx_hash(raw["transactionHash"]),
+        "status": int(raw["status"], 16),
+        "contractAddress": contract_address,
+        "gasUsed": int(raw["gasUsed"], 16),
+        "blockNumber": int(raw["blockNumber"], 16),
+        "logs": raw.get("logs", [])
+    })
+
+
+async def ensure_receipt_watcher_indexes(db):
+    await db.pending_transactions.create_index([("status", 1)])
+    await db.pending_transactions.create_index("resolved_at", expireAfterSeconds=RESOLVED_TTL_SECONDS)
+
+
+class ReceiptWatcher:
+    def __init__(
+        self,
+        w3,
+        batch_reader=None,
+        db=None,
+        poll_interval: float = 1.0,
+        max_pending_age: float = 3600.0
+    ):
+        """
+        Initialize Receipt Watcher
+
+        Args:
+            w3: AsyncWeb3 instance
+            batch_reader: BatchReader whose JSON-RPC batches carry the receipt
+                requests; without one receipts are fetched concurrently
+            db: Motor database for `pending_transactions` (optional)
+            poll_interval: Seconds between block number checks while
+                transactions are pending
+            max_pending_age: Seconds after which an unmined transaction is
+                presumed dropped and its waiters fail
+        """
+        self.w3 = w3
+        self.batch_reader = batch_reader
+        self.db = db
+        self.poll_interval = poll_interval
+        self.max_pending_age = max_pending_age
+
+        # tx hash -> (tracked since, futures of everyone waiting on it)
+        self._pending: Dict[str, tuple] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.last_block: Optional[int] = None
+        self.blocks_seen = 0
+        self.checks = 0
+        self.resolved = 0
+        self.expired = 0
+
+    async def start(self):
+        """Reload hashes left pending by a previous run and start following blocks"""
+        if self.db is not None:
+            try:
+                async for record in self.db.pending_transactions.find({"status": "pending"}, {"_id": 1}):
+                    self._pending.setdefault(record["_id"], (time.monotonic(), set()))
+                if self._pending:
+                    logger.info(f"Receipt watcher resumed {len(self._pending)} pending transaction(s)")
+            except Exception as e:
+                logger.error(f"Failed to load pending transactions: {e}")
+        self._ensure_running()
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch_loop())
+        self._wakeup.set()
+
+    async def track(self, tx_hash, kind: Optional[str] = None):
+        """Start watching a broadcast transaction (idempotent)"""
+        tx_hash = normalize_tx_hash(tx_hash)
+        if tx_hash in self._pending:
+            return
+        self._pending[tx_hash] = (time.monotonic(), set())
+        await self._persist(tx_hash, kind)
+        self._ensure_running()
+
+    async def _persist(self, tx_hash: str, kind: Optional[str]):
+        if self.db is not None:
+            try:
+                await self.db.pending_transactions.update_one(
+                    {"_id": tx_hash},
+                    {
+                        "$set": {"status": "pending"},
+                        "$setOnInsert": {"kind": kind, "created_at": datetime.datetime.utcnow()},
+                        "$unset": {"resolved_at": ""}
+                    },
+                    upsert=True
+                )
+            except Exception as e:
+                logger.error(f"Failed to persist pending transaction {tx_hash}: {e}")
+
+    async def wait(self, tx_hash, timeout: Optional[float] = None, kind: Optional[str] = None) -> AttributeDict:
+        """
+        Receipt of a transaction once it is mined
+
+        Raises ReceiptTimeout after `timeout` seconds; the transaction stays
+        tracked, so a later call can pick up its receipt.
+        """
+        tx_hash = normalize_tx_hash(tx_hash)
+        tracked = tx_hash in self._pending
+        if not tracked:
+            stored = await self._stored_receipt(tx_hash)
+            if stored is not None:
+                return stored
+
+        # Register the future before any further await, so a receipt that
+        # arrives meanwhile cannot be missed
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(tx_hash, (time.monotonic(), set()))[1].add(future)
+        if not tracked:
+            await self._persist(tx_hash, kind)
+            self._ensure_running()
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        except ReceiptTimeout:
+            # Set by _expire_stale; ReceiptTimeout is a TimeoutError too
+            raise
+        except asyncio.TimeoutError:
+            raise ReceiptTimeout(f"Transaction {tx_hash} not mined within {timeout}s")
+        finally:
+            entry = self._pending.get(tx_hash)
+            if entry:
+                entry[1].discard(future)
+
+    async def _stored_receipt(self, tx_hash: str) -> Optional[AttributeDict]:
+        if self.db is None:
+            return None
+        record = await self.db.pending_transactions.find_one({"_id": tx_hash, "status": "mined"})
+        if record is None:
+            return None
+        return AttributeDict({
+            "transactionHash": tx_hash,
+            "status": record["receipt_status"],
+            "contractAddress": record.get("contract_address"),
+            "gasUsed": record["gas_used"],
+            "blockNumber": record["block_number"],
+            "logs": []
+        })
+
+    async def _watch_loop(self):
+        while True:
+            if not self._pending:
+                # Nothing to watch: sleep until the next track()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            try:
+                block_number = await self.w3.eth.block_number
+                if self.last_block is None or block_number > self.last_block:
+                    self.last_block = block_number
+                    self.blocks_seen += 1
+                    await self.check_pending()
+                await self._expire_stale()
+            except Exception as e:
+                logger.error(f"Receipt watcher pass failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def check_pending(self) -> int:
+        """Fetch receipts for every pending hash; returns how many were mined"""
+        hashes = list(self._pending)
+        mined = 0
+        for start in range(0, len(hashes), MAX_CALLS_PER_REQUEST):
+            chunk = hashes[start:start + MAX_CALLS_PER_REQUEST]
+            self.checks += 1
+            for tx_hash, raw in zip(chunk, await self._fetch_receipts(chunk)):
+                if isinstance(raw, Exception):
+                    logger.warning(f"Receipt lookup for {tx_hash} failed: {raw}")
+                elif raw:
+                    await self._resolve(tx_hash, _format_receipt(raw))
+                    mined += 1
+        return mined
+
+    async def _fetch_receipts(self, hashes: List[str]) -> List[Any]:
+        requests = [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in hashes]
+        if self.batch_reader is not None:
+            try:
+                return await self.batch_reader.rpc_batch(requests)
+            except Exception as e:
+                logger.warning(f"Batched receipt lookup failed, fetching individually: {e}")
+
+        async def fetch(method, params):
+            try:
+                response = await self.w3.provider.make_request(method, params)
+            except Exception as e:
+                return e
+            if "error" in response:
+                return Exception(str(response["error"]))
+            return response.get("result")
+
+        return await asyncio.gather(*(fetch(method, params) for method, params in requests))
+
+    async def _resolve(self, tx_hash: str, receipt: AttributeDict):
+        _, futures = self._pending.pop(tx_hash, (None, set()))
+        self.resolved += 1
+        for future in futures:
+            if not future.done():
+                future.set_result(receipt)
+        if self.db is not None:
+            try:
+                await self.db.pending_transactions.update_one(
+                    {"_id": tx_hash},
+                    {"$set": {
+                        "status": "mined",
+                        "receipt_status": receipt.status,
+                        "contract_address": receipt.contractAddress,
+                        "gas_used": receipt.gasUsed,
+                        "block_number": receipt.blockNumber,
+                        "resolved_at": datetime.datetime.utcnow()
+                    }}
+                )
+            except Exception as e:
+                logger.error(f"Failed to record receipt of {tx_hash}: {e}")
+
+    async def _expire_stale(self):
+        """
+        Stop watching transactions that have been pending for too long
+
+        Their records are marked expired as well, so a restart does not
+        resume watching them; tracking the hash again makes it pending.
+        """
+        cutoff = time.monotonic() - self.max_pending_age
+        for tx_hash in [h for h, (since, _) in self._pending.items() if since < cutoff]:
+            _, futures = self._pending.pop(tx_hash)
+            self.expired += 1
+            logger.warning(f"Transaction {tx_hash} still unmined after {self.max_pending_age:.0f}s, no longer watched")
+            for future in futures:
+                if not future.done():
+                    future.set_exception(ReceiptTimeout(f"Transaction {tx_hash} presumed dropped"))
+            if self.db is not None:
+                try:
+                    await self.db.pending_transactions.update_one(
+                        {"_id": tx_hash, "status": "pending"},
+                        {"$set": {"status": "expired", "resolved_at": datetime.datetime.utcnow()}}
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to record expiry of {tx_hash}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "waiters": sum(len(futures) for _, futures in self._pending.values()),
+            "last_block": self.last_block,
+            "blocks_seen": self.blocks_seen,
+            "checks": self.checks,
+            "resolved": self.resolved,
+            "expired": self.expired
+        }
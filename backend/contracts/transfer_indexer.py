@@ -0,0 +1,442 @@
+"""
+Transfer Log Indexer for BanKa
+Pulls ERC-20 `Transfer` logs of every deployed token in block-range batches
+with eth_getLogs and stores them in `chain_transfers`, keeping per-wallet
+token balances in `chain_holdings`. Only blocks at least `confirmations`
+deep are indexed; the checkpoint's block hash is verified on every pass and
+the index rewinds to the last matching block if the chain reorganized
+deeper than that. Without a configured start block, indexing starts at the
+confirmed head on first run and each token's history is backfilled from
+its deployment block.
+
+Run against any JSON-RPC node (e.g. a local anvil or hardhat dev chain):
+    python backend/contracts/transfer_indexer.py run --rpc-url http://127.0.0.1:8545 --once
+"""
+
+import os
+import uuid
+import asyncio
+import datetime
+from typing import Dict, Any, List, Optional, Set, Tuple
+from bson import Decimal128
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from web3 import AsyncWeb3
+import logging
+
+logger = logging.getLogger(__name__)
+
+STATE_ID = "transfer_indexer"
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# Checkpoint hashes kept for finding the common ancestor after a reorg
+RECENT_BLOCKS_KEPT = 64
+
+
+def _to_hex(value) -> str:
+    """0x-prefixed hex for HexBytes/bytes, regardless of the hexbytes version"""
+    if isinstance(value, str):
+        return value if value.startswith("0x") else "0x" + value
+    return "0x" + bytes(value).hex()
+
+
+TRANSFER_TOPIC = _to_hex(AsyncWeb3.keccak(text="Transfer(address,address,uint256)"))
+
+
+class LeaseLost(Exception):
+    """Another worker took over indexing"""
+
+
+async def ensure_indexer_indexes(db):
+    await db.chain_transfers.create_index([("tx_hash", 1), ("log_index", 1)], unique=True)
+    await db.chain_transfers.create_index([("block_number", 1)])
+    await db.chain_transfers.create_index([("token_address", 1), ("from", 1)])
+    await db.chain_transfers.create_index([("token_address", 1), ("to", 1)])
+    await db.chain_holdings.create_index([("token_address", 1), ("wallet_address", 1)], unique=True)
+    await db.chain_holdings.create_index([("wallet_address", 1)])
+
+
+async def get_wallet_holdings(db, wallet_address: str) -> Dict[str, str]:
+    """Indexed on-chain token balances of a wallet (raw integer units, as strings)"""
+    holdings = {}
+    async for row in db.chain_holdings.find(
+        {"wallet_address": wallet_address, "balance": {"$ne": Decimal128("0")}},
+        {"_id": 0, "token_address": 1, "balance": 1}
+    ):
+        holdings[row["token_address"]] = str(row["balance"])
+    return holdings
+
+
+class TransferIndexer:
+    def __init__(
+        self,
+        db,
+        w3,
+        start_block: Optional[int] = None,
+        confirmations: int = 12,
+        batch_blocks: int = 2000,
+        poll_interval: float = 5.0,
+        lease_seconds: int = 60,
+        max_addresses_per_query: int = 500
+    ):
+        """
+        Initialize Transfer Indexer
+
+        Args:
+            db: Motor database for checkpoints, transfers and holdings
+            w3: AsyncWeb3 instance
+            start_block: First block to index when there is no checkpoint;
+                defaults to the confirmed head at first run
+            confirmations: Depth a block must have before it is indexed
+            batch_blocks: Blocks per eth_getLogs range (halved on RPC errors)
+            poll_interval: Seconds to wait once caught up with the chain
+            lease_seconds: How long this worker owns indexing before another
+                worker may take over
+            max_addresses_per_query: Token addresses per eth_getLogs filter
+        """
+        self.db = db
+        self.w3 = w3
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.batch_blocks = max(1, batch_blocks)
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_addresses_per_query = max_addresses_per_query
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self._task: Optional[asyncio.Task] = None
+        self.head_block: Optional[int] = None
+        self.last_block: Optional[int] = None
+        self.transfers_indexed = 0
+        self.reorgs = 0
+        self.log_queries = 0
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await self.db.chain_indexer_state.update_one(
+            {"_id": STATE_ID, "owner": self.worker_id},
+            {"$set": {"owner": None, "lease_until": None}}
+        )
+
+    async def _run_loop(self):
+        while True:
+            caught_up = True
+            try:
+                if await self._acquire_lease():
+                    caught_up = await self.run_once()
+            except LeaseLost:
+                logger.warning("Transfer indexer lease taken over by another worker")
+            except Exception as e:
+                logger.error(f"Transfer indexer pass failed: {e}")
+            if caught_up:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _acquire_lease(self) -> bool:
+        """Only one worker indexes at a time; the lease is renewed before every batch"""
+        now = datetime.datetime.utcnow()
+        try:
+            await self.db.chain_indexer_state.find_one_and_update(
+                {
+                    "_id": STATE_ID,
+                    "$or": [
+                        {"owner": self.worker_id},
+                        {"owner": None},
+                        {"lease_until": {"$lt": now}}
+                    ]
+                },
+                {"$set": {"owner": self.worker_id, "lease_until": now + datetime.timedelta(seconds=self.lease_seconds)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def _renew_lease(self):
+        if not await self._acquire_lease():
+            raise LeaseLost()
+
+    async def run_once(self) -> bool:
+        """Index the next batch of confirmed blocks; returns True once caught up"""
+        self.head_block = await self.w3.eth.block_number
+        safe_block = self.head_block - self.confirmations
+
+        state = await self.db.chain_indexer_state.find_one({"_id": STATE_ID}) or {}
+        if "last_block" not in state:
+            state = await self._initialize_checkpoint(safe_block)
+        checkpoint = state["last_block"]
+        self.last_block = checkpoint
+
+        if state.get("last_block_hash") and checkpoint >= 0:
+            block = await self.w3.eth.get_block(checkpoint)
+            if _to_hex(block["hash"]) != state["last_block_hash"]:
+                await self._rewind(state)
+                return False
+
+        await self._backfill_new_tokens(checkpoint, state.get("first_block", self.start_block or 0))
+        if safe_block <= checkpoint:
+            return True
+
+        await self._renew_lease()
+        to_block = min(checkpoint + self.batch_blocks, safe_block)
+        addresses = await self._tracked_addresses()
+        if addresses:
+            logs = await self._get_logs(addresses, checkpoint + 1, to_block)
+            await self._store_logs(logs)
+
+        block = await self.w3.eth.get_block(to_block)
+        await self._save_checkpoint(to_block, _to_hex(block["hash"]))
+        return to_block >= safe_block
+
+    async def _initialize_checkpoint(self, safe_block: int) -> Dict[str, Any]:
+        """Checkpoint of a first run: just before `start_block`, or at the confirmed head"""
+        first_block = self.start_block if self.start_block is not None else max(0, safe_block + 1)
+        fields = {"first_block": first_block, "last_block": first_block - 1, "last_block_hash": None}
+        await self.db.chain_indexer_state.update_one({"_id": STATE_ID}, {"$set": fields}, upsert=True)
+        logger.info(f"Transfer indexer starting at block {first_block}")
+        return fields
+
+    async def _tracked_addresses(self) -> List[str]:
+        addresses = []
+        async for token in self.db.tokens.find(
+            {"deployment_status": "deployed", "transfers_indexed_from": {"$exists": True}},
+            {"_id": 0, "contract_address": 1}
+        ):
+            addresses.append(token["contract_address"])
+        return addresses
+
+    async def _backfill_new_tokens(self, checkpoint: int, first_block: int):
+        """
+        Index the history of newly deployed tokens up to the checkpoint before tracking them
+
+        History starts at the token's deployment block; tokens without a
+        deployment receipt are backfilled from `first_block`, the first
+        block this index covered.
+        """
+        async for token in self.db.tokens.find(
+            {"deployment_status": "deployed", "transfers_indexed_from": {"$exists": False}},
+            {"_id": 0, "id": 1, "contract_address": 1, "deployment_tx_hash": 1}
+        ):
+            from_block = first_block
+            if token.get("deployment_tx_hash"):
+                try:
+                    receipt = await self.w3.eth.get_transaction_receipt(token["deployment_tx_hash"])
+                    from_block = max(self.start_block or 0, receipt["blockNumber"])
+                except Exception as e:
+                    logger.warning(f"No deployment receipt for token {token['id']}, backfilling from block {from_block}: {e}")
+
+            for start in range(from_block, checkpoint + 1, self.batch_blocks):
+                await self._renew_lease()
+                end = min(start + self.batch_blocks - 1, checkpoint)
+                await self._store_logs(await self._get_logs([token["contract_address"]], start, end))
+
+            await self.db.tokens.update_one({"id": token["id"]}, {"$set": {"transfers_indexed_from": from_block}})
+            logger.info(f"Transfer indexer now tracks {token['contract_address']} (from block {from_block})")
+
+    async def _get_logs(self, addresses: List[str], from_block: int, to_block: int) -> List[Dict[str, Any]]:
+        """eth_getLogs over a block range, splitting ranges the node refuses (result limits)"""
+        logs = []
+        for start in range(0, len(addresses), self.max_addresses_per_query):
+            chunk = addresses[start:start + self.max_addresses_per_query]
+            try:
+                self.log_queries += 1
+                logs.extend(await self.w3.eth.get_logs({
+                    "fromBlock": from_block,
+                    "toBlock": to_block,
+                    "address": chunk,
+                    "topics": [TRANSFER_TOPIC]
+                }))
+            except Exception as e:
+                if from_block >= to_block:
+                    raise
+                middle = (from_block + to_block) // 2
+                logger.warning(f"eth_getLogs {from_block}-{to_block} failed ({e}), splitting the range")
+                logs.extend(await self._get_logs(chunk, from_block, middle))
+                logs.extend(await self._get_logs(chunk, middle + 1, to_block))
+        return logs
+
+    async def _store_logs(self, logs: List[Dict[str, Any]]):
+        """Insert transfers (duplicates are ignored) and recompute the touched holdings"""
+        documents = []
+        for log in logs:
+            topics = log["topics"]
+            if len(topics) != 3:
+                # ERC-721 style Transfer (indexed token id) or malformed log
+                continue
+            documents.append({
+                "tx_hash": _to_hex(log["transactionHash"]),
+                "log_index": log["logIndex"],
+                "block_number": log["blockNumber"],
+                "block_hash": _to_hex(log["blockHash"]),
+                "token_address": self.w3.to_checksum_address(log["address"]),
+                "from": self.w3.to_checksum_address(bytes(topics[1])[-20:]),
+                "to": self.w3.to_checksum_address(bytes(topics[2])[-20:]),
+                "value": Decimal128(str(int.from_bytes(bytes(log["data"]), "big")))
+            })
+        if not documents:
+            return
+
+        try:
+            await self.db.chain_transfers.insert_many(documents, ordered=False)
+            inserted = len(documents)
+        except BulkWriteError as e:
+            inserted = e.details.get("nInserted", 0)
+            if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+        self.transfers_indexed += inserted
+
+        pairs = set()
+        for document in documents:
+            pairs.add((document["token_address"], document["from"]))
+            pairs.add((document["token_address"], document["to"]))
+        await self._recompute_holdings(pairs)
+
+    async def _recompute_holdings(self, pairs: Set[Tuple[str, str]]):
+        """
+        Set holdings of the given (token, wallet) pairs from the stored transfers
+
+        Recomputing instead of applying deltas keeps holdings correct when a
+        batch is retried after a crash or rolled back by a reorg.
+        """
+        wallets_by_token: Dict[str, Set[str]] = {}
+        for token_address, wallet_address in pairs:
+            if wallet_address != ZERO_ADDRESS:
+                wallets_by_token.setdefault(token_address, set()).add(wallet_address)
+
+        now = datetime.datetime.utcnow()
+        operations = []
+        for token_address, wallets in wallets_by_token.items():
+            wallet_list = list(wallets)
+            balances = {wallet: Decimal128("0") for wallet in wallet_list}
+            async for group in self.db.chain_transfers.aggregate([
+                {"$match": {
+                    "token_address": token_address,
+                    "$or": [{"from": {"$in": wallet_list}}, {"to": {"$in": wallet_list}}]
+                }},
+                {"$project": {"moves": [
+                    {"wallet": "$from", "amount": {"$multiply": ["$value", -1]}},
+                    {"wallet": "$to", "amount": "$value"}
+                ]}},
+                {"$unwind": "$moves"},
+                {"$match": {"moves.wallet": {"$in": wallet_list}}},
+                {"$group": {"_id": "$moves.wallet", "balance": {"$sum": "$moves.amount"}}}
+            ]):
+                balances[group["_id"]] = group["balance"]
+
+            for wallet_address, balance in balances.items():
+                operations.append(UpdateOne(
+                    {"token_address": token_address, "wallet_address": wallet_address},
+                    {"$set": {"balance": balance, "updated_at": now}},
+                    upsert=True
+                ))
+        if operations:
+            await self.db.chain_holdings.bulk_write(operations, ordered=False)
+
+    async def _save_checkpoint(self, block_number: int, block_hash: str):
+        await self.db.chain_indexer_state.update_one(
+            {"_id": STATE_ID},
+            {
+                "$set": {"last_block": block_number, "last_block_hash": block_hash, "updated_at": datetime.datetime.utcnow()},
+                "$push": {"recent_blocks": {"$each": [{"number": block_number, "hash": block_hash}], "$slice": -RECENT_BLOCKS_KEPT}}
+            }
+        )
+        self.last_block = block_number
+
+    async def _rewind(self, state: Dict[str, Any]):
+        """Roll back to the newest checkpoint still on the canonical chain"""
+        self.reorgs += 1
+        recent = state.get("recent_blocks", [])
+        ancestor, ancestor_hash = state.get("first_block", self.start_block or 0) - 1, None
+        for checkpoint in reversed(recent):
+            block = await self.w3.eth.get_block(checkpoint["number"])
+            if _to_hex(block["hash"]) == checkpoint["hash"]:
+                ancestor, ancestor_hash = checkpoint["number"], checkpoint["hash"]
+                break
+        else:
+            if recent:
+                ancestor = recent[0]["number"] - 1
+                logger.error(f"Reorg deeper than {len(recent)} checkpoints, rewinding to block {ancestor}")
+        await self.rewind_to(ancestor, ancestor_hash)
+
+    async def rewind_to(self, block_number: int, block_hash: Optional[str] = None):
+        """Drop everything indexed after `block_number` and recompute affected holdings"""
+        pairs = set()
+        async for transfer in self.db.chain_transfers.find(
+            {"block_number": {"$gt": block_number}},
+            {"_id": 0, "token_address": 1, "from": 1, "to": 1}
+        ):
+            pairs.add((transfer["token_address"], transfer["from"]))
+            pairs.add((transfer["token_address"], transfer["to"]))
+        await self.db.chain_transfers.delete_many({"block_number": {"$gt": block_number}})
+        await self._recompute_holdings(pairs)
+
+        await self.db.chain_indexer_state.update_one(
+            {"_id": STATE_ID},
+            {
+                "$set": {"last_block": block_number, "last_block_hash": block_hash},
+                "$pull": {"recent_blocks": {"number": {"$gt": block_number}}}
+            }
+        )
+        self.last_block = block_number
+        logger.warning(f"Transfer index rewound to block {block_number}; {len(pairs)} holding(s) recomputed")
+
+    def stats(self) -> Dict[str, Any]:
+        lag = None
+        if self.head_block is not None and self.last_block is not None:
+            lag = self.head_block - self.last_block
+        return {
+            "worker_id": self.worker_id,
+            "head_block": self.head_block,
+            "last_block": self.last_block,
+            "lag_blocks": lag,
+            "confirmations": self.confirmations,
+            "transfers_indexed": self.transfers_indexed,
+            "log_queries": self.log_queries,
+            "reorgs": self.reorgs
+        }
+
+
+def main():
+    import argparse
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Index token Transfer logs into chain_transfers/chain_holdings")
+    parser.add_argument("command", choices=["run", "rewind"])
+    parser.add_argument("--rpc-url", default=os.environ.get('WEB3_PROVIDER_URL', 'http://127.0.0.1:8545'))
+    parser.add_argument("--start-block", type=int, default=os.environ.get('TRANSFER_INDEXER_START_BLOCK'),
+                        help="First block on a fresh index (default: the confirmed head)")
+    parser.add_argument("--confirmations", type=int, default=int(os.environ.get('TRANSFER_INDEXER_CONFIRMATIONS', '12')))
+    parser.add_argument("--once", action="store_true", help="Stop once caught up with the chain")
+    parser.add_argument("--to-block", type=int, help="Block to rewind to (rewind command)")
+    args = parser.parse_args()
+
+    async def run():
+        db = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017')).banka_db
+        w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(args.rpc_url))
+        indexer = TransferIndexer(db, w3, start_block=args.start_block, confirmations=args.confirmations)
+        await ensure_indexer_indexes(db)
+
+        if args.command == "rewind":
+            if args.to_block is None:
+                parser.error("rewind needs --to-block")
+            await indexer.rewind_to(args.to_block)
+            return
+
+        while True:
+            caught_up = await indexer.run_once()
+            print(f"Indexed through block {indexer.last_block} (head {indexer.head_block}), "
+                  f"{indexer.transfers_indexed} transfer(s) so far")
+            if caught_up:
+                if args.once:
+                    break
+                await asyncio.sleep(indexer.poll_interval)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+CPU Executor for Crypto Operations in BanKa
+Runs password hashing, key generation/derivation and transaction signing
+on a dedicated thread pool so they never stall the asyncio event loop, and
+tracks queue depth and wait times for monitoring
+"""
+
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class CryptoExecutor:
+    def __init__(self, max_workers: int = 4):
+        """
+        Initialize Crypto Executor
+
+        Args:
+            max_workers: Number of threads; hashlib KDFs and the secp256k1
+                backend release the GIL, so threads scale across cores
+        """
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crypto")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `fn(*args, **kwargs)` on the crypto pool and await its result"""
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+        # Set by whichever side takes the call off the queue count first: the
+        # task when it starts, or the caller when it never will (cancelled
+        # while queued, or submitted after shutdown)
+        dequeued = []
+
+        def leave_queue():
+            if not dequeued:
+                dequeued.append(True)
+                self.queued -= 1
+
+        def task():
+            waited = time.perf_counter() - submitted_at
+            with self._lock:
+                leave_queue()
+                self.running += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, task)
+        finally:
+            with self._lock:
+                leave_queue()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "avg_wait_ms": (self.total_wait / self.completed * 1000) if self.completed else 0.0,
+                "max_wait_ms": self.max_wait * 1000
+            }
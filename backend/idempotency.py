@@ -0,0 +1,193 @@
+"""
+Idempotency Keys for BanKa Write Endpoints
+Remembers the response of each (user, endpoint, Idempotency-Key) in the
+TTL-indexed `idempotency_keys` collection, so a retried request replays the
+original result instead of creating a second record. Concurrent duplicates
+wait for the first request: in-process through a shared future, across
+workers by polling the stored record.
+"""
+
+import json
+import time
+import asyncio
+import hashlib
+import datetime
+from typing import Dict, Any, Optional, Callable, Awaitable
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pymongo.errors import DuplicateKeyError
+
+MAX_KEY_LENGTH = 255
+
+# Rejections the same request would get again (validation, permissions,
+# insufficient balance) are replayed like successes. Anything else, such as a
+# 404 from a lookup or a 409 while a token is still deploying, may succeed on
+# a later retry, so the key is released instead
+FINAL_REJECTION_STATUSES = frozenset({400, 403, 422})
+
+
+class IdempotencyStore:
+    def __init__(self, db, ttl_seconds: int = 86400, lock_seconds: float = 60.0, poll_interval: float = 0.1):
+        """
+        Initialize Idempotency Store
+
+        Args:
+            db: Motor database holding the `idempotency_keys` collection
+            ttl_seconds: How long completed responses are kept for replay
+            lock_seconds: After this long an unfinished request is presumed
+                dead (e.g. its worker crashed) and a retry may run again
+            poll_interval: Seconds between checks while waiting on another worker
+        """
+        self.db = db
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, tuple] = {}
+        self.executed = 0
+        self.replayed = 0
+        self.waited = 0
+
+    async def ensure_indexes(self):
+        await self.db.idempotency_keys.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+
+    async def run(
+        self,
+        scope: str,
+        user_id: str,
+        key: Optional[str],
+        request_body: Any,
+        handler: Callable[[], Awaitable[Any]]
+    ):
+        """
+        Execute `handler` at most once per idempotency key
+
+        Without a key the handler simply runs. Replays of a completed
+        request return the stored response with an `Idempotent-Replayed`
+        header; reusing a key with a different body is rejected with 422.
+        """
+        if key is None:
+            return await handler()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+        record_id = f"{scope}:{user_id}:{key}"
+        fingerprint = hashlib.sha256(
+            json.dumps(jsonable_encoder(request_body), sort_keys=True).encode()
+        ).hexdigest()
+
+        inflight = self._inflight.get(record_id)
+        if inflight is not None:
+            inflight_fingerprint, future = inflight
+            if inflight_fingerprint != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+            self.waited += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[record_id] = (fingerprint, future)
+        try:
+            result = await self._run_once(record_id, fingerprint, handler)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark it retrieved so an exception nobody waited on is not logged
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(record_id, None)
+
+    async def _run_once(self, record_id: str, fingerprint: str, handler: Callable[[], Awaitable[Any]]):
+        deadline = time.monotonic() + self.lock_seconds
+        while True:
+            now = datetime.datetime.utcnow()
+            if await self._acquire(record_id, fingerprint, now):
+                return await self._execute(record_id, handler)
+
+            record = await self.db.idempotency_keys.find_one({"_id": record_id})
+            if record is None:
+                # The first request failed and released the key: run it here
+                continue
+            if record["fingerprint"] != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+            if record["status"] == "completed":
+                self.replayed += 1
+                return self._replay(record)
+            if record["locked_until"] < now and await self._take_over(record_id, now):
+                return await self._execute(record_id, handler)
+            if time.monotonic() >= deadline:
+                raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+            self.waited += 1
+            await asyncio.sleep(self.poll_interval)
+
+    async def _acquire(self, record_id: str, fingerprint: str, now: datetime.datetime) -> bool:
+        try:
+            await self.db.idempotency_keys.insert_one({
+                "_id": record_id,
+                "fingerprint": fingerprint,
+                "status": "in_progress",
+                "created_at": now,
+                "locked_until": now + datetime.timedelta(seconds=self.lock_seconds)
+            })
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def _take_over(self, record_id: str, now: datetime.datetime) -> bool:
+        record = await self.db.idempotency_keys.find_one_and_update(
+            {"_id": record_id, "status": "in_progress", "locked_until": {"$lt": now}},
+            {"$set": {"locked_until": now + datetime.timedelta(seconds=self.lock_seconds)}}
+        )
+        return record is not None
+
+    async def _execute(self, record_id: str, handler: Callable[[], Awaitable[Any]]):
+        self.executed += 1
+        try:
+            result = await handler()
+        except HTTPException as e:
+            if e.status_code in FINAL_REJECTION_STATUSES:
+                await self._complete(record_id, e.status_code, {"detail": e.detail})
+            else:
+                await self.db.idempotency_keys.delete_one({"_id": record_id})
+            raise
+        except BaseException:
+            await asyncio.shield(self.db.idempotency_keys.delete_one({"_id": record_id}))
+            raise
+        await self._complete(record_id, 200, jsonable_encoder(result))
+        return result
+
+    async def _complete(self, record_id: str, status_code: int, body: Any):
+        await self.db.idempotency_keys.update_one(
+            {"_id": record_id},
+            {"$set": {
+                "status": "completed",
+                "response_status": status_code,
+                "response_body": body,
+                "completed_at": datetime.datetime.utcnow()
+            }}
+        )
+
+    def _replay(self, record: Dict[str, Any]):
+        if record["response_status"] >= 400:
+            raise HTTPException(
+                status_code=record["response_status"],
+                detail=record["response_body"].get("detail"),
+                headers={"Idempotent-Replayed": "true"}
+            )
+        return JSONResponse(
+            status_code=record["response_status"],
+            content=record["response_body"],
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inflight": len(self._inflight),
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "waited": self.waited
+        }
@@ -0,0 +1,275 @@
+"""
+Atomic Token Inventory for BanKa
+Reserves supply for every sale with conditional $inc updates, so concurrent
+buyers can never push a token past its initial supply. Each token's supply
+is split across sharded counters in the `token_inventory` collection, which
+spreads writes on hot tokens over several documents; `total_sold` on the
+token and its embedded event copy is rolled up from the shards in the
+background.
+"""
+
+import random
+import asyncio
+import datetime
+from typing import Dict, Any, List, Optional
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from cache import TTLCache
+
+
+class UnknownTokenError(LookupError):
+    """No token exists with the given contract address"""
+
+
+class TokenNotReadyError(Exception):
+    """The token's contract address is a placeholder until its deployment finishes"""
+
+
+class TokenDeploymentFailedError(TokenNotReadyError):
+    """The token's deployment failed for good; nothing will ever live at its address"""
+
+
+# Deployment statuses after which a token's contract_address no longer changes
+FINAL_ADDRESS_STATUSES = ("deployed", "mock", "fallback")
+
+
+def has_final_address(token: Dict[str, Any]) -> bool:
+    """Whether sales can be recorded under the token's contract_address"""
+    # Tokens from before background deployment have no status and were deployed on creation
+    status = token.get("deployment_status", "deployed")
+    if token.get("deployment_method") == "create2":
+        # Known before mining, unless the deployment ran out of attempts
+        return status != "failed"
+    return status in FINAL_ADDRESS_STATUSES
+
+
+def split_supply(supply: int, shards: int) -> List[int]:
+    """Capacities of `shards` counters that add up to `supply`"""
+    base, extra = divmod(max(0, supply), shards)
+    return [base + (1 if shard < extra else 0) for shard in range(shards)]
+
+
+async def ensure_inventory_indexes(db):
+    await db.token_inventory.create_index([("token_id", 1), ("shard", 1)], unique=True)
+
+
+class TokenInventory:
+    def __init__(self, db, shards: int = 8, flush_interval: float = 5.0):
+        """
+        Initialize Token Inventory
+
+        Args:
+            db: Motor database holding `tokens`, `events` and `token_inventory`
+            shards: Counters per token; more shards mean less write contention
+                on popular tokens, at the cost of multi-shard reservations
+                once individual shards run low
+            flush_interval: Seconds between total_sold roll-ups
+        """
+        self.db = db
+        self.shards = max(1, shards)
+        self.flush_interval = flush_interval
+
+        # Final contract addresses are unique and never reused, so address ->
+        # token id lookups can be cached without expiry
+        self._token_ids = TTLCache(maxsize=10000)
+        self._initialized = set()
+        self._dirty = set()
+        self._task: Optional[asyncio.Task] = None
+        self.reserved = 0
+        self.sold_out = 0
+        self.multi_shard = 0
+        self.released = 0
+
+    async def start(self):
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await self.flush()
+
+    async def initialize(self, token: Dict[str, Any]):
+        """
+        Create the shard counters of a token (idempotent)
+
+        Tokens that predate the inventory start with what `purchases`
+        already records as sold, kept in shard 0.
+        """
+        if token["id"] in self._initialized:
+            return
+        if await self.db.token_inventory.count_documents({"token_id": token["id"]}, limit=1) == 0:
+            sold = token.get("total_sold", 0)
+            async for group in self.db.purchases.aggregate([
+                {"$match": {"token_address": token["contract_address"]}},
+                {"$group": {"_id": None, "amount": {"$sum": "$amount"}}}
+            ]):
+                sold = max(sold, group["amount"])
+
+            capacities = split_supply(token["initial_supply"] - sold, self.shards)
+            capacities[0] += sold
+            now = datetime.datetime.utcnow()
+            try:
+                await self.db.token_inventory.bulk_write([
+                    UpdateOne(
+                        {"token_id": token["id"], "shard": shard},
+                        {"$setOnInsert": {
+                            "token_id": token["id"],
+                            "shard": shard,
+                            "capacity": capacity,
+                            "sold": sold if shard == 0 else 0,
+                            "created_at": now
+                        }},
+                        upsert=True
+                    )
+                    for shard, capacity in enumerate(capacities)
+                ], ordered=False)
+            except BulkWriteError as e:
+                # Another worker created the same shards concurrently
+                if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+                    raise
+        self._initialized.add(token["id"])
+
+    async def _resolve(self, token_address: str) -> str:
+        token_id = self._token_ids.get(token_address)
+        if token_id is None:
+            token = await self.db.tokens.find_one(
+                {"contract_address": token_address},
+                {
+                    "_id": 0, "id": 1, "contract_address": 1, "initial_supply": 1, "total_sold": 1,
+                    "deployment_status": 1, "deployment_method": 1
+                }
+            )
+            if not token:
+                raise UnknownTokenError(token_address)
+            if token.get("deployment_method") == "create2" and token.get("deployment_status") == "failed":
+                raise TokenDeploymentFailedError(token_address)
+            if not has_final_address(token):
+                # Sales recorded under a placeholder address would be split
+                # from the token once its real address is known
+                raise TokenNotReadyError(token_address)
+            await self.initialize(token)
+            token_id = token["id"]
+            # A CREATE2 token can still fail to deploy: it is only cached
+            # (and no longer re-checked) once its contract exists
+            if token.get("deployment_status", "deployed") in FINAL_ADDRESS_STATUSES:
+                self._token_ids.set(token_address, token_id)
+        return token_id
+
+    async def _take(self, token_id: str, shard: int, amount: int) -> bool:
+        result = await self.db.token_inventory.update_one(
+            {
+                "token_id": token_id,
+                "shard": shard,
+                "$expr": {"$lte": [{"$add": ["$sold", amount]}, "$capacity"]}
+            },
+            {"$inc": {"sold": amount}}
+        )
+        return result.modified_count == 1
+
+    async def reserve(self, token_address: str, amount: int) -> bool:
+        """
+        Atomically reserve `amount` units of a token
+
+        Returns False when not enough supply is left. Raises
+        UnknownTokenError for an unknown contract address,
+        TokenNotReadyError while the token is still being deployed and
+        TokenDeploymentFailedError once its CREATE2 deployment has failed.
+        """
+        token_id = await self._resolve(token_address)
+        start = random.randrange(self.shards)
+        order = [(start + offset) % self.shards for offset in range(self.shards)]
+
+        for shard in order:
+            if await self._take(token_id, shard, amount):
+                return self._reserved(token_id)
+
+        # No single shard has room: gather the amount from several, giving
+        # everything back if the token as a whole is short
+        taken = []
+        needed = amount
+        async for row in self.db.token_inventory.find(
+            {"token_id": token_id, "$expr": {"$lt": ["$sold", "$capacity"]}},
+            {"_id": 0, "shard": 1, "sold": 1, "capacity": 1}
+        ):
+            take = min(needed, row["capacity"] - row["sold"])
+            if await self._take(token_id, row["shard"], take):
+                taken.append((row["shard"], take))
+                needed -= take
+                if needed == 0:
+                    self.multi_shard += 1
+                    return self._reserved(token_id)
+
+        for shard, take in taken:
+            await self.db.token_inventory.update_one({"token_id": token_id, "shard": shard}, {"$inc": {"sold": -take}})
+        self.sold_out += 1
+        return False
+
+    def _reserved(self, token_id: str) -> bool:
+        self.reserved += 1
+        self._dirty.add(token_id)
+        return True
+
+    async def release(self, token_address: str, amount: int):
+        """Give back a reservation whose sale was not recorded"""
+        token_id = await self._resolve(token_address)
+        remaining = amount
+        async for row in self.db.token_inventory.find(
+            {"token_id": token_id, "sold": {"$gt": 0}},
+            {"_id": 0, "shard": 1, "sold": 1}
+        ):
+            give_back = min(remaining, row["sold"])
+            result = await self.db.token_inventory.update_one(
+                {"token_id": token_id, "shard": row["shard"], "sold": {"$gte": give_back}},
+                {"$inc": {"sold": -give_back}}
+            )
+            if result.modified_count:
+                remaining -= give_back
+            if remaining == 0:
+                break
+        self.released += 1
+        self._dirty.add(token_id)
+
+    async def flush(self):
+        """Write the summed shard counters to total_sold on tokens and events"""
+        dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+        now = datetime.datetime.utcnow()
+        try:
+            async for total in self.db.token_inventory.aggregate([
+                {"$match": {"token_id": {"$in": list(dirty)}}},
+                {"$group": {"_id": "$token_id", "sold": {"$sum": "$sold"}}}
+            ]):
+                token = await self.db.tokens.find_one_and_update(
+                    {"id": total["_id"]},
+                    {"$set": {"total_sold": total["sold"], "updated_at": now}},
+                    {"_id": 0, "event_id": 1}
+                )
+                if token:
+                    await self.db.events.update_one(
+                        {"id": token["event_id"], "tokens.id": total["_id"]},
+                        {"$set": {"tokens.$.total_sold": total["sold"]}}
+                    )
+        except Exception:
+            self._dirty |= dirty
+            raise
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Inventory flush failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "shards": self.shards,
+            "reserved": self.reserved,
+            "multi_shard": self.multi_shard,
+            "sold_out": self.sold_out,
+            "released": self.released,
+            "pending_flush": len(self._dirty)
+        }
@@ -1,16 +1,23 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Header, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
 from typing import List, Optional
+from contextlib import asynccontextmanager
 import os
 import uuid
+import secrets
+import time
 import datetime
 import asyncio
 import jwt
 import hashlib
-from web3 import Web3
+import base64
+import re
+from web3 import AsyncWeb3
 from eth_account import Account
 import json
 
@@ -18,7 +25,21 @@ import json
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from contracts.simple_contract_manager import create_contract_manager
+from contracts.simple_contract_manager import create_contract_manager, simple_token_create2_address
+from contracts.deployment_queue import DeploymentQueue, ACTIVE_STATUSES
+from contracts.abi_registry import AbiRegistry
+from contracts.transfer_indexer import TransferIndexer, ensure_indexer_indexes, get_wallet_holdings
+from contracts.receipt_watcher import ensure_receipt_watcher_indexes
+from cache import TTLCache, TokenInfoCache
+from balances import ensure_balance_indexes, migrate_balance_ledger, apply_balance_deltas, debit_balance, get_wallet_balances
+from wallet_pool import WalletPool
+from crypto_executor import CryptoExecutor
+from idempotency import IdempotencyStore
+from inventory import TokenInventory, UnknownTokenError, TokenNotReadyError, TokenDeploymentFailedError, ensure_inventory_indexes
+from cashier_sync import (
+    ensure_cashier_sync_indexes, register_station, record_journal_entries, apply_pending_entries,
+    load_entry_results, advance_acknowledged_sequence, load_sync_delta
+)
 
 # Web3 setup
 WEB3_PROVIDER_URL = os.environ.get('WEB3_PROVIDER_URL', 'https://bsc-testnet.nodereal.io/v1/e9a36765eb8a40b9bd12e680a1fd2bc5')
@@ -46,28 +67,291 @@ def get_deployer_private_key():
             print(f"Failed to create test account: {e2}")
             return '0x' + 'a' * 64  # Ultimate fallback
 
-# Contract deployer private key
-DEPLOYER_PRIVATE_KEY = os.environ.get('DEPLOYER_PRIVATE_KEY') or get_deployer_private_key()
-
-# Initialize Web3
-try:
-    w3 = Web3(Web3.HTTPProvider(WEB3_PROVIDER_URL))
-    print(f"Connecting to Web3 provider: {WEB3_PROVIDER_URL}")
-    latest_block = w3.eth.block_number
-    print(f"Connected to blockchain! Latest block: {latest_block}")
-except Exception as e:
-    print(f"Failed to connect to blockchain: {e}")
-    w3 = None
-
-# Initialize Contract Manager
-try:
-    contract_manager = create_contract_manager(WEB3_PROVIDER_URL, DEPLOYER_PRIVATE_KEY)
-    print("✅ Smart contract manager initialized")
-except Exception as e:
-    print(f"Failed to initialize contract manager: {e}")
-    contract_manager = None
-
-app = FastAPI(title="BanKa API", description="Blockchain Event Payment System")
+# Chain clients are built by the lifespan's background initializer, so
+# importing this module never derives keys or touches the network
+w3 = None
+contract_manager = None
+
+# Readiness of the lazily initialized components
+app_state = {
+    "started_at": None,
+    "chain_clients_ready": False,
+    "chain_connected": False,
+    "chain_init_attempts": 0,
+    "chain_init_error": None
+}
+
+# Dedicated pool for CPU-bound crypto (password hashing, key creation, signing)
+crypto_executor = CryptoExecutor(max_workers=int(os.environ.get('CRYPTO_EXECUTOR_WORKERS', '4')))
+
+CHAIN_INIT_MAX_BACKOFF = float(os.environ.get('CHAIN_INIT_MAX_BACKOFF', '60'))
+
+# Database
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+client = AsyncIOMotorClient(MONGO_URL)
+db = client.banka_db
+
+# Contract ABIs stored once by content hash and interned in memory
+abi_registry = AbiRegistry(db)
+
+# Live on-chain token metadata cache
+token_info_cache = TokenInfoCache(
+    maxsize=int(os.environ.get('TOKEN_INFO_CACHE_SIZE', '10000')),
+    supply_ttl=float(os.environ.get('TOKEN_SUPPLY_CACHE_TTL', '15'))
+)
+
+# Short-lived cache of public event listings; cleared whenever this worker
+# changes an event or token, and bounded by the TTL across workers
+public_events_cache = TTLCache(maxsize=256, ttl=float(os.environ.get('PUBLIC_EVENTS_CACHE_TTL', '10')))
+
+def invalidate_public_events_cache():
+    public_events_cache.clear()
+
+async def on_token_deployment_change(token: dict):
+    invalidate_public_events_cache()
+    # A finished deployment changes what the chain returns for the address
+    if token.get("contract_address"):
+        token_info_cache.invalidate(token["contract_address"])
+
+# Responses of purchase/transfer requests by Idempotency-Key
+idempotency_store = IdempotencyStore(
+    db,
+    ttl_seconds=int(os.environ.get('IDEMPOTENCY_KEY_TTL', '86400')),
+    lock_seconds=float(os.environ.get('IDEMPOTENCY_LOCK_SECONDS', '60'))
+)
+
+# Sharded supply counters; total_sold is rolled up every flush interval
+token_inventory = TokenInventory(
+    db,
+    shards=int(os.environ.get('INVENTORY_SHARDS', '8')),
+    flush_interval=float(os.environ.get('INVENTORY_FLUSH_INTERVAL', '5'))
+)
+
+# Pre-generated custodial wallets for registration bursts (0 disables the pool)
+WALLET_POOL_SIZE = int(os.environ.get('WALLET_POOL_SIZE', '200'))
+WALLET_POOL_PROCESSES = int(os.environ.get('WALLET_POOL_PROCESSES', '1'))
+WALLET_POOL_ENCRYPTION_KEY = os.environ.get('WALLET_POOL_ENCRYPTION_KEY')
+wallet_pool = None
+
+# Background token deployments
+TOKEN_DEPLOY_CONCURRENCY = int(os.environ.get('TOKEN_DEPLOY_CONCURRENCY', '4'))
+# "standalone": one SimpleERC20 deployment per token;
+# "create2": one SimpleERC20 per token at an address known before mining
+TOKEN_DEPLOY_STRATEGY = os.environ.get('TOKEN_DEPLOY_STRATEGY', 'standalone')
+deployment_queue = None
+
+# On-chain Transfer log indexer (one worker at a time holds its lease)
+TRANSFER_INDEXER_ENABLED = os.environ.get('TRANSFER_INDEXER_ENABLED', 'true').lower() == 'true'
+# Unset: a fresh index starts at the confirmed head, tokens are backfilled
+# from their deployment blocks
+TRANSFER_INDEXER_START_BLOCK = os.environ.get('TRANSFER_INDEXER_START_BLOCK')
+TRANSFER_INDEXER_START_BLOCK = int(TRANSFER_INDEXER_START_BLOCK) if TRANSFER_INDEXER_START_BLOCK else None
+TRANSFER_INDEXER_CONFIRMATIONS = int(os.environ.get('TRANSFER_INDEXER_CONFIRMATIONS', '12'))
+transfer_indexer = None
+
+def build_chain_clients():
+    """Derive the deployer key and create the Web3 client and contract manager (CPU only, no I/O)"""
+    deployer_private_key = os.environ.get('DEPLOYER_PRIVATE_KEY') or get_deployer_private_key()
+    # Async provider, so RPC round trips never block the event loop
+    web3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(WEB3_PROVIDER_URL))
+    manager = create_contract_manager(WEB3_PROVIDER_URL, deployer_private_key, crypto_executor=crypto_executor, db=db)
+    return web3, manager
+
+async def init_chain_clients():
+    """Build chain clients off the event loop, then wait for the RPC with exponential backoff"""
+    global w3, contract_manager, deployment_queue, transfer_indexer
+    delay = 1.0
+    
+    while not app_state["chain_clients_ready"]:
+        app_state["chain_init_attempts"] += 1
+        try:
+            w3, contract_manager = await crypto_executor.run(build_chain_clients)
+            app_state["chain_clients_ready"] = True
+            app_state["chain_init_error"] = None
+            print(f"✅ Smart contract manager initialized for {WEB3_PROVIDER_URL}")
+        except Exception as e:
+            app_state["chain_init_error"] = str(e)
+            print(f"Failed to initialize chain clients (attempt {app_state['chain_init_attempts']}): {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, CHAIN_INIT_MAX_BACKOFF)
+    
+    # Tokens created from here on are enqueued right away, but workers only
+    # start once the RPC answers so a slow node does not turn every queued
+    # deployment into a fallback token
+    deployment_queue = DeploymentQueue(
+        db, contract_manager,
+        abi_registry=abi_registry,
+        concurrency=TOKEN_DEPLOY_CONCURRENCY,
+        on_change=on_token_deployment_change
+    )
+    
+    delay = 1.0
+    while not app_state["chain_connected"]:
+        try:
+            latest_block = await w3.eth.block_number
+            # Sync the local nonce allocator with the node before deploying anything
+            await contract_manager.nonce_manager.reconcile()
+            app_state["chain_connected"] = True
+            app_state["chain_init_error"] = None
+            print(f"Connected to blockchain! Latest block: {latest_block}")
+        except Exception as e:
+            app_state["chain_init_error"] = str(e)
+            print(f"Blockchain not reachable yet, retrying in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, CHAIN_INIT_MAX_BACKOFF)
+    
+    # Fee sampling starts before deployments, so the first one does not pay
+    # for an on-demand fee history request
+    await contract_manager.gas_oracle.start()
+    # Resume watching transactions broadcast before a restart
+    await contract_manager.receipt_watcher.start()
+    await deployment_queue.start()
+    
+    if TRANSFER_INDEXER_ENABLED:
+        try:
+            await ensure_indexer_indexes(db)
+        except Exception as e:
+            print(f"Failed to ensure transfer indexer indexes: {e}")
+        transfer_indexer = TransferIndexer(
+            db, w3,
+            start_block=TRANSFER_INDEXER_START_BLOCK,
+            confirmations=TRANSFER_INDEXER_CONFIRMATIONS
+        )
+        await transfer_indexer.start()
+
+# Health snapshot refreshed by a background prober, so health checks never
+# wait on the RPC or Mongo themselves
+HEALTH_PROBE_INTERVAL = float(os.environ.get('HEALTH_PROBE_INTERVAL', '5'))
+HEALTH_PROBE_TIMEOUT = float(os.environ.get('HEALTH_PROBE_TIMEOUT', '3'))
+health_snapshot = {}
+
+async def probe_health() -> dict:
+    """Check chain head, Mongo and contract manager state once"""
+    blockchain_connected = False
+    blockchain_error = None
+    latest_block = None
+    if w3 is not None:
+        try:
+            async with asyncio.timeout(HEALTH_PROBE_TIMEOUT):
+                latest_block = await w3.eth.block_number
+            blockchain_connected = True
+        except Exception as e:
+            blockchain_error = str(e) or type(e).__name__
+    else:
+        blockchain_error = app_state["chain_init_error"] or "Web3 provider not initialized"
+    
+    database_error = None
+    try:
+        # asyncio.timeout rather than wait_for: on 3.11 wait_for can swallow a
+        # cancel that lands as the ping completes, and the prober never stops
+        async with asyncio.timeout(HEALTH_PROBE_TIMEOUT):
+            await db.command("ping")
+        database_connected = True
+    except Exception as e:
+        database_connected = False
+        database_error = str(e) or type(e).__name__
+    
+    if blockchain_connected and database_connected:
+        status = "healthy"
+    elif database_connected:
+        status = "partial"
+    else:
+        status = "unhealthy"
+    
+    return {
+        "status": status,
+        "blockchain_connected": blockchain_connected,
+        "blockchain_error": blockchain_error,
+        "latest_block": latest_block,
+        "database_connected": database_connected,
+        "database_error": database_error,
+        "contract_manager": {
+            "initialized": contract_manager is not None,
+            "chain_connected": app_state["chain_connected"],
+            "deployment_workers_running": bool(deployment_queue and deployment_queue.running)
+        },
+        "web3_provider": WEB3_PROVIDER_URL,
+        "checked_at": datetime.datetime.utcnow()
+    }
+
+async def run_health_prober():
+    """Refresh the health snapshot every HEALTH_PROBE_INTERVAL seconds"""
+    global health_snapshot
+    while True:
+        try:
+            health_snapshot = await probe_health()
+        except Exception as e:
+            print(f"Health probe failed: {e}")
+        await asyncio.sleep(HEALTH_PROBE_INTERVAL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start lazy initialization in the background so the worker accepts requests immediately"""
+    global wallet_pool
+    if WALLET_POOL_SIZE > 0 and not WALLET_POOL_ENCRYPTION_KEY:
+        # Never fall back to a key derived from a (possibly default) JWT secret
+        raise RuntimeError(
+            "WALLET_POOL_ENCRYPTION_KEY must be set to a Fernet key to store pre-generated wallets "
+            "(or set WALLET_POOL_SIZE=0 to disable the pool)"
+        )
+    app_state["started_at"] = datetime.datetime.utcnow()
+    try:
+        await ensure_balance_indexes(db)
+    except Exception as e:
+        print(f"Failed to ensure balance indexes: {e}")
+    try:
+        # Transfers debit the ledger, so it must hold pre-ledger purchases
+        # before this worker serves anything (a no-op once it has run)
+        if await migrate_balance_ledger(db):
+            print("✅ Balance ledger built from transaction history")
+    except Exception as e:
+        print(f"Failed to build the balance ledger: {e}")
+    try:
+        await ensure_cashier_sync_indexes(db)
+    except Exception as e:
+        print(f"Failed to ensure cashier sync indexes: {e}")
+    try:
+        await idempotency_store.ensure_indexes()
+    except Exception as e:
+        print(f"Failed to ensure idempotency indexes: {e}")
+    try:
+        await ensure_inventory_indexes(db)
+    except Exception as e:
+        print(f"Failed to ensure inventory indexes: {e}")
+    try:
+        await ensure_receipt_watcher_indexes(db)
+    except Exception as e:
+        print(f"Failed to ensure receipt watcher indexes: {e}")
+    await token_inventory.start()
+    if WALLET_POOL_SIZE > 0:
+        wallet_pool = WalletPool(
+            db,
+            encryption_key=WALLET_POOL_ENCRYPTION_KEY.encode(),
+            target_size=WALLET_POOL_SIZE,
+            low_watermark=WALLET_POOL_SIZE // 4,
+            processes=WALLET_POOL_PROCESSES
+        )
+        await wallet_pool.start()
+    init_task = asyncio.create_task(init_chain_clients())
+    prober_task = asyncio.create_task(run_health_prober())
+    yield
+    init_task.cancel()
+    prober_task.cancel()
+    await asyncio.gather(init_task, prober_task, return_exceptions=True)
+    if deployment_queue:
+        await deployment_queue.stop()
+    if transfer_indexer:
+        await transfer_indexer.stop()
+    if wallet_pool:
+        await wallet_pool.stop()
+    await token_inventory.stop()
+    if contract_manager:
+        await contract_manager.gas_oracle.stop()
+        await contract_manager.receipt_watcher.stop()
+        await contract_manager.batch_reader.close()
+    crypto_executor.shutdown()
+
+app = FastAPI(title="BanKa API", description="Blockchain Event Payment System", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -78,11 +362,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Database
-MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(MONGO_URL)
-db = client.banka_db
-
 # Security
 security = HTTPBearer()
 
@@ -120,6 +399,28 @@ class TokenTransferOffline(BaseModel):
     amount: int = Field(..., gt=0)
     cashier_id: str
 
+OFFLINE_TRANSFER_BATCH_MAX = int(os.environ.get('OFFLINE_TRANSFER_BATCH_MAX', '500'))
+
+class TokenTransferOfflineBatch(BaseModel):
+    transfers: List[TokenTransferOffline] = Field(..., min_length=1, max_length=OFFLINE_TRANSFER_BATCH_MAX)
+
+CASHIER_SYNC_BATCH_MAX = int(os.environ.get('CASHIER_SYNC_BATCH_MAX', '1000'))
+CASHIER_SYNC_DELTA_LIMIT = int(os.environ.get('CASHIER_SYNC_DELTA_LIMIT', '1000'))
+
+class CashierSyncEntry(BaseModel):
+    client_id: str = Field(..., min_length=1, max_length=100)
+    sequence: int = Field(..., gt=0)
+    user_email: str
+    token_address: str
+    amount: int = Field(..., gt=0)
+    recorded_at: Optional[datetime.datetime] = None
+
+class CashierSyncRequest(BaseModel):
+    station_id: str = Field(..., min_length=1, max_length=100)
+    event_id: str
+    checkpoint: Optional[str] = None
+    entries: List[CashierSyncEntry] = Field(default_factory=list, max_length=CASHIER_SYNC_BATCH_MAX)
+
 class TokenTransfer(BaseModel):
     to_address: str
     token_address: str
@@ -165,24 +466,55 @@ def verify_jwt_token(token: str):
     except jwt.InvalidTokenError:
         return None
 
+# Decoded JWTs and projected user records for authenticated requests. Entries
+# are dropped on login/wallet changes in this worker; the short TTL bounds
+# staleness across workers
+AUTH_CACHE_TTL = float(os.environ.get('AUTH_CACHE_TTL', '30'))
+AUTH_CACHE_SIZE = int(os.environ.get('AUTH_CACHE_SIZE', '10000'))
+jwt_payload_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+current_user_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+
+# Secrets and unbounded arrays are never loaded for authentication; routes
+# that need the private key fetch it explicitly
+CURRENT_USER_PROJECTION = {"_id": 0, "password": 0, "wallet_private_key": 0, "events_created": 0}
+
+def invalidate_current_user(user_id: str):
+    current_user_cache.pop(user_id)
+
+def verify_jwt_token_cached(token: str):
+    """verify_jwt_token, memoized until the token's expiry (at most AUTH_CACHE_TTL)"""
+    payload = jwt_payload_cache.get(token)
+    if payload is not None:
+        return payload
+    payload = verify_jwt_token(token)
+    if payload:
+        remaining = payload.get("exp", float("inf")) - time.time()
+        if remaining > 0:
+            jwt_payload_cache.set(token, payload, ttl=min(AUTH_CACHE_TTL, remaining))
+    return payload
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current authenticated user"""
     try:
-        payload = verify_jwt_token(credentials.credentials)
+        payload = verify_jwt_token_cached(credentials.credentials)
         if not payload:
             raise HTTPException(
                 status_code=401, 
                 detail="Token inválido ou expirado. Faça login novamente."
             )
         
-        user = await db.users.find_one({"id": payload["user_id"]})
-        if not user:
-            raise HTTPException(
-                status_code=401, 
-                detail="Usuário não encontrado. Faça login novamente."
-            )
+        user = current_user_cache.get(payload["user_id"])
+        if user is None:
+            user = await db.users.find_one({"id": payload["user_id"]}, CURRENT_USER_PROJECTION)
+            if not user:
+                raise HTTPException(
+                    status_code=401, 
+                    detail="Usuário não encontrado. Faça login novamente."
+                )
+            current_user_cache.set(payload["user_id"], user)
         
-        return user
+        # Routes get their own copy so the cached record stays untouched
+        return dict(user)
     except HTTPException:
         raise
     except Exception as e:
@@ -192,51 +524,72 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="Erro de autenticação. Faça login novamente."
         )
 
+def encode_page_cursor(position: dict) -> str:
+    """Opaque keyset pagination cursor for the position of the last returned item"""
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+def decode_page_cursor(cursor: str, required: tuple = (), timestamps: tuple = ()) -> dict:
+    """
+    Position of a cursor from encode_page_cursor, or raise 400
+
+    Every key in `required` must be present; keys in `timestamps` are
+    parsed from ISO format into datetimes.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(position, dict):
+            raise ValueError("cursor is not an object")
+        missing = [key for key in required if key not in position]
+        if missing:
+            raise ValueError(f"cursor is missing {missing}")
+        for key in timestamps:
+            position[key] = datetime.datetime.fromisoformat(position[key])
+        return position
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
 def hash_password(password: str) -> str:
     """Hash password using SHA256"""
     return hashlib.sha256(password.encode()).hexdigest()
 
-async def get_user_blockchain_assets(wallet_address: str):
-    """Get user's blockchain assets"""
+async def get_user_blockchain_assets(wallet_address: str, chain_timeout: Optional[float] = None):
+    """Get user's blockchain assets; the BNB balance is skipped if the RPC exceeds `chain_timeout`"""
     try:
-        if not w3 or not w3.is_connected():
-            return {"bnb_balance": "0", "tokens": []}
-        
-        # Get BNB balance
-        balance_wei = w3.eth.get_balance(wallet_address)
-        bnb_balance = w3.from_wei(balance_wei, 'ether')
-        
-        # For MVP, we'll simulate token balances
-        # In production, you'd query actual token contracts
-        tokens = []
-        
-        # Get user's event participations to show token balances
-        user_purchases = []
-        async for purchase in db.purchases.find({"user_wallet": wallet_address}):
-            user_purchases.append(purchase)
-        
-        # Aggregate token balances
-        token_balances = {}
-        for purchase in user_purchases:
-            token_addr = purchase.get("token_address")
-            if token_addr not in token_balances:
-                token_balances[token_addr] = {
-                    "address": token_addr,
-                    "balance": 0,
-                    "name": purchase.get("token_name", "Unknown"),
-                    "event_name": purchase.get("event_name", "Unknown Event")
-                }
-            token_balances[token_addr]["balance"] += purchase.get("amount", 0)
-        
-        tokens = list(token_balances.values())
-        
-        return {
-            "bnb_balance": str(bnb_balance),
-            "tokens": tokens
-        }
+        # Token balances come from the materialized ledger: one indexed read
+        tokens, holdings = await asyncio.gather(
+            get_wallet_balances(db, wallet_address),
+            get_wallet_holdings(db, wallet_address)
+        )
     except Exception as e:
-        print(f"Error getting blockchain assets: {e}")
-        return {"bnb_balance": "0", "tokens": []}
+        print(f"Error getting token balances: {e}")
+        tokens, holdings = [], {}
+    
+    # Balances moved on-chain (e.g. MetaMask transfers) as seen by the
+    # Transfer log indexer, in raw token units
+    for token in tokens:
+        token["on_chain_balance"] = holdings.pop(token["address"], None)
+    for address, balance in holdings.items():
+        tokens.append({
+            "address": address,
+            "balance": 0,
+            "on_chain_balance": balance,
+            "name": "Unknown",
+            "event_name": "Unknown Event"
+        })
+    
+    bnb_balance = "0"
+    if w3 is not None:
+        try:
+            balance_wei = await asyncio.wait_for(w3.eth.get_balance(wallet_address), timeout=chain_timeout)
+            bnb_balance = str(w3.from_wei(balance_wei, 'ether'))
+        except Exception as e:
+            print(f"Error getting BNB balance: {e}")
+    
+    return {
+        "bnb_balance": bnb_balance,
+        "tokens": tokens
+    }
 
 # API Routes
 @app.get("/")
@@ -245,38 +598,39 @@ async def root():
 
 @app.get("/api/health")
 async def health_check():
-    """Health check endpoint"""
-    try:
-        # Check blockchain connection
-        if w3 is not None and w3.is_connected():
-            latest_block = w3.eth.block_number
-            blockchain_connected = True
-            blockchain_error = None
-        else:
-            latest_block = None
-            blockchain_connected = False
-            blockchain_error = "Web3 provider not connected"
-        
-        # Check database connection
-        await db.list_collection_names()
-        database_connected = True
-        
+    """Health check endpoint, served from the background prober's last snapshot"""
+    if not health_snapshot:
         return {
-            "status": "healthy" if blockchain_connected and database_connected else "partial",
-            "blockchain_connected": blockchain_connected,
-            "blockchain_error": blockchain_error,
-            "latest_block": latest_block,
-            "database_connected": database_connected,
-            "web3_provider": WEB3_PROVIDER_URL
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "error": str(e),
+            "status": "starting",
             "blockchain_connected": False,
             "database_connected": False,
             "web3_provider": WEB3_PROVIDER_URL
         }
+    return health_snapshot
+
+@app.get("/livez")
+@app.get("/api/livez")
+async def liveness_check():
+    """Liveness: the process is up and its event loop is serving requests"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+@app.get("/api/readyz")
+async def readiness_check():
+    """Readiness: the database answered the most recent probe and the prober is not stale"""
+    checked_at = health_snapshot.get("checked_at")
+    fresh = (
+        checked_at is not None and
+        (datetime.datetime.utcnow() - checked_at).total_seconds() < HEALTH_PROBE_INTERVAL * 3
+    )
+    ready = fresh and health_snapshot.get("database_connected", False)
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "database_connected": health_snapshot.get("database_connected", False),
+        "blockchain_connected": health_snapshot.get("blockchain_connected", False),
+        "checked_at": checked_at.isoformat() if checked_at else None
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
 
 @app.post("/api/auth/register")
 async def register_user(user: UserRegister):
@@ -296,13 +650,16 @@ async def register_user(user: UserRegister):
                 "type": "external"
             }
         else:
-            wallet = create_real_wallet()
+            # Pop a pre-generated wallet; generate inline only if the pool is empty
+            wallet = await wallet_pool.pop() if wallet_pool else None
+            if not wallet:
+                wallet = await crypto_executor.run(create_real_wallet)
             if not wallet:
                 raise HTTPException(status_code=500, detail="Failed to create blockchain wallet")
             wallet["type"] = "custodial"
         
         # Hash password
-        hashed_password = hash_password(user.password)
+        hashed_password = await crypto_executor.run(hash_password, user.password)
         
         user_data = {
             "id": str(uuid.uuid4()),
@@ -354,7 +711,7 @@ async def login_user(credentials: UserLogin):
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
         # Verify password
-        hashed_password = hash_password(credentials.password)
+        hashed_password = await crypto_executor.run(hash_password, credentials.password)
         if user["password"] != hashed_password:
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
@@ -371,6 +728,7 @@ async def login_user(credentials: UserLogin):
             )
             user["wallet_address"] = external_wallet
             user["wallet_type"] = "external"
+            invalidate_current_user(user["id"])
         
         # Create JWT token
         token = create_jwt_token(user)
@@ -391,54 +749,110 @@ async def login_user(credentials: UserLogin):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Login failed: {str(e)}")
 
+PROFILE_FIELDS = ("user", "wallet", "events", "transactions", "settings")
+PROFILE_SOURCE_TIMEOUT = float(os.environ.get('PROFILE_SOURCE_TIMEOUT', '2'))
+PROFILE_CHAIN_TIMEOUT = float(os.environ.get('PROFILE_CHAIN_TIMEOUT', '1.5'))
+
+async def _load_profile_source(name: str, coro, timeout: float, default, unavailable: list):
+    """Await one profile source; a slow or failing source degrades to `default`"""
+    try:
+        return await asyncio.wait_for(coro, timeout=timeout)
+    except Exception as e:
+        print(f"Profile source '{name}' unavailable: {e or type(e).__name__}")
+        unavailable.append(name)
+        return default
+
+async def _load_user_events(user_id: str):
+    user_events = []
+    async for event in db.events.find({"organizer_id": user_id}, {"_id": 0}):
+        user_events.append(event)
+    return user_events
+
+async def _load_recent_transactions(collection, query: dict, tx_type: str):
+    transactions = []
+    async for tx in collection.find(query, {"_id": 0}).sort("timestamp", -1).limit(10):
+        tx["type"] = tx_type
+        transactions.append(tx)
+    return transactions
+
 @app.get("/api/profile")
-async def get_user_profile(current_user: dict = Depends(get_current_user)):
-    """Get user profile with blockchain assets"""
+async def get_user_profile(fields: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """Get user profile with blockchain assets; `fields` (comma separated) limits the sections loaded"""
     try:
-        # Get blockchain assets
-        assets = await get_user_blockchain_assets(current_user["wallet_address"])
-        
-        # Get user's events
-        user_events = []
-        async for event in db.events.find({"organizer_id": current_user["id"]}):
-            event.pop("_id", None)
-            user_events.append(event)
+        requested = set(PROFILE_FIELDS)
+        if fields:
+            requested = {f.strip() for f in fields.split(",") if f.strip()}
+            unknown = requested - set(PROFILE_FIELDS)
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown profile fields: {', '.join(sorted(unknown))}")
         
-        # Get transaction history
-        transactions = []
-        async for tx in db.purchases.find({"user_id": current_user["id"]}).sort("timestamp", -1).limit(10):
-            tx.pop("_id", None)
-            tx["type"] = "purchase"
-            transactions.append(tx)
+        # Independent sources are loaded concurrently, each with its own timeout
+        unavailable = []
+        sources = {}
+        if "wallet" in requested:
+            sources["assets"] = _load_profile_source(
+                "wallet.assets",
+                get_user_blockchain_assets(current_user["wallet_address"], chain_timeout=PROFILE_CHAIN_TIMEOUT),
+                PROFILE_SOURCE_TIMEOUT, {"bnb_balance": "0", "tokens": []}, unavailable
+            )
+        if "events" in requested:
+            sources["events"] = _load_profile_source(
+                "events", _load_user_events(current_user["id"]),
+                PROFILE_SOURCE_TIMEOUT, [], unavailable
+            )
+        if "transactions" in requested:
+            sources["purchases"] = _load_profile_source(
+                "transactions.purchases",
+                _load_recent_transactions(db.purchases, {"user_id": current_user["id"]}, "purchase"),
+                PROFILE_SOURCE_TIMEOUT, [], unavailable
+            )
+            sources["transfers"] = _load_profile_source(
+                "transactions.transfers",
+                _load_recent_transactions(db.transfers, {"from_user_id": current_user["id"]}, "transfer"),
+                PROFILE_SOURCE_TIMEOUT, [], unavailable
+            )
         
-        async for tx in db.transfers.find({"from_user_id": current_user["id"]}).sort("timestamp", -1).limit(10):
-            tx.pop("_id", None)
-            tx["type"] = "transfer"
-            transactions.append(tx)
+        if "wallet" in requested:
+            # Not part of the cached auth record
+            sources["private_key"] = db.users.find_one(
+                {"id": current_user["id"]}, {"_id": 0, "wallet_private_key": 1}
+            )
         
-        # Sort transactions by timestamp
-        transactions.sort(key=lambda x: x.get("timestamp", datetime.datetime.min), reverse=True)
+        loaded = dict(zip(sources.keys(), await asyncio.gather(*sources.values())))
         
-        profile = {
-            "user": {
+        profile = {}
+        if "user" in requested:
+            profile["user"] = {
                 "id": current_user["id"],
                 "name": current_user["name"],
                 "email": current_user["email"],
                 "phone": current_user.get("phone"),
                 "created_at": current_user["created_at"],
                 "wallet_address": current_user["wallet_address"]
-            },
-            "wallet": {
+            }
+        if "wallet" in requested:
+            profile["wallet"] = {
                 "address": current_user["wallet_address"],
-                "private_key": current_user["wallet_private_key"],  # Will be hidden in frontend
-                "assets": assets
-            },
-            "events": user_events,
-            "recent_transactions": transactions[:10],
-            "settings": current_user.get("profile_settings", {})
-        }
+                "private_key": (loaded["private_key"] or {}).get("wallet_private_key"),  # Will be hidden in frontend
+                "assets": loaded["assets"]
+            }
+        if "events" in requested:
+            profile["events"] = loaded["events"]
+        if "transactions" in requested:
+            # Merge and sort transactions by timestamp
+            transactions = loaded["purchases"] + loaded["transfers"]
+            transactions.sort(key=lambda x: x.get("timestamp", datetime.datetime.min), reverse=True)
+            profile["recent_transactions"] = transactions[:10]
+        if "settings" in requested:
+            profile["settings"] = current_user.get("profile_settings", {})
+        
+        if unavailable:
+            profile["partial"] = True
+            profile["unavailable"] = unavailable
         
         return profile
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get profile: {str(e)}")
 
@@ -465,6 +879,7 @@ async def create_event(event: EventCreate, current_user: dict = Depends(get_curr
         }
         
         await db.events.insert_one(event_data)
+        invalidate_public_events_cache()
         
         # Update user's events list
         await db.users.update_one(
@@ -493,18 +908,70 @@ async def get_events(current_user: dict = Depends(get_current_user)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get events: {str(e)}")
 
+PUBLIC_EVENTS_DEFAULT_LIMIT = 50
+PUBLIC_EVENTS_MAX_LIMIT = 200
+
+# Public listing payload: no ABIs, cashier data, organizer contact or
+# deployment bookkeeping
+PUBLIC_EVENT_PROJECTION = {
+    "_id": 0,
+    "organizer_email": 0,
+    "cashiers": 0,
+    "tokens.contract_abi": 0,
+    "tokens.deployment_worker": 0,
+    "tokens.deployment_lease_until": 0,
+    "tokens.deployment_error": 0
+}
+
 @app.get("/api/events/public")
-async def get_public_events():
-    """Get all public events for participants"""
+async def get_public_events(
+    limit: int = PUBLIC_EVENTS_DEFAULT_LIMIT,
+    after: Optional[str] = None,
+    date_from: Optional[datetime.datetime] = None,
+    date_to: Optional[datetime.datetime] = None,
+    location: Optional[str] = None
+):
+    """Get public events for participants, ordered by date; pass `next_cursor` as `after` for the next page"""
     try:
-        events = []
-        async for event in db.events.find({"is_active": True}):
-            event.pop("_id", None)
-            # Remove sensitive organizer data
-            event.pop("organizer_email", None)
-            events.append(event)
+        limit = max(1, min(limit, PUBLIC_EVENTS_MAX_LIMIT))
+        cache_key = (limit, after, date_from, date_to, location)
+        cached = public_events_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        return {"events": events}
+        query = {"is_active": True}
+        date_range = {}
+        if date_from:
+            date_range["$gte"] = date_from
+        if date_to:
+            date_range["$lte"] = date_to
+        if date_range:
+            query["date"] = date_range
+        if location:
+            query["location"] = {"$regex": re.escape(location), "$options": "i"}
+        if after:
+            position = decode_page_cursor(after, required=("date", "id"), timestamps=("date",))
+            after_date = position["date"]
+            query["$or"] = [
+                {"date": {"$gt": after_date}},
+                {"date": after_date, "id": {"$gt": str(position["id"])}}
+            ]
+        
+        events = await db.events.find(query, PUBLIC_EVENT_PROJECTION) \
+            .sort([("date", 1), ("id", 1)]) \
+            .limit(limit + 1) \
+            .to_list(length=limit + 1)
+        
+        next_cursor = None
+        if len(events) > limit:
+            events = events[:limit]
+            next_cursor = encode_page_cursor({"date": events[-1]["date"].isoformat(), "id": events[-1]["id"]})
+        
+        response = {"events": events, "next_cursor": next_cursor}
+        public_events_cache.set(cache_key, response)
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get public events: {str(e)}")
 
@@ -540,51 +1007,27 @@ async def create_token(event_id: str, token: TokenCreate, current_user: dict = D
         # Create full token name
         full_token_name = f"{event['name']} - {token.name}"
         
-        # Deploy real smart contract if contract manager is available
-        contract_address = None
-        contract_abi = None
-        deployment_tx_hash = None
-        deployment_status = "pending"
-        
-        if contract_manager and contract_manager.is_connected():
+        # The contract is deployed in the background. CREATE2 tokens get
+        # their final address right away; otherwise the token carries a
+        # unique placeholder address until the deployment finishes, and
+        # sales are refused until then (see TokenInventory._resolve)
+        token_id = str(uuid.uuid4())
+        deployment_fields = {}
+        if TOKEN_DEPLOY_STRATEGY == 'create2':
             try:
-                print(f"🚀 Deploying smart contract for token: {full_token_name}")
-                
-                # Deploy the contract
-                deployment_result = await contract_manager.deploy_simple_token(
-                    token_name=full_token_name,
-                    token_symbol=token_symbol,
-                    total_supply=token.initial_supply,
-                    owner_address=current_user["wallet_address"]
+                contract_address, salt = simple_token_create2_address(
+                    token_id, full_token_name, token_symbol, token.initial_supply, current_user["wallet_address"]
                 )
-                
-                if deployment_result["success"]:
-                    contract_address = deployment_result["contract_address"]
-                    contract_abi = deployment_result["abi"]
-                    deployment_tx_hash = deployment_result["transaction_hash"]
-                    deployment_status = "deployed"
-                    print(f"✅ Contract deployed successfully at: {contract_address}")
-                else:
-                    print(f"🔄 Using fallback system: {deployment_result.get('error', 'Unknown error')}")
-                    contract_address = deployment_result["contract_address"]
-                    contract_abi = deployment_result["abi"]
-                    deployment_tx_hash = deployment_result["transaction_hash"]
-                    deployment_status = "fallback"
-                    
-            except Exception as e:
-                print(f"❌ Contract deployment error: {e}")
-                # Fallback to mock address
-                contract_address = f"0x{uuid.uuid4().hex[:40]}"
-                deployment_status = "failed"
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Organizer needs a valid wallet address to create tokens")
+            deployment_fields = {"deployment_method": "create2", "deployment_salt": "0x" + salt.hex()}
         else:
-            # Fallback to mock address when contract manager is not available
-            contract_address = f"0x{uuid.uuid4().hex[:40]}"
-            deployment_status = "mock"
-            print("⚠️ Contract manager not available, using mock address")
+            contract_address = "0x" + secrets.token_hex(20)
         
         # Create token data
+        now = datetime.datetime.utcnow()
         token_data = {
-            "id": str(uuid.uuid4()),
+            "id": token_id,
             "name": token.name,
             "full_name": full_token_name,
             "symbol": token_symbol,
@@ -593,11 +1036,13 @@ async def create_token(event_id: str, token: TokenCreate, current_user: dict = D
             "total_sold": 0,
             "sale_mode": token.sale_mode,
             "contract_address": contract_address,
-            "contract_abi": contract_abi,
-            "deployment_tx_hash": deployment_tx_hash,
-            "deployment_status": deployment_status,
+            "contract_abi_hash": None,
+            "deployment_tx_hash": None,
+            "deployment_status": "queued",
+            **deployment_fields,
             "decimals": 18,
-            "created_at": datetime.datetime.utcnow(),
+            "created_at": now,
+            "updated_at": now,
             "is_active": True,
             "event_id": event_id,
             "event_name": event["name"],
@@ -612,10 +1057,16 @@ async def create_token(event_id: str, token: TokenCreate, current_user: dict = D
         
         # Also store token separately for easier querying
         await db.tokens.insert_one(token_data.copy())
+        await token_inventory.initialize(token_data)
+        invalidate_public_events_cache()
+        
+        # Hand the contract deployment to the background workers
+        if deployment_queue:
+            await deployment_queue.enqueue(token_data["id"])
         
         return {
             "token": token_data,
-            "message": f"Token created successfully! Contract {'deployed' if deployment_status == 'deployed' else 'created'} at {contract_address}"
+            "message": "Token created successfully! Contract deployment queued"
         }
     except HTTPException:
         raise
@@ -635,31 +1086,74 @@ async def get_token_info(token_address: str):
         token.pop("_id", None)
         
         # If we have a real contract and contract manager, get live data
+        # (served from the token info cache; no per-request connectivity probe)
         if (contract_manager and 
-            contract_manager.is_connected() and 
-            token.get("deployment_status") == "deployed" and 
-            token.get("contract_abi")):
+            token.get("deployment_status") == "deployed"):
             
             try:
-                live_info = await contract_manager.get_token_info(
-                    token_address, 
-                    token["contract_abi"]
-                )
+                live_info = await token_info_cache.get(token_address, contract_manager.get_tokens_info)
                 if live_info:
                     token.update(live_info)
             except Exception as e:
                 print(f"Failed to get live token info: {e}")
         
+        # Single-token detail still returns the full ABI, resolved from the
+        # interned registry (documents written before the ABI store embed it)
+        if token.get("contract_abi_hash") and "contract_abi" not in token:
+            token["contract_abi"] = await abi_registry.get(token["contract_abi_hash"])
+        
         return {"token": token}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get token info: {str(e)}")
 
+@app.get("/api/abis/{abi_hash}")
+async def get_abi(abi_hash: str):
+    """Get a contract ABI by content hash (immutable, so clients may cache it forever)"""
+    abi = await abi_registry.get(abi_hash)
+    if abi is None:
+        raise HTTPException(status_code=404, detail="ABI not found")
+    return JSONResponse(
+        content={"abi_hash": abi_hash, "abi": abi},
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
+@app.get("/api/tokens/{token_id}/deployment")
+async def get_token_deployment(token_id: str, wait: float = 0):
+    """Get contract deployment status; `wait` long-polls up to that many seconds for a change"""
+    try:
+        projection = {
+            "_id": 0, "id": 1, "contract_address": 1, "deployment_status": 1,
+            "deployment_tx_hash": 1, "deployment_error": 1, "deployed_at": 1
+        }
+        token = await db.tokens.find_one({"id": token_id}, projection)
+        if not token:
+            raise HTTPException(status_code=404, detail="Token not found")
+        
+        deadline = asyncio.get_event_loop().time() + min(max(wait, 0), 60)
+        initial_status = token.get("deployment_status")
+        while initial_status in ACTIVE_STATUSES and token.get("deployment_status") == initial_status:
+            remaining = deadline - asyncio.get_event_loop().time()
+            if remaining <= 0:
+                break
+            # Another worker may own the job, so re-read at least once a second
+            if deployment_queue:
+                await deployment_queue.wait_for_change(token_id, timeout=min(remaining, 1.0))
+            else:
+                await asyncio.sleep(min(remaining, 1.0))
+            token = await db.tokens.find_one({"id": token_id}, projection)
+        
+        return {"deployment": token}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get token deployment: {str(e)}")
+
 # Add endpoint to get all tokens for MetaMask integration
 @app.get("/api/tokens")
-async def get_all_tokens():
-    """Get all tokens for MetaMask integration"""
+async def get_all_tokens(live: bool = False):
+    """Get all tokens for MetaMask integration; `live=true` adds on-chain data in one batched read"""
     try:
         tokens = []
         async for token in db.tokens.find({"is_active": True}):
@@ -676,6 +1170,14 @@ async def get_all_tokens():
             }
             tokens.append(token_info)
         
+        if live and contract_manager:
+            deployed = [t["address"] for t in tokens if t["deployment_status"] == "deployed"]
+            if deployed:
+                live_infos = await token_info_cache.get_many(deployed, contract_manager.get_tokens_info)
+                for token_info in tokens:
+                    if token_info["address"] in live_infos:
+                        token_info["live"] = live_infos[token_info["address"]]
+        
         return {"tokens": tokens}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get tokens: {str(e)}")
@@ -710,9 +1212,34 @@ async def add_cashier(event_id: str, cashier_data: dict, current_user: dict = De
         raise HTTPException(status_code=500, detail=f"Failed to add cashier: {str(e)}")
 
 @app.post("/api/purchase/online")
-async def purchase_tokens_online(purchase: TokenPurchaseOnline, current_user: dict = Depends(get_current_user)):
-    """Purchase tokens online with cryptocurrency"""
+async def purchase_tokens_online(
+    purchase: TokenPurchaseOnline,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Purchase tokens online with cryptocurrency; retries with the same Idempotency-Key replay the first result"""
+    return await idempotency_store.run(
+        "purchase_online", current_user["id"], idempotency_key, purchase,
+        lambda: _purchase_tokens_online(purchase, current_user)
+    )
+
+async def reserve_inventory(token_address: str, amount: int):
+    """Reserve token supply for a sale, or raise 404/409 (also 409 while the token is deploying)"""
     try:
+        reserved = await token_inventory.reserve(token_address, amount)
+    except UnknownTokenError:
+        raise HTTPException(status_code=404, detail="Token not found")
+    except TokenDeploymentFailedError:
+        raise HTTPException(status_code=409, detail="Token contract deployment failed; sales are closed")
+    except TokenNotReadyError:
+        raise HTTPException(status_code=409, detail="Token contract is still being deployed; try again shortly")
+    if not reserved:
+        raise HTTPException(status_code=409, detail="Not enough tokens left for this sale")
+
+async def _purchase_tokens_online(purchase: TokenPurchaseOnline, current_user: dict):
+    try:
+        await reserve_inventory(purchase.token_address, purchase.amount)
+        
         # For MVP, simulate online crypto purchase
         purchase_data = {
             "id": str(uuid.uuid4()),
@@ -728,25 +1255,44 @@ async def purchase_tokens_online(purchase: TokenPurchaseOnline, current_user: di
         }
         
         # Save purchase record
-        await db.purchases.insert_one(purchase_data)
+        try:
+            await db.purchases.insert_one(purchase_data)
+        except Exception:
+            await token_inventory.release(purchase.token_address, purchase.amount)
+            raise
+        await apply_balance_deltas(db, [(purchase_data["user_wallet"], purchase.token_address, purchase.amount)])
         
         purchase_data.pop("_id", None)
         return {
             "purchase": purchase_data,
             "message": "Tokens purchased successfully with cryptocurrency"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to purchase tokens: {str(e)}")
 
 @app.post("/api/transfer/offline")
-async def transfer_tokens_offline(transfer: TokenTransferOffline, current_user: dict = Depends(get_current_user)):
-    """Transfer tokens offline (admin mode for presentations)"""
+async def transfer_tokens_offline(
+    transfer: TokenTransferOffline,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Transfer tokens offline (admin mode for presentations); retries with the same Idempotency-Key replay the first result"""
+    return await idempotency_store.run(
+        "transfer_offline", current_user["id"], idempotency_key, transfer,
+        lambda: _transfer_tokens_offline(transfer, current_user)
+    )
+
+async def _transfer_tokens_offline(transfer: TokenTransferOffline, current_user: dict):
     try:
         # Find target user
         target_user = await db.users.find_one({"email": transfer.user_email})
         if not target_user:
             raise HTTPException(status_code=404, detail=f"Usuário com email {transfer.user_email} não encontrado")
         
+        await reserve_inventory(transfer.token_address, transfer.amount)
+        
         # Admin mode - anyone can transfer for demo purposes
         transfer_data = {
             "id": str(uuid.uuid4()),
@@ -764,9 +1310,6 @@ async def transfer_tokens_offline(transfer: TokenTransferOffline, current_user:
             "tx_hash": f"0x{'admin' * 12}{uuid.uuid4().hex[:14]}"  # Admin transaction hash
         }
         
-        # Save transfer record
-        await db.offline_transfers.insert_one(transfer_data)
-        
         # Also save as purchase for user
         purchase_data = {
             "id": str(uuid.uuid4()),
@@ -780,7 +1323,13 @@ async def transfer_tokens_offline(transfer: TokenTransferOffline, current_user:
             "status": "completed",
             "tx_hash": transfer_data["tx_hash"]
         }
-        await db.purchases.insert_one(purchase_data)
+        try:
+            await db.offline_transfers.insert_one(transfer_data)
+            await db.purchases.insert_one(purchase_data)
+        except Exception:
+            await token_inventory.release(transfer.token_address, transfer.amount)
+            raise
+        await apply_balance_deltas(db, [(target_user["wallet_address"], transfer.token_address, transfer.amount)])
         
         transfer_data.pop("_id", None)
         return {
@@ -792,10 +1341,206 @@ async def transfer_tokens_offline(transfer: TokenTransferOffline, current_user:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Falha na transferência: {str(e)}")
 
+async def _insert_many_unordered(collection, documents: list) -> set:
+    """insert_many(ordered=False); returns the indexes of documents that failed"""
+    if not documents:
+        return set()
+    try:
+        await collection.insert_many(documents, ordered=False)
+        return set()
+    except BulkWriteError as e:
+        return {error["index"] for error in e.details.get("writeErrors", [])}
+
+@app.post("/api/transfer/offline/batch")
+async def transfer_tokens_offline_batch(
+    batch: TokenTransferOfflineBatch,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Transfer tokens offline to many users at once (cashier queues); returns one result per item
+
+    Retries with the same Idempotency-Key replay the first batch's per-item
+    results, so a cashier queue resent after a timeout is not applied twice.
+    """
+    return await idempotency_store.run(
+        "transfer_offline_batch", current_user["id"], idempotency_key, batch,
+        lambda: _transfer_tokens_offline_batch(batch, current_user)
+    )
+
+async def _transfer_tokens_offline_batch(batch: TokenTransferOfflineBatch, current_user: dict):
+    try:
+        # Resolve every recipient with a single query
+        emails = list({item.user_email for item in batch.transfers})
+        users_by_email = {}
+        async for user in db.users.find(
+            {"email": {"$in": emails}},
+            {"_id": 0, "id": 1, "name": 1, "email": 1, "wallet_address": 1}
+        ):
+            users_by_email[user["email"]] = user
+        
+        # Reserve supply for every item concurrently; items that cannot be
+        # reserved fail on their own
+        async def reserve_item(item):
+            if item.user_email not in users_by_email:
+                return f"Usuário com email {item.user_email} não encontrado"
+            try:
+                await reserve_inventory(item.token_address, item.amount)
+            except HTTPException as e:
+                return e.detail
+            return None
+        
+        reservation_errors = await asyncio.gather(*[reserve_item(item) for item in batch.transfers])
+        
+        now = datetime.datetime.utcnow()
+        results = [None] * len(batch.transfers)
+        positions = []
+        transfer_docs = []
+        purchase_docs = []
+        for index, item in enumerate(batch.transfers):
+            if reservation_errors[index]:
+                results[index] = {
+                    "index": index,
+                    "status": "failed",
+                    "error": reservation_errors[index]
+                }
+                continue
+            
+            target_user = users_by_email[item.user_email]
+            tx_hash = f"0x{'admin' * 12}{uuid.uuid4().hex[:14]}"  # Admin transaction hash
+            positions.append(index)
+            transfer_docs.append({
+                "id": str(uuid.uuid4()),
+                "from_cashier_id": current_user["id"],
+                "from_cashier_name": current_user["name"],
+                "to_user_id": target_user["id"],
+                "to_user_email": target_user["email"],
+                "to_wallet": target_user["wallet_address"],
+                "token_address": item.token_address,
+                "amount": item.amount,
+                "transfer_type": "offline_admin",
+                "cashier_station": item.cashier_id,
+                "timestamp": now,
+                "status": "completed",
+                "tx_hash": tx_hash
+            })
+            purchase_docs.append({
+                "id": str(uuid.uuid4()),
+                "user_id": target_user["id"],
+                "user_wallet": target_user["wallet_address"],
+                "token_address": item.token_address,
+                "amount": item.amount,
+                "payment_method": "offline_admin",
+                "payment_type": "offline",
+                "timestamp": now,
+                "status": "completed",
+                "tx_hash": tx_hash
+            })
+        
+        failed_transfers = await _insert_many_unordered(db.offline_transfers, transfer_docs)
+        written = [i for i in range(len(transfer_docs)) if i not in failed_transfers]
+        failed_purchases = {written[i] for i in await _insert_many_unordered(db.purchases, [purchase_docs[i] for i in written])}
+        
+        # Only purchases that were written move balances (the ledger is reconciled
+        # from purchases); same (wallet, token) pairs are summed into one upsert
+        deltas = {}
+        for i, transfer_data in enumerate(transfer_docs):
+            transfer_data.pop("_id", None)
+            if i in failed_transfers or i in failed_purchases:
+                await token_inventory.release(transfer_data["token_address"], transfer_data["amount"])
+                results[positions[i]] = {
+                    "index": positions[i],
+                    "status": "failed",
+                    "error": "Falha ao registrar a transferência"
+                }
+                continue
+            key = (transfer_data["to_wallet"], transfer_data["token_address"])
+            deltas[key] = deltas.get(key, 0) + transfer_data["amount"]
+            results[positions[i]] = {"index": positions[i], "status": "completed", "transfer": transfer_data}
+        await apply_balance_deltas(db, [(wallet, token, amount) for (wallet, token), amount in deltas.items()])
+        
+        completed = sum(1 for result in results if result["status"] == "completed")
+        return {
+            "results": results,
+            "completed": completed,
+            "failed": len(results) - completed,
+            "message": f"✅ {completed}/{len(results)} transfers completed"
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Falha na transferência em lote: {str(e)}")
+
+@app.post("/api/cashier/sync")
+async def sync_cashier_station(sync: CashierSyncRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Upload a cashier station's journal of offline sales and fetch changes
+
+    Entries are applied idempotently (re-uploading a journal is safe); the
+    response carries per-entry status, the sequence up to which the station
+    may drop its journal, and token/balance changes since `checkpoint`.
+    """
+    try:
+        checkpoint = decode_page_cursor(sync.checkpoint) if sync.checkpoint else {}
+        
+        event = await db.events.find_one({"id": sync.event_id}, {"_id": 0, "id": 1})
+        if not event:
+            raise HTTPException(status_code=404, detail="Event not found")
+        if not await register_station(db, sync.station_id, sync.event_id, current_user):
+            raise HTTPException(status_code=403, detail="Station is registered to another cashier or event")
+        
+        entries = [entry.model_dump() for entry in sync.entries]
+        duplicates = await record_journal_entries(db, sync.station_id, current_user, entries)
+        applied = await apply_pending_entries(db, sync.station_id, sync.event_id, inventory=token_inventory)
+        
+        statuses = await load_entry_results(db, sync.station_id, [entry["client_id"] for entry in entries])
+        results = []
+        for entry in entries:
+            status_info = statuses.get(entry["client_id"], {})
+            results.append({
+                "client_id": entry["client_id"],
+                "sequence": status_info.get("sequence", entry["sequence"]),
+                "status": status_info.get("status", "pending"),
+                "error": status_info.get("error"),
+                "duplicate": entry["client_id"] in duplicates
+            })
+        
+        try:
+            delta = await load_sync_delta(db, sync.event_id, checkpoint, CASHIER_SYNC_DELTA_LIMIT)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid sync checkpoint")
+        
+        return {
+            "results": results,
+            "applied": applied,
+            "acknowledged_sequence": await advance_acknowledged_sequence(db, sync.station_id),
+            "tokens": delta["tokens"],
+            "balances": delta["balances"],
+            "has_more": delta["has_more"],
+            "checkpoint": encode_page_cursor(delta["checkpoint"])
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Falha na sincronização do caixa: {str(e)}")
+
 @app.post("/api/transfer")
-async def transfer_tokens(transfer: TokenTransfer, current_user: dict = Depends(get_current_user)):
-    """Transfer tokens to another address (payment)"""
+async def transfer_tokens(
+    transfer: TokenTransfer,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Transfer tokens to another address (payment); retries with the same Idempotency-Key replay the first result"""
+    return await idempotency_store.run(
+        "transfer", current_user["id"], idempotency_key, transfer,
+        lambda: _transfer_tokens(transfer, current_user)
+    )
+
+async def _transfer_tokens(transfer: TokenTransfer, current_user: dict):
     try:
+        # Debit only if the sender holds enough, so concurrent transfers
+        # cannot overdraw the ledger
+        if not await debit_balance(db, current_user["wallet_address"], transfer.token_address, transfer.amount):
+            raise HTTPException(status_code=400, detail="Insufficient token balance")
+        
         transfer_data = {
             "id": str(uuid.uuid4()),
             "from_user_id": current_user["id"],
@@ -809,42 +1554,117 @@ async def transfer_tokens(transfer: TokenTransfer, current_user: dict = Depends(
         }
         
         # Save transfer record
-        await db.transfers.insert_one(transfer_data)
+        try:
+            await db.transfers.insert_one(transfer_data)
+        except Exception:
+            await apply_balance_deltas(db, [(current_user["wallet_address"], transfer.token_address, transfer.amount)])
+            raise
+        await apply_balance_deltas(db, [(transfer.to_address, transfer.token_address, transfer.amount)])
         
         transfer_data.pop("_id", None)
         return {
             "transfer": transfer_data,
             "message": "Tokens transferred successfully"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to transfer tokens: {str(e)}")
 
+TRANSACTIONS_DEFAULT_LIMIT = 50
+TRANSACTIONS_MAX_LIMIT = 200
+
+async def _next_or_none(cursor):
+    try:
+        return await cursor.__anext__()
+    except StopAsyncIteration:
+        return None
+
 @app.get("/api/transactions")
-async def get_user_transactions(current_user: dict = Depends(get_current_user)):
-    """Get user transaction history"""
-    try:
-        # Get purchases
-        purchases = []
-        async for purchase in db.purchases.find({"user_id": current_user["id"]}).sort("timestamp", -1):
-            purchase.pop("_id", None)
-            purchase["type"] = "purchase"
-            purchases.append(purchase)
-        
-        # Get transfers
-        transfers = []
-        async for transfer in db.transfers.find({"from_user_id": current_user["id"]}).sort("timestamp", -1):
-            transfer.pop("_id", None)
-            transfer["type"] = "transfer"
-            transfers.append(transfer)
-        
-        # Combine and sort by timestamp
-        all_transactions = purchases + transfers
-        all_transactions.sort(key=lambda x: x["timestamp"], reverse=True)
-        
-        return {"transactions": all_transactions}
+async def get_user_transactions(
+    limit: int = TRANSACTIONS_DEFAULT_LIMIT,
+    before: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get one page of user transaction history, newest first; pass `next_cursor` as `before` for the next page"""
+    try:
+        limit = max(1, min(limit, TRANSACTIONS_MAX_LIMIT))
+        
+        page_filter = {}
+        if before:
+            position = decode_page_cursor(before, required=("ts", "id"), timestamps=("ts",))
+            before_ts = position["ts"]
+            before_id = str(position["id"])
+            page_filter = {"$or": [
+                {"timestamp": {"$lt": before_ts}},
+                {"timestamp": before_ts, "id": {"$lt": before_id}}
+            ]}
+        
+        # Both cursors walk the (owner, timestamp, id) indexes in the same
+        # order, so a two-way merge only ever materializes one page
+        sort = [("timestamp", -1), ("id", -1)]
+        sources = [
+            ("purchase", db.purchases.find({"user_id": current_user["id"], **page_filter}, {"_id": 0}).sort(sort).limit(limit + 1)),
+            ("transfer", db.transfers.find({"from_user_id": current_user["id"], **page_filter}, {"_id": 0}).sort(sort).limit(limit + 1)),
+        ]
+        heads = [await _next_or_none(cursor) for _, cursor in sources]
+        
+        transactions = []
+        has_more = False
+        while any(head is not None for head in heads):
+            index = max(
+                (i for i, head in enumerate(heads) if head is not None),
+                key=lambda i: (heads[i]["timestamp"], heads[i]["id"])
+            )
+            if len(transactions) == limit:
+                has_more = True
+                break
+            tx = heads[index]
+            tx["type"] = sources[index][0]
+            transactions.append(tx)
+            heads[index] = await _next_or_none(sources[index][1])
+        
+        for _, cursor in sources:
+            await cursor.close()
+        
+        return {
+            "transactions": transactions,
+            "next_cursor": encode_page_cursor({
+                "ts": transactions[-1]["timestamp"].isoformat(),
+                "id": transactions[-1]["id"]
+            }) if has_more else None
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get transactions: {str(e)}")
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """In-process cache and worker counters for monitoring"""
+    metrics = {
+        "token_info_cache": token_info_cache.stats()
+    }
+    if deployment_queue:
+        metrics["deployment_queue"] = deployment_queue.stats()
+    metrics["public_events_cache"] = public_events_cache.stats()
+    metrics["abi_registry"] = abi_registry.stats()
+    metrics["crypto_executor"] = crypto_executor.stats()
+    metrics["idempotency"] = idempotency_store.stats()
+    metrics["inventory"] = token_inventory.stats()
+    metrics["jwt_payload_cache"] = jwt_payload_cache.stats()
+    metrics["current_user_cache"] = current_user_cache.stats()
+    if wallet_pool:
+        metrics["wallet_pool"] = wallet_pool.stats()
+    if transfer_indexer:
+        metrics["transfer_indexer"] = transfer_indexer.stats()
+    if contract_manager:
+        metrics["batch_reader"] = contract_manager.batch_reader.stats()
+        metrics["contract_registry"] = contract_manager.contracts.stats()
+        metrics["gas_oracle"] = contract_manager.gas_oracle.stats()
+        metrics["receipt_watcher"] = contract_manager.receipt_watcher.stats()
+    return metrics
+
 @app.get("/api/generate-qr/{vendor_address}")
 async def generate_vendor_qr(vendor_address: str):
     """Generate QR code data for vendor"""
@@ -0,0 +1,181 @@
+"""
+Pre-generated Custodial Wallet Pool for BanKa
+Keeps a stock of keypairs, encrypted at rest in the `wallet_pool`
+collection, so registration bursts pop a ready wallet instead of running
+key generation inline. Refills happen in a process pool off the event loop.
+
+Private keys are encrypted with WALLET_POOL_ENCRYPTION_KEY, a Fernet key
+generated with:
+    python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
+"""
+
+import os
+import uuid
+import asyncio
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from cryptography.fernet import Fernet
+from eth_account import Account
+from pymongo.errors import DuplicateKeyError
+
+# `wallet_pool_locks` document held by the worker that is refilling
+REFILL_LOCK_ID = "refill"
+
+
+def generate_keypairs(count: int) -> List[Tuple[str, str]]:
+    """Create `count` fresh accounts; runs inside the refill process pool"""
+    accounts = [Account.create() for _ in range(count)]
+    return [(account.address, account.key.hex()) for account in accounts]
+
+
+class WalletPool:
+    def __init__(
+        self,
+        db,
+        encryption_key: bytes,
+        target_size: int = 200,
+        low_watermark: int = 50,
+        batch_size: int = 50,
+        processes: int = 1,
+        refill_lease_seconds: float = 300.0
+    ):
+        """
+        Initialize Wallet Pool
+
+        Args:
+            db: Motor database holding the `wallet_pool` collection
+            encryption_key: Fernet key protecting private keys at rest
+            target_size: Number of wallets to keep in stock
+            low_watermark: Depth below which a refill is triggered
+            batch_size: Wallets generated per process pool task
+            processes: Size of the key generation process pool
+            refill_lease_seconds: How long one worker's refill excludes the
+                others (until it finishes or its lease runs out)
+        """
+        self.db = db
+        self.fernet = Fernet(encryption_key)
+        self.target_size = target_size
+        self.low_watermark = min(low_watermark, target_size)
+        self.batch_size = batch_size
+        self.processes = processes
+        self.refill_lease_seconds = refill_lease_seconds
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._refill_needed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.depth = 0
+        self.hits = 0
+        self.fallbacks = 0
+        self.generated = 0
+
+    async def start(self):
+        # Spawned (not forked) workers: the parent has Mongo and event loop threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        self._refill_needed.set()
+        self._task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def pop(self) -> Optional[Dict[str, Any]]:
+        """Take one pre-generated wallet, or None when the pool is empty"""
+        document = await self.db.wallet_pool.find_one_and_delete({})
+        if document is None:
+            self.fallbacks += 1
+            self._refill_needed.set()
+            return None
+
+        self.hits += 1
+        self.depth = max(0, self.depth - 1)
+        if self.depth < self.low_watermark:
+            self._refill_needed.set()
+        return {
+            "address": document["address"],
+            "private_key": self.fernet.decrypt(document["encrypted_key"].encode()).decode(),
+            "mnemonic": None
+        }
+
+    async def _refill_loop(self):
+        while True:
+            await self._refill_needed.wait()
+            self._refill_needed.clear()
+            try:
+                await self._refill()
+            except Exception as e:
+                print(f"Wallet pool refill failed: {e}")
+                await asyncio.sleep(5)
+                self._refill_needed.set()
+
+    async def _refill(self):
+        # Only one worker tops the pool up at a time; counting and inserting
+        # without the lock would let every worker add the same shortfall
+        if not await self._acquire_refill_lock():
+            self.depth = await self.db.wallet_pool.count_documents({})
+            return
+        try:
+            await self._refill_locked()
+        finally:
+            await self.db.wallet_pool_locks.delete_one({"_id": REFILL_LOCK_ID, "owner": self.worker_id})
+
+    async def _acquire_refill_lock(self) -> bool:
+        now = datetime.datetime.utcnow()
+        try:
+            await self.db.wallet_pool_locks.update_one(
+                {"_id": REFILL_LOCK_ID, "locked_until": {"$lt": now}},
+                {"$set": {
+                    "owner": self.worker_id,
+                    "locked_until": now + datetime.timedelta(seconds=self.refill_lease_seconds)
+                }},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # Held by another worker whose lease has not run out
+            return False
+
+    async def _refill_locked(self):
+        self.depth = await self.db.wallet_pool.count_documents({})
+        missing = self.target_size - self.depth
+        if missing <= 0:
+            return
+
+        loop = asyncio.get_running_loop()
+        batches = [min(self.batch_size, missing - start) for start in range(0, missing, self.batch_size)]
+        results = await asyncio.gather(*[
+            loop.run_in_executor(self._executor, generate_keypairs, count) for count in batches
+        ])
+
+        now = datetime.datetime.utcnow()
+        documents = [
+            {
+                "address": address,
+                "encrypted_key": self.fernet.encrypt(private_key.encode()).decode(),
+                "created_at": now
+            }
+            for keypairs in results
+            for address, private_key in keypairs
+        ]
+        if documents:
+            await self.db.wallet_pool.insert_many(documents, ordered=False)
+            self.generated += len(documents)
+            self.depth += len(documents)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "target_size": self.target_size,
+            "low_watermark": self.low_watermark,
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+            "generated": self.generated
+        }
@@ -116,6 +116,7 @@ deploy_application() {
         -e WALLET_MNEMONIC="flee cluster north scissors random attitude mutual strategy excuse debris consider uniform" \
         -e EVENT_FACTORY_ADDRESS="0xB03c97E3357f1D4D33E421164a5205E36bACD779" \
         -e JWT_SECRET="$(openssl rand -base64 32)" \
+        -e WALLET_POOL_ENCRYPTION_KEY="${WALLET_POOL_ENCRYPTION_KEY:?set WALLET_POOL_ENCRYPTION_KEY to a Fernet key}" \
         ${IMAGE_NAME}:latest
     
     echo -e "${GREEN}✅ BanKa MVP deployed successfully${NC}"
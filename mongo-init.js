@@ -14,24 +14,28 @@ db.events.createIndex({ "id": 1 }, { unique: true });
 db.events.createIndex({ "organizer_id": 1 });
 db.events.createIndex({ "date": 1 });
 db.events.createIndex({ "is_active": 1 });
+db.events.createIndex({ "is_active": 1, "date": 1, "id": 1 });
 
 db.createCollection('tokens');
 db.tokens.createIndex({ "id": 1 }, { unique: true });
 db.tokens.createIndex({ "contract_address": 1 }, { unique: true });
 db.tokens.createIndex({ "event_id": 1 });
 db.tokens.createIndex({ "is_active": 1 });
+db.tokens.createIndex({ "deployment_status": 1 });
 
 db.createCollection('purchases');
 db.purchases.createIndex({ "id": 1 }, { unique: true });
 db.purchases.createIndex({ "user_id": 1 });
 db.purchases.createIndex({ "token_address": 1 });
 db.purchases.createIndex({ "timestamp": 1 });
+db.purchases.createIndex({ "user_id": 1, "timestamp": -1, "id": -1 });
 
 db.createCollection('transfers');
 db.transfers.createIndex({ "id": 1 }, { unique: true });
 db.transfers.createIndex({ "from_user_id": 1 });
 db.transfers.createIndex({ "to_address": 1 });
 db.transfers.createIndex({ "timestamp": 1 });
+db.transfers.createIndex({ "from_user_id": 1, "timestamp": -1, "id": -1 });
 
 db.createCollection('offline_transfers');
 db.offline_transfers.createIndex({ "id": 1 }, { unique: true });
@@ -39,4 +43,37 @@ db.offline_transfers.createIndex({ "to_user_id": 1 });
 db.offline_transfers.createIndex({ "from_cashier_id": 1 });
 db.offline_transfers.createIndex({ "timestamp": 1 });
 
+db.createCollection('balances');
+db.balances.createIndex({ "wallet_address": 1, "token_address": 1 }, { unique: true });
+db.balances.createIndex({ "token_address": 1, "updated_at": 1, "_id": 1 });
+
+db.tokens.createIndex({ "event_id": 1, "updated_at": 1 });
+
+db.createCollection('cashier_journal');
+db.cashier_journal.createIndex({ "station_id": 1, "client_id": 1 }, { unique: true });
+db.cashier_journal.createIndex({ "station_id": 1, "applied": 1, "sequence": 1 });
+
+db.createCollection('cashier_stations');
+db.cashier_stations.createIndex({ "station_id": 1 }, { unique: true });
+
+db.createCollection('token_inventory');
+db.token_inventory.createIndex({ "token_id": 1, "shard": 1 }, { unique: true });
+
+db.createCollection('chain_transfers');
+db.chain_transfers.createIndex({ "tx_hash": 1, "log_index": 1 }, { unique: true });
+db.chain_transfers.createIndex({ "block_number": 1 });
+db.chain_transfers.createIndex({ "token_address": 1, "from": 1 });
+db.chain_transfers.createIndex({ "token_address": 1, "to": 1 });
+
+db.createCollection('chain_holdings');
+db.chain_holdings.createIndex({ "token_address": 1, "wallet_address": 1 }, { unique: true });
+db.chain_holdings.createIndex({ "wallet_address": 1 });
+
+db.createCollection('idempotency_keys');
+db.idempotency_keys.createIndex({ "created_at": 1 }, { expireAfterSeconds: 86400 });
+
+db.createCollection('pending_transactions');
+db.pending_transactions.createIndex({ "status": 1 });
+db.pending_transactions.createIndex({ "resolved_at": 1 }, { expireAfterSeconds: 604800 });
+
 print('✅ BanKa database initialized successfully with indexes');
@@ -23,6 +23,7 @@ WALLET_MNEMONIC=${WALLET_MNEMONIC:-flee cluster north scissors random attitude m
 EVENT_FACTORY_ADDRESS=${EVENT_FACTORY_ADDRESS:-0xB03c97E3357f1D4D33E421164a5205E36bACD779}
 MONGO_URL=${MONGO_URL:-mongodb://localhost:27017}
 JWT_SECRET=${JWT_SECRET:-$(openssl rand -base64 32)}
+WALLET_POOL_ENCRYPTION_KEY=${WALLET_POOL_ENCRYPTION_KEY}
 EOF
 fi
 
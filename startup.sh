@@ -19,6 +19,7 @@ WALLET_MNEMONIC=flee cluster north scissors random attitude mutual strategy excu
 EVENT_FACTORY_ADDRESS=0xB03c97E3357f1D4D33E421164a5205E36bACD779
 MONGO_URL=mongodb://localhost:27017
 JWT_SECRET=banka-secret-key-2024-production
+WALLET_POOL_SIZE=0
 EOF
 fi
 
@@ -0,0 +1,67 @@
+"""Minimal JSON-RPC over HTTP server for tests that go through real providers"""
+
+import asyncio
+import json
+
+
+class RpcError(Exception):
+    """Answered as a JSON-RPC error object for that request"""
+
+
+class FakeRpcServer:
+    def __init__(self, handler, delay: float = 0.0, accept_batches: bool = True):
+        """
+        Args:
+            handler: handler(method, params) -> result; raise RpcError for an error response
+            delay: Seconds to wait before answering each HTTP request
+            accept_batches: Answer batch requests with HTTP 400 when False
+        """
+        self.handler = handler
+        self.delay = delay
+        self.accept_batches = accept_batches
+        # One entry per HTTP request: the batch size, or the method of a single request
+        self.http_requests = []
+        self._server = None
+        self.url = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.url = f"http://127.0.0.1:{self._server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def _answer(self, request):
+        try:
+            return {"jsonrpc": "2.0", "id": request["id"], "result": self.handler(request["method"], request["params"])}
+        except RpcError as e:
+            return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": -32000, "message": str(e)}}
+
+    async def _handle(self, reader, writer):
+        headers = await reader.readuntil(b"\r\n\r\n")
+        length = next(
+            int(line.split(b":", 1)[1]) for line in headers.split(b"\r\n")
+            if line.lower().startswith(b"content-length")
+        )
+        request = json.loads(await reader.readexactly(length))
+        self.http_requests.append(len(request) if isinstance(request, list) else request["method"])
+        await asyncio.sleep(self.delay)
+
+        status = "200 OK"
+        if isinstance(request, list):
+            if self.accept_batches:
+                body = [self._answer(item) for item in request]
+            else:
+                status, body = "400 Bad Request", {"error": "batch requests are not supported"}
+        else:
+            body = self._answer(request)
+
+        payload = json.dumps(body).encode()
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nConnection: close\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+        )
+        await writer.drain()
+        writer.close()
@@ -0,0 +1,55 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from contracts.abi_registry import AbiRegistry, compute_abi_hash, migrate_token_abis
+from contracts.simple_contract_manager import SIMPLE_ERC20_CONTRACT
+
+ABI = SIMPLE_ERC20_CONTRACT["abi"]
+
+
+def legacy_token(index):
+    return {
+        "id": f"token-{index}",
+        "event_id": "event-1",
+        "name": f"Token {index}",
+        "contract_address": "0x" + f"{index + 1:040x}",
+        "deployment_status": "deployed",
+        "contract_abi": ABI
+    }
+
+
+async def legacy_event(db, tokens=5):
+    tokens = [legacy_token(index) for index in range(tokens)]
+    await db.tokens.insert_many([dict(token) for token in tokens])
+    await db.events.insert_one({"id": "event-1", "name": "Festival", "tokens": tokens})
+
+
+def test_hash_ignores_key_order():
+    reordered = [dict(reversed(list(item.items()))) for item in ABI]
+    assert compute_abi_hash(reordered) == compute_abi_hash(ABI)
+
+
+def test_migration_moves_embedded_abis_into_the_registry():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await legacy_event(db)
+        registry = AbiRegistry(db)
+        stats = await migrate_token_abis(db, registry)
+        again = await migrate_token_abis(db, registry)
+
+        tokens = [token async for token in db.tokens.find({})]
+        event = await db.events.find_one({"id": "event-1"})
+        stored = await AbiRegistry(db).get(compute_abi_hash(ABI))
+        return stats, again, tokens, event, await db.abis.count_documents({}), stored
+
+    stats, again, tokens, event, abi_count, stored = asyncio.run(scenario())
+    abi_hash = compute_abi_hash(ABI)
+    assert stats["tokens_migrated"] == 5 and stats["events_migrated"] == 1
+    assert stats["bytes_after"] < stats["bytes_before"]
+    assert again["tokens_migrated"] == 0 and again["events_migrated"] == 0
+    for token in tokens + event["tokens"]:
+        assert "contract_abi" not in token
+        assert token["contract_abi_hash"] == abi_hash
+    assert abi_count == 1
+    assert stored == ABI
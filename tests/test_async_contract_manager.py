@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+from contracts.simple_contract_manager import ContractManager
+from tests.fake_rpc import FakeRpcServer
+
+# Well-known development key (hardhat account #0); never funded outside dev chains
+DEPLOYER_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+RPC_DELAY = 0.3
+RESULTS = {
+    "web3_clientVersion": "fake/1.0",
+    "eth_blockNumber": "0x64",
+    "eth_chainId": "0x61",
+    "eth_getBalance": hex(5 * 10 ** 18)
+}
+
+
+def test_rpc_calls_do_not_block_the_event_loop():
+    async def scenario():
+        async with FakeRpcServer(lambda method, params: RESULTS[method], delay=RPC_DELAY) as rpc:
+            manager = ContractManager(rpc.url, DEPLOYER_KEY)
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticking = asyncio.create_task(ticker())
+            started = time.monotonic()
+            connected, balances = await asyncio.gather(
+                manager.is_connected(),
+                asyncio.gather(*[manager.w3.eth.get_balance(manager.deployer_account.address) for _ in range(5)])
+            )
+            elapsed = time.monotonic() - started
+            ticking.cancel()
+            await manager.w3.provider.disconnect()
+            return connected, balances, elapsed, ticks
+
+    connected, balances, elapsed, ticks = asyncio.run(scenario())
+    assert connected is True
+    assert balances == [5 * 10 ** 18] * 5
+    # Six slow calls overlap instead of running back to back...
+    assert elapsed < RPC_DELAY * 3
+    # ...and other coroutines keep running while they wait
+    assert ticks >= 10
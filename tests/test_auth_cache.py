@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from cache import TTLCache
+
+USER = {
+    "id": "user-1",
+    "name": "Ana",
+    "email": "ana@example.com",
+    "password": server.hash_password("segredo123"),
+    "wallet_address": "0x" + "a1" * 20,
+    "wallet_private_key": "0xkey",
+    "events_created": ["event-1", "event-2"]
+}
+
+
+class CountingUsers:
+    """db.users that counts the lookups made by get_current_user"""
+
+    def __init__(self, users):
+        self.users = users
+        self.lookups = 0
+
+    async def find_one(self, *args, **kwargs):
+        self.lookups += 1
+        return await self.users.find_one(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.users, name)
+
+
+@pytest.fixture
+def users(monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    asyncio.run(db.users.insert_one(dict(USER)))
+    users = CountingUsers(db.users)
+    monkeypatch.setattr(server, "db", type("Db", (), {"users": users})())
+    monkeypatch.setattr(server, "JWT_SECRET", "test-secret-" + "x" * 32)
+    monkeypatch.setattr(server, "jwt_payload_cache", TTLCache(ttl=60))
+    monkeypatch.setattr(server, "current_user_cache", TTLCache(ttl=60))
+    return users
+
+
+def authenticate(token):
+    return asyncio.run(server.get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)))
+
+
+def test_repeated_requests_hit_the_cache(users):
+    token = server.create_jwt_token(USER)
+    first = authenticate(token)
+    first["name"] = "changed by a route"
+    second = authenticate(token)
+
+    assert users.lookups == 1
+    assert second["name"] == "Ana"
+    assert server.current_user_cache.hits == 1
+
+
+def test_profile_change_is_seen_after_invalidation(users):
+    token = server.create_jwt_token(USER)
+    authenticate(token)
+    # What the login route does when the user switches to an external wallet
+    external = "0x" + "b2" * 20
+    asyncio.run(users.update_one({"id": USER["id"]}, {"$set": {"wallet_address": external, "wallet_type": "external"}}))
+    stale = authenticate(token)
+    server.invalidate_current_user(USER["id"])
+    fresh = authenticate(token)
+
+    assert stale["wallet_address"] == USER["wallet_address"]
+    assert fresh["wallet_address"] == external
+    assert fresh["wallet_type"] == "external"
+    assert users.lookups == 2
+
+
+def test_cached_user_excludes_secrets_and_event_lists(users):
+    user = authenticate(server.create_jwt_token(USER))
+    cached = server.current_user_cache.get(USER["id"])
+
+    for record in (user, cached):
+        assert "wallet_private_key" not in record
+        assert "password" not in record
+        assert "events_created" not in record
+        assert "_id" not in record
+    assert user["wallet_address"] == USER["wallet_address"]
+
+
+def test_invalid_token_is_rejected_without_a_lookup(users):
+    with pytest.raises(server.HTTPException) as error:
+        authenticate("not-a-jwt")
+    assert error.value.status_code == 401
+    assert users.lookups == 0
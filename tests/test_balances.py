@@ -0,0 +1,107 @@
+import asyncio
+import datetime
+
+from mongomock_motor import AsyncMongoMockClient
+
+from balances import apply_balance_deltas, debit_balance, reconcile_balances, migrate_balance_ledger
+
+WALLET = "0x" + "a1" * 20
+OTHER = "0x" + "b2" * 20
+TOKEN = "0x" + "cc" * 20
+
+
+async def balance(db, wallet):
+    row = await db.balances.find_one({"wallet_address": wallet, "token_address": TOKEN})
+    return row["balance"] if row else None
+
+
+def test_debit_refuses_to_overdraw():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await apply_balance_deltas(db, [(WALLET, TOKEN, 10)])
+        results = [await debit_balance(db, WALLET, TOKEN, 4) for _ in range(3)]
+        missing = await debit_balance(db, OTHER, TOKEN, 1)
+        return results, missing, await balance(db, WALLET), await balance(db, OTHER)
+
+    results, missing, remaining, other = asyncio.run(scenario())
+    assert results == [True, True, False]
+    assert missing is False
+    assert remaining == 2
+    assert other is None
+
+
+def test_concurrent_debits_never_go_negative():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await apply_balance_deltas(db, [(WALLET, TOKEN, 25)])
+        results = await asyncio.gather(*[debit_balance(db, WALLET, TOKEN, 3) for _ in range(20)])
+        return sum(results), await balance(db, WALLET)
+
+    succeeded, remaining = asyncio.run(scenario())
+    assert succeeded == 8
+    assert remaining == 1
+
+
+def test_reconcile_repairs_drift_from_history():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await db.purchases.insert_many([
+            {"user_wallet": WALLET, "token_address": TOKEN, "amount": 10},
+            {"user_wallet": WALLET, "token_address": TOKEN, "amount": 5}
+        ])
+        await db.transfers.insert_one({"from_wallet": WALLET, "to_address": OTHER, "token_address": TOKEN, "amount": 4})
+        # The ledger missed the second purchase and the recipient's credit
+        await apply_balance_deltas(db, [(WALLET, TOKEN, 6)])
+        first = await reconcile_balances(db)
+        second = await reconcile_balances(db, dry_run=True)
+        return first, second, await balance(db, WALLET), await balance(db, OTHER)
+
+    first, second, wallet, other = asyncio.run(scenario())
+    assert first == {"rows_checked": 2, "corrections": 2}
+    assert second["corrections"] == 0
+    assert (wallet, other) == (11, 4)
+
+
+def test_users_with_only_pre_ledger_purchases_can_transfer_after_migration():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        # Bought before the ledger existed: history only, no balances rows
+        await db.purchases.insert_one({"user_wallet": WALLET, "token_address": TOKEN, "amount": 7})
+        before = await debit_balance(db, WALLET, TOKEN, 2)
+        ran = await migrate_balance_ledger(db)
+        after = await debit_balance(db, WALLET, TOKEN, 2)
+        # Later starts find the migration done and leave the ledger alone
+        again = await migrate_balance_ledger(db)
+        return before, ran, after, again, await balance(db, WALLET)
+
+    before, ran, after, again, remaining = asyncio.run(scenario())
+    assert before is False
+    assert (ran, after, again) == (True, True, False)
+    assert remaining == 5
+
+
+def test_concurrent_workers_build_the_ledger_once():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await db.purchases.insert_one({"user_wallet": WALLET, "token_address": TOKEN, "amount": 7})
+        ran = await asyncio.gather(*[migrate_balance_ledger(db, poll_interval=0.01) for _ in range(4)])
+        return ran, await db.migrations.find_one({"_id": "balance_ledger"}), await balance(db, WALLET)
+
+    ran, record, wallet = asyncio.run(scenario())
+    assert sorted(ran) == [False, False, False, True]
+    assert record["status"] == "done"
+    assert record["corrections"] == 1
+    assert wallet == 7
+
+
+def test_migration_abandoned_by_a_dead_worker_is_taken_over():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await db.purchases.insert_one({"user_wallet": WALLET, "token_address": TOKEN, "amount": 3})
+        await db.migrations.insert_one({
+            "_id": "balance_ledger", "status": "running",
+            "locked_until": datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+        })
+        return await migrate_balance_ledger(db), await balance(db, WALLET)
+
+    assert asyncio.run(scenario()) == (True, 3)
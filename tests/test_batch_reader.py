@@ -0,0 +1,100 @@
+import asyncio
+
+from web3 import AsyncWeb3
+
+from contracts.batch_reader import BatchReader, MAX_CALLS_PER_REQUEST, MULTICALL3_ADDRESS
+from tests.fake_rpc import FakeRpcServer, RpcError
+
+BROKEN = "0x" + "dd" * 20
+
+
+def eth_call(method, params):
+    """Echo the calldata back, revert for BROKEN and Multicall3 (not deployed here)"""
+    if method == "eth_chainId":
+        return "0x61"
+    assert method == "eth_call"
+    call = params[0]
+    if call["to"].lower() in (BROKEN, MULTICALL3_ADDRESS.lower()):
+        raise RpcError("execution reverted")
+    return call["data"]
+
+
+def token(index):
+    return "0x" + f"{index + 1:040x}"
+
+
+def data_requests(rpc):
+    """HTTP requests carrying eth_call(s), leaving out web3's chain id lookups"""
+    return [request for request in rpc.http_requests if request != "eth_chainId"]
+
+
+async def read(rpc, calls):
+    w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(rpc.url))
+    reader = BatchReader(w3, rpc.url)
+    try:
+        return reader, await reader.call_many(calls)
+    finally:
+        await reader.close()
+        await w3.provider.disconnect()
+
+
+def test_calls_are_chunked_into_batches():
+    calls = [(token(i), i.to_bytes(4, "big")) for i in range(2 * MAX_CALLS_PER_REQUEST + 20)]
+
+    async def scenario():
+        async with FakeRpcServer(eth_call) as rpc:
+            reader, results = await read(rpc, calls)
+            return data_requests(rpc), reader, results
+
+    http_requests, reader, results = asyncio.run(scenario())
+    assert results == [data for _, data in calls]
+    # One failed Multicall3 probe, then one batch per chunk
+    assert http_requests == ["eth_call", MAX_CALLS_PER_REQUEST, MAX_CALLS_PER_REQUEST, 20]
+    assert reader.multicall_available is False
+    assert reader.batch_available is True
+
+
+def test_failed_call_does_not_fail_the_batch():
+    calls = [(token(0), b"\x01"), (BROKEN, b"\x02"), (token(2), b"\x03")]
+
+    async def scenario():
+        async with FakeRpcServer(eth_call) as rpc:
+            return (await read(rpc, calls))[1]
+
+    assert asyncio.run(scenario()) == [b"\x01", None, b"\x03"]
+
+
+def test_falls_back_to_single_calls_when_batches_are_rejected():
+    calls = [(token(0), b"\x01"), (BROKEN, b"\x02"), (token(2), b"\x03")]
+
+    async def scenario():
+        async with FakeRpcServer(eth_call, accept_batches=False) as rpc:
+            reader, first = await read(rpc, calls)
+            return data_requests(rpc), reader, first
+
+    http_requests, reader, results = asyncio.run(scenario())
+    assert results == [b"\x01", None, b"\x03"]
+    # Multicall3 probe, the rejected batch, then one request per call
+    assert http_requests == ["eth_call", 3, "eth_call", "eth_call", "eth_call"]
+    assert reader.batch_available is False
+
+
+def test_rpc_batch_reports_per_request_errors():
+    async def scenario():
+        async with FakeRpcServer(eth_call, accept_batches=False) as rpc:
+            w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(rpc.url))
+            reader = BatchReader(w3, rpc.url)
+            results = await reader.rpc_batch([
+                ("eth_call", [{"to": token(0), "data": "0x01"}, "latest"]),
+                ("eth_call", [{"to": BROKEN, "data": "0x02"}, "latest"])
+            ])
+            # Later batches go straight to single requests
+            await reader.rpc_batch([("eth_call", [{"to": token(0), "data": "0x03"}, "latest"])])
+            await reader.close()
+            await w3.provider.disconnect()
+            return results, data_requests(rpc)
+
+    results, http_requests = asyncio.run(scenario())
+    assert results[0] == "0x01"
+    assert isinstance(results[1], Exception) and "reverted" in str(results[1])
+    assert http_requests == [2, "eth_call", "eth_call", "eth_call"]
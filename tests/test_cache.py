@@ -0,0 +1,136 @@
+import time
+import asyncio
+
+import pytest
+
+from cache import TTLCache, TokenInfoCache
+
+TOKEN = "0x" + "cc" * 20
+INFO = {"name": "Show - Cerveja", "symbol": "CERV", "decimals": 18, "owner": "0x" + "a1" * 20, "totalSupply": 100}
+
+
+class Chain:
+    """Counts reads; each read can be held until `release` is set"""
+
+    def __init__(self, hold=False):
+        self.reads = []
+        self.supply = 100
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        if not hold:
+            self.release.set()
+
+    async def __call__(self, addresses, fields):
+        self.reads.append((tuple(addresses), fields))
+        self.started.set()
+        await self.release.wait()
+        info = {**INFO, "totalSupply": self.supply}
+        return {address: {f: info[f] for f in (fields or info)} for address in addresses}
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    cache.set("d", 4, ttl=0)
+    assert (cache.get("a"), cache.get("b"), cache.get("d")) == (None, None, None)
+    assert cache.evictions == 2
+
+
+def test_only_total_supply_is_read_again_once_it_expires():
+    async def scenario():
+        cache = TokenInfoCache(supply_ttl=0.05)
+        chain = Chain()
+        first = await cache.get(TOKEN, chain)
+        cached = await cache.get(TOKEN, chain)
+        chain.supply = 150
+        await asyncio.sleep(0.06)
+        refreshed = await cache.get(TOKEN, chain)
+        return first, cached, refreshed, chain.reads
+
+    first, cached, refreshed, reads = asyncio.run(scenario())
+    assert first == cached == INFO
+    assert refreshed == {**INFO, "totalSupply": 150}
+    assert reads == [((TOKEN,), None), ((TOKEN,), ["totalSupply"])]
+
+
+def test_invalidate_forces_a_fresh_read():
+    async def scenario():
+        cache = TokenInfoCache()
+        chain = Chain()
+        await cache.get(TOKEN, chain)
+        chain.supply = 500  # minted
+        cache.invalidate(TOKEN)
+        return await cache.get(TOKEN, chain), len(chain.reads)
+
+    info, reads = asyncio.run(scenario())
+    assert info["totalSupply"] == 500
+    assert reads == 2
+
+
+def test_read_that_straddles_an_invalidation_is_not_cached():
+    async def scenario():
+        cache = TokenInfoCache()
+        chain = Chain(hold=True)
+        reading = asyncio.create_task(cache.get(TOKEN, chain))
+        await chain.started.wait()
+        cache.invalidate(TOKEN)
+        chain.release.set()
+        stale = await reading
+        chain.supply = 500
+        return stale, await cache.get(TOKEN, chain), len(chain.reads)
+
+    stale, fresh, reads = asyncio.run(scenario())
+    assert stale["totalSupply"] == 100
+    assert fresh["totalSupply"] == 500
+    assert reads == 2
+
+
+def test_concurrent_misses_share_one_read():
+    async def scenario():
+        cache = TokenInfoCache()
+        chain = Chain()
+        results = await asyncio.gather(*[cache.get(TOKEN, chain) for _ in range(10)])
+        return results, len(chain.reads)
+
+    results, reads = asyncio.run(scenario())
+    assert results == [INFO] * 10
+    assert reads == 1
+
+
+def test_cancelled_leader_does_not_strand_its_followers():
+    async def scenario():
+        cache = TokenInfoCache()
+        chain = Chain(hold=True)
+        leader = asyncio.create_task(cache.get(TOKEN, chain))
+        await chain.started.wait()
+        follower = asyncio.create_task(cache.get(TOKEN, chain))
+        await asyncio.sleep(0)
+        # e.g. the leader's client disconnected
+        leader.cancel()
+        await asyncio.sleep(0)
+        chain.release.set()
+        info = await asyncio.wait_for(follower, timeout=1)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return info, len(chain.reads), cache._inflight
+
+    info, reads, inflight = asyncio.run(scenario())
+    assert info == INFO
+    assert reads == 2
+    assert inflight == {}
+
+
+def test_finished_deployment_invalidates_the_token():
+    import server
+
+    async def scenario():
+        chain = Chain()
+        await server.token_info_cache.get(TOKEN, chain)
+        await server.on_token_deployment_change({"id": "token-1", "contract_address": TOKEN, "deployment_status": "deployed"})
+        await server.token_info_cache.get(TOKEN, chain)
+        return len(chain.reads)
+
+    assert asyncio.run(scenario()) == 2
@@ -0,0 +1,115 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from cashier_sync import record_journal_entries, apply_pending_entries, load_entry_results, advance_acknowledged_sequence
+from inventory import TokenInventory
+
+TOKEN = "0x" + "cc" * 20
+OTHER_EVENT_TOKEN = "0x" + "dd" * 20
+DEPLOYING_TOKEN = "0x" + "ee" * 20
+CASHIER = {"id": "cashier-1", "name": "Caixa 1"}
+ANA = {"id": "user-1", "email": "ana@example.com", "wallet_address": "0x" + "a1" * 20}
+
+
+async def setup():
+    db = AsyncMongoMockClient()["test"]
+    inventory = TokenInventory(db, shards=2)
+    await db.users.insert_one(dict(ANA))
+    for token in [
+        {"id": "token-1", "event_id": "event-1", "contract_address": TOKEN, "initial_supply": 10, "deployment_status": "deployed"},
+        {"id": "token-2", "event_id": "event-2", "contract_address": OTHER_EVENT_TOKEN, "initial_supply": 10, "deployment_status": "deployed"},
+        {"id": "token-3", "event_id": "event-1", "contract_address": DEPLOYING_TOKEN, "initial_supply": 10, "deployment_status": "pending"}
+    ]:
+        await db.tokens.insert_one({**token, "total_sold": 0})
+    return db, inventory
+
+
+def entry(sequence, amount=1, token=TOKEN, email="ana@example.com"):
+    return {"client_id": f"sale-{sequence}", "sequence": sequence, "user_email": email, "token_address": token, "amount": amount}
+
+
+async def sync(db, inventory, entries):
+    await record_journal_entries(db, "station-1", CASHIER, entries)
+    applied = await apply_pending_entries(db, "station-1", "event-1", inventory=inventory)
+    results = await load_entry_results(db, "station-1", [e["client_id"] for e in entries])
+    return applied, {client_id: (result["status"], result.get("error")) for client_id, result in results.items()}
+
+
+async def sold(db, inventory):
+    await inventory.flush()
+    return (await db.tokens.find_one({"id": "token-1"}))["total_sold"]
+
+
+async def balance(db, token=TOKEN):
+    row = await db.balances.find_one({"wallet_address": ANA["wallet_address"], "token_address": token})
+    return row["balance"] if row else 0
+
+
+def test_entries_are_applied_once():
+    async def scenario():
+        db, inventory = await setup()
+        journal = [entry(1, 2), entry(2, 3)]
+        first = await sync(db, inventory, journal)
+        # The station re-uploads the same journal after a lost response
+        second = await sync(db, inventory, journal)
+        return first, second, await db.purchases.count_documents({}), await balance(db), await sold(db, inventory)
+
+    first, second, purchases, ana_balance, total_sold = asyncio.run(scenario())
+    assert first == (2, {"sale-1": ("applied", None), "sale-2": ("applied", None)})
+    assert second[0] == 0
+    assert purchases == 2
+    assert ana_balance == 5
+    assert total_sold == 5
+
+
+def test_sales_of_a_deploying_token_stay_pending_until_it_is_deployed():
+    async def scenario():
+        db, inventory = await setup()
+        journal = [entry(1), entry(2, 4, token=DEPLOYING_TOKEN)]
+        applied, results = await sync(db, inventory, journal)
+        acknowledged = await advance_acknowledged_sequence(db, "station-1")
+        pending = (applied, results, acknowledged, await db.purchases.count_documents({"token_address": DEPLOYING_TOKEN}))
+
+        # Same placeholder address once the deployment finished (mock deployment)
+        await db.tokens.update_one({"id": "token-3"}, {"$set": {"deployment_status": "mock"}})
+        retried = await apply_pending_entries(db, "station-1", "event-1", inventory=inventory)
+        results = await load_entry_results(db, "station-1", ["sale-2"])
+        return pending, retried, results["sale-2"]["status"], await balance(db, DEPLOYING_TOKEN), await advance_acknowledged_sequence(db, "station-1")
+
+    pending, retried, status, deploying_balance, acknowledged = asyncio.run(scenario())
+    applied, results, pending_acknowledged, pending_purchases = pending
+    assert applied == 1
+    assert results["sale-1"] == ("applied", None)
+    assert results["sale-2"][0] == "pending"
+    assert "implantação" in results["sale-2"][1]
+    # The station must keep the pending sale in its journal
+    assert pending_acknowledged == 1
+    assert pending_purchases == 0
+    assert retried == 1
+    assert status == "applied"
+    assert deploying_balance == 4
+    assert acknowledged == 2
+
+
+def test_invalid_entries_are_rejected_without_touching_supply():
+    async def scenario():
+        db, inventory = await setup()
+        applied, results = await sync(db, inventory, [
+            entry(1, 6),
+            entry(2, 5),  # only 4 left
+            entry(3, token=OTHER_EVENT_TOKEN),
+            entry(4, email="nobody@example.com")
+        ])
+        return applied, results, await db.purchases.count_documents({}), await balance(db), await sold(db, inventory)
+
+    applied, results, purchases, ana_balance, total_sold = asyncio.run(scenario())
+    assert applied == 1
+    assert results["sale-1"] == ("applied", None)
+    assert results["sale-2"][0] == "rejected"
+    assert "esgotado" in results["sale-2"][1]
+    assert results["sale-3"] == ("rejected", "Token não pertence a este evento")
+    assert results["sale-4"][0] == "rejected"
+    assert purchases == 1
+    assert ana_balance == 6
+    assert total_sold == 6
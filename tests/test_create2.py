@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from contracts.create2 import create2_address, CREATE2_DEPLOYER_ADDRESS
+from contracts.simple_contract_manager import ContractManager, simple_token_create2_address
+from tests.fake_rpc import FakeRpcServer
+
+# Well-known development key (hardhat account #0); never funded outside dev chains
+DEPLOYER_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+OWNER = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+TX_HASH = "0x" + "5a" * 32
+PROXY_CODE = "0x7fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffe03601600081602082378035828234f58015156039578182fd5b8082525050506014600cf3"
+
+
+@pytest.mark.parametrize("deployer,salt,init_code,expected", [
+    # The examples of EIP-1014
+    ("0x0000000000000000000000000000000000000000", "00" * 32, "00",
+     "0x4D1A2e2bB4F88F0250f26Ffff098B0b30B26BF38"),
+    ("0xdeadbeef00000000000000000000000000000000", "00" * 32, "00",
+     "0xB928f69Bb1D91Cd65274e3c79d8986362984fDA3"),
+    ("0xdeadbeef00000000000000000000000000000000", "000000000000000000000000feed000000000000000000000000000000000000", "00",
+     "0xD04116cDd17beBE565EB2422F2497E06cC1C9833"),
+    ("0x0000000000000000000000000000000000000000", "00" * 32, "deadbeef",
+     "0x70f2b2914A2a4b783FaEFb75f459A580616Fcb5e"),
+    ("0x00000000000000000000000000000000deadbeef", "00000000000000000000000000000000000000000000000000000000cafebabe", "deadbeef",
+     "0x60f3f640a8508fC6a86d45DF051962668E1e8AC7"),
+    ("0x00000000000000000000000000000000deadbeef", "00000000000000000000000000000000000000000000000000000000cafebabe", "deadbeef" * 11,
+     "0x1d8bfDC5D46DC4f61D6b6115972536eBE6A8854C"),
+    ("0x0000000000000000000000000000000000000000", "00" * 32, "",
+     "0xE33C0C7F7df4809055C3ebA6c09CFe4BaF1BD9e0")
+])
+def test_create2_address_matches_eip_1014(deployer, salt, init_code, expected):
+    assert create2_address(bytes.fromhex(salt), bytes.fromhex(init_code), deployer) == expected
+
+
+def test_token_address_depends_on_token_id_and_parameters():
+    address, salt = simple_token_create2_address("token-1", "Show - Cerveja", "CERV", 100, OWNER)
+    assert simple_token_create2_address("token-1", "Show - Cerveja", "CERV", 100, OWNER) == (address, salt)
+    assert simple_token_create2_address("token-2", "Show - Cerveja", "CERV", 100, OWNER)[0] != address
+    assert simple_token_create2_address("token-1", "Show - Cerveja", "CERV", 101, OWNER)[0] != address
+
+
+class FakeChain:
+    """Just enough of a node for one CREATE2 deployment through the proxy"""
+
+    def __init__(self, expected_address, already_deployed=False, receipt_status=1):
+        self.code = {CREATE2_DEPLOYER_ADDRESS.lower(): PROXY_CODE}
+        if already_deployed:
+            self.code[expected_address.lower()] = "0x6080"
+        self.expected_address = expected_address
+        self.receipt_status = receipt_status
+        self.sent = []
+
+    def __call__(self, method, params):
+        if method == "eth_getCode":
+            return self.code.get(params[0].lower(), "0x")
+        if method == "eth_sendRawTransaction":
+            self.sent.append(params[0])
+            if self.receipt_status == 1:
+                self.code[self.expected_address.lower()] = "0x6080"
+            return TX_HASH
+        if method == "eth_getTransactionReceipt":
+            if not self.sent:
+                return None
+            return {
+                "transactionHash": TX_HASH, "status": hex(self.receipt_status), "contractAddress": None,
+                "gasUsed": "0x1e8480", "blockNumber": "0x65", "logs": []
+            }
+        if method == "eth_feeHistory":
+            return {"oldestBlock": "0x64", "baseFeePerGas": ["0x3b9aca00", "0x3b9aca00"], "gasUsedRatio": [0.5], "reward": [["0x1", "0x2", "0x3"]]}
+        return {
+            "eth_chainId": "0x61",
+            "eth_blockNumber": "0x65",
+            "eth_maxPriorityFeePerGas": "0x1",
+            "eth_estimateGas": "0x1e8480",
+            "eth_getTransactionCount": "0x0"
+        }[method]
+
+
+def deploy(already_deployed=False, receipt_status=1):
+    address, salt = simple_token_create2_address("token-1", "Show - Cerveja", "CERV", 100, OWNER)
+
+    async def scenario():
+        chain = FakeChain(address, already_deployed, receipt_status)
+        async with FakeRpcServer(chain) as rpc:
+            manager = ContractManager(rpc.url, DEPLOYER_KEY)
+            submitted = []
+
+            async def on_submitted(tx_hash):
+                submitted.append(tx_hash)
+
+            result = await manager.deploy_create2_token(
+                "Show - Cerveja", "CERV", 100, OWNER, salt, address, on_submitted=on_submitted
+            )
+            await manager.receipt_watcher.stop()
+            await manager.batch_reader.close()
+            await manager.w3.provider.disconnect()
+            return result, chain.sent, submitted
+
+    return address, asyncio.run(scenario())
+
+
+def test_create2_deployment_lands_at_the_precomputed_address():
+    address, (result, sent, submitted) = deploy()
+    assert result["success"] is True
+    assert result["contract_address"] == address
+    assert result["gas_used"] == 2000000
+    assert len(sent) == 1
+    assert submitted == [TX_HASH]
+
+
+def test_create2_deployment_is_skipped_when_the_contract_exists():
+    address, (result, sent, submitted) = deploy(already_deployed=True)
+    assert result["success"] is True
+    assert result["contract_address"] == address
+    assert sent == []
+    assert submitted == []
+
+
+def test_failed_create2_receipt_keeps_the_address_and_reports_revert():
+    address, (result, sent, submitted) = deploy(receipt_status=0)
+    assert result["success"] is False
+    assert result["status"] == "reverted"
+    assert address in result["error"]
+    assert len(sent) == 1
@@ -0,0 +1,84 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from crypto_executor import CryptoExecutor
+
+
+def blocking(seconds, started=None, release=None):
+    if started:
+        started.set()
+    if release:
+        release.wait(5)
+    time.sleep(seconds)
+    return threading.current_thread().name
+
+
+def test_blocking_work_runs_off_the_event_loop():
+    async def scenario():
+        executor = CryptoExecutor(max_workers=1)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        thread = await executor.run(blocking, 0.2)
+        ticking.cancel()
+        executor.shutdown()
+        return thread, ticks
+
+    thread, ticks = asyncio.run(scenario())
+    assert thread.startswith("crypto")
+    # The loop kept running while the call blocked its worker thread
+    assert ticks >= 5
+
+
+def test_stats_track_queued_and_running_calls():
+    async def scenario():
+        executor = CryptoExecutor(max_workers=1)
+        started, release = threading.Event(), threading.Event()
+        first = asyncio.create_task(executor.run(blocking, 0, started, release))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        second = asyncio.create_task(executor.run(blocking, 0))
+        await asyncio.sleep(0.01)
+        busy = executor.stats()
+        release.set()
+        await asyncio.gather(first, second)
+        executor.shutdown()
+        return busy, executor.stats()
+
+    busy, idle = asyncio.run(scenario())
+    assert (busy["running"], busy["queue_depth"]) == (1, 1)
+    assert (idle["running"], idle["queue_depth"], idle["completed"]) == (0, 0, 2)
+    assert idle["max_wait_ms"] > 0
+
+
+def test_shutdown_cancels_queued_calls_without_running_them():
+    async def scenario():
+        executor = CryptoExecutor(max_workers=1)
+        started, release = threading.Event(), threading.Event()
+        ran = []
+        running = asyncio.create_task(executor.run(blocking, 0, started, release))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        queued = asyncio.create_task(executor.run(ran.append, "queued"))
+        await asyncio.sleep(0.01)
+
+        executor.shutdown()
+        release.set()
+        outcomes = await asyncio.gather(running, queued, return_exceptions=True)
+        with pytest.raises(RuntimeError):
+            await executor.run(ran.append, "after shutdown")
+        return outcomes, ran, executor.stats()
+
+    (finished, cancelled), ran, stats = asyncio.run(scenario())
+    # The call already on a thread completes; the queued one never starts
+    assert finished.startswith("crypto")
+    assert isinstance(cancelled, asyncio.CancelledError)
+    assert ran == []
+    assert (stats["queue_depth"], stats["running"], stats["completed"]) == (0, 0, 1)
@@ -0,0 +1,90 @@
+import asyncio
+import datetime
+
+from mongomock_motor import AsyncMongoMockClient
+
+from contracts.deployment_queue import DeploymentQueue
+
+TX_HASH = "0x" + "cd" * 32
+PLACEHOLDER = "0x" + "11" * 20
+
+
+class FakeContractManager:
+    """Broadcasts every deployment and reports whatever `result` holds"""
+
+    def __init__(self, result):
+        self.result = result
+        self.receipt_result = {"success": False, "status": "timeout", "error": "still pending"}
+
+    def get_simple_erc20_contract(self):
+        return {"abi": []}
+
+    async def deploy_simple_token(self, token_name, token_symbol, total_supply, owner_address, on_submitted=None):
+        await on_submitted(TX_HASH)
+        return self.result
+
+    async def get_deployment_receipt(self, tx_hash, timeout=60):
+        return self.receipt_result
+
+
+async def insert_token(db):
+    token = {
+        "id": "token-1",
+        "event_id": "event-1",
+        "full_name": "Festival - Beer",
+        "symbol": "FESTBEER",
+        "initial_supply": 100,
+        "owner_address": "0x" + "22" * 20,
+        "contract_address": PLACEHOLDER,
+        "deployment_tx_hash": None,
+        "deployment_status": "queued",
+        "deployment_method": "standalone"
+    }
+    await db.tokens.insert_one(dict(token))
+    await db.events.insert_one({"id": "event-1", "tokens": [dict(token)]})
+
+
+def test_unmined_deployment_keeps_tx_hash_and_releases_lease():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await insert_token(db)
+        manager = FakeContractManager({
+            "success": False, "status": "timeout", "transaction_hash": TX_HASH, "error": "not mined"
+        })
+        queue = DeploymentQueue(db, manager)
+        await queue._process("token-1")
+        first = await db.tokens.find_one({"id": "token-1"})
+
+        # The next pass resumes waiting on the same transaction
+        manager.receipt_result = {
+            "success": True, "status": "deployed", "contract_address": "0x" + "33" * 20,
+            "gas_used": 1, "block_number": 1
+        }
+        await queue._process("token-1")
+        second = await db.tokens.find_one({"id": "token-1"})
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["deployment_status"] == "pending"
+    assert first["deployment_tx_hash"] == TX_HASH
+    assert first["deployment_lease_until"] is None
+    assert first["contract_address"] == PLACEHOLDER
+    assert second["deployment_status"] == "deployed"
+    assert second["contract_address"] == "0x" + "33" * 20
+
+
+def test_failed_deployment_before_broadcast_falls_back():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await insert_token(db)
+        queue = DeploymentQueue(db, FakeContractManager({
+            "success": False, "status": "fallback", "contract_address": "0x" + "44" * 20,
+            "transaction_hash": None, "abi": [], "error": "insufficient funds"
+        }))
+        await queue._process("token-1")
+        return await db.tokens.find_one({"id": "token-1"})
+
+    token = asyncio.run(scenario())
+    assert token["deployment_status"] == "fallback"
+    assert token["contract_address"] == "0x" + "44" * 20
+
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from contracts.gas_oracle import GasOracle, bytecode_key
+
+GWEI = 10 ** 9
+
+
+class FakeEth:
+    def __init__(self, fee_history=None, max_priority_fee=0, gas_prices=()):
+        self._fee_history = fee_history
+        self._max_priority_fee = max_priority_fee
+        self._gas_prices = list(gas_prices)
+        self.fee_history_calls = 0
+
+    async def fee_history(self, blocks, newest, percentiles):
+        self.fee_history_calls += 1
+        if self._fee_history is None:
+            raise ValueError("the method eth_feeHistory does not exist")
+        return self._fee_history
+
+    @property
+    async def max_priority_fee(self):
+        return self._max_priority_fee
+
+    @property
+    async def gas_price(self):
+        return self._gas_prices.pop(0)
+
+
+class FakeW3:
+    def __init__(self, eth):
+        self.eth = eth
+
+
+def test_eip1559_fees_follow_the_strategy_percentile():
+    history = {
+        "baseFeePerGas": [10 * GWEI, 20 * GWEI],
+        # Per block: the 25th, 50th and 90th percentile priority fees
+        "reward": [[1 * GWEI, 2 * GWEI, 3 * GWEI], [3 * GWEI, 4 * GWEI, 5 * GWEI], [5 * GWEI, 6 * GWEI, 7 * GWEI]]
+    }
+
+    async def scenario():
+        oracle = GasOracle(FakeW3(FakeEth(history, max_priority_fee=3 * GWEI)))
+        return {name: await oracle.fee_params(name) for name in ("slow", "standard", "fast")}
+
+    fees = asyncio.run(scenario())
+    # Median over blocks of each percentile, never under the node's suggestion
+    assert fees["slow"]["maxPriorityFeePerGas"] == 3 * GWEI
+    assert fees["standard"]["maxPriorityFeePerGas"] == 4 * GWEI
+    assert fees["fast"]["maxPriorityFeePerGas"] == 5 * GWEI
+    # Twice the next block's base fee plus the tip
+    assert fees["standard"]["maxFeePerGas"] == 2 * 20 * GWEI + 4 * GWEI
+    assert GasOracle.max_price(fees["fast"]) == 45 * GWEI
+
+
+def test_legacy_gas_prices_when_fee_history_is_unavailable():
+    async def scenario():
+        eth = FakeEth(gas_prices=[5 * GWEI, 3 * GWEI, 3 * GWEI])
+        oracle = GasOracle(FakeW3(eth), max_age=0)
+        first = await oracle.fee_params()
+        # max_age=0: every call samples again
+        second = {name: await oracle.fee_params(name) for name in ("slow", "fast")}
+        return first, second, oracle.snapshot
+
+    first, second, snapshot = asyncio.run(scenario())
+    assert first == {"gasPrice": 5 * GWEI}
+    assert snapshot["eip1559"] is False
+    # "slow" may bid under the node's current price, the others never do
+    assert second["slow"]["gasPrice"] == 3 * GWEI
+    assert second["fast"]["gasPrice"] == 5 * GWEI
+
+
+def test_fee_snapshot_is_reused_until_it_expires():
+    async def scenario():
+        eth = FakeEth({"baseFeePerGas": [GWEI], "reward": [[1, 2, 3]]})
+        oracle = GasOracle(FakeW3(eth), max_age=60)
+        for _ in range(5):
+            await oracle.fee_params()
+        return eth.fee_history_calls
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_gas_estimates_are_cached_per_key_with_margin():
+    async def scenario():
+        oracle = GasOracle(FakeW3(FakeEth()), gas_limit_margin=1.2)
+        calls = []
+
+        async def estimate():
+            calls.append(1)
+            return 100000
+
+        key = bytecode_key("SimpleERC20", "0x6080", ("Show - Cerveja", "CERV"))
+        limits = [await oracle.estimate_gas(key, estimate, fallback=800000) for _ in range(3)]
+        return limits, len(calls), oracle.estimate_hits, oracle.estimate_misses
+
+    limits, calls, hits, misses = asyncio.run(scenario())
+    assert limits == [120000] * 3
+    assert (calls, hits, misses) == (1, 2, 1)
+
+
+def test_failed_estimate_falls_back_without_caching():
+    async def scenario():
+        oracle = GasOracle(FakeW3(FakeEth()))
+        outcomes = iter([ValueError("execution reverted"), 50000])
+
+        async def estimate():
+            outcome = next(outcomes)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        first = await oracle.estimate_gas(("deploy", "x"), estimate, fallback=800000)
+        second = await oracle.estimate_gas(("deploy", "x"), estimate, fallback=800000, margin=1.0)
+        return first, second, oracle.estimate_fallbacks
+
+    assert asyncio.run(scenario()) == (800000, 50000, 1)
+
+
+def test_deployment_keys_bucket_constructor_strings_by_word_count():
+    short = bytecode_key("SimpleERC20", "0x6080", ("Show - Cerveja", "CERV"))
+    assert bytecode_key("SimpleERC20", "0x6080", ("Show - Refrigerante", "REFR")) == short
+    # A name over 31 bytes takes another calldata word and storage slot
+    assert bytecode_key("SimpleERC20", "0x6080", ("Festival de Verão 2026 - Cerveja Artesanal", "CERV")) != short
+    assert bytecode_key("SimpleERC20", "0x6081", ("Show - Cerveja", "CERV")) != short
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        GasOracle(FakeW3(FakeEth()), strategy="instant")
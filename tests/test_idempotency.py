@@ -0,0 +1,114 @@
+import json
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+from idempotency import IdempotencyStore
+
+
+def make_store(db=None):
+    return IdempotencyStore(db or AsyncMongoMockClient()["test"], poll_interval=0.01)
+
+
+class Handler:
+    """Counts calls; raises the queued errors before returning a result"""
+
+    def __init__(self, *errors, delay=0.0):
+        self.calls = 0
+        self.errors = list(errors)
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"purchase": {"id": f"purchase-{self.calls}"}}
+
+
+def test_completed_request_is_replayed():
+    async def scenario():
+        store = make_store()
+        handler = Handler()
+        first = await store.run("purchase", "user-1", "key-1", {"amount": 1}, handler)
+        replay = await store.run("purchase", "user-1", "key-1", {"amount": 1}, handler)
+        return handler.calls, first, replay
+
+    calls, first, replay = asyncio.run(scenario())
+    assert calls == 1
+    assert first == {"purchase": {"id": "purchase-1"}}
+    assert replay.status_code == 200
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.body == b'{"purchase":{"id":"purchase-1"}}'
+
+
+def test_key_reused_with_another_body_is_rejected():
+    async def scenario():
+        store = make_store()
+        await store.run("purchase", "user-1", "key-1", {"amount": 1}, Handler())
+        await store.run("purchase", "user-1", "key-1", {"amount": 2}, Handler())
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario())
+    assert error.value.status_code == 422
+
+
+@pytest.mark.parametrize("shared_store", [True, False])
+def test_concurrent_duplicates_run_the_handler_once(shared_store):
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        # One store per worker process, or both requests in the same one
+        stores = [make_store(db)] * 2 if shared_store else [make_store(db), make_store(db)]
+        handler = Handler(delay=0.05)
+        results = await asyncio.gather(*[
+            store.run("purchase", "user-1", "key-1", {"amount": 1}, handler) for store in stores
+        ])
+        return handler.calls, results
+
+    calls, results = asyncio.run(scenario())
+    assert calls == 1
+    # The request that waited on another worker gets the stored replay
+    bodies = [result if isinstance(result, dict) else json.loads(result.body) for result in results]
+    assert bodies == [{"purchase": {"id": "purchase-1"}}] * 2
+
+
+@pytest.mark.parametrize("status_code,detail", [
+    (409, "Token contract is still being deployed; try again shortly"),
+    (404, "Usuário com email ana@example.com não encontrado"),
+    (500, "Failed to purchase tokens: connection reset")
+])
+def test_transient_errors_release_the_key(status_code, detail):
+    async def scenario():
+        store = make_store()
+        handler = Handler(HTTPException(status_code=status_code, detail=detail))
+        with pytest.raises(HTTPException) as error:
+            await store.run("purchase", "user-1", "key-1", {"amount": 1}, handler)
+        assert error.value.status_code == status_code
+        # The retry runs again once the token is deployed / the user exists
+        result = await store.run("purchase", "user-1", "key-1", {"amount": 1}, handler)
+        return handler.calls, result, await store.db.idempotency_keys.find_one({"_id": "purchase:user-1:key-1"})
+
+    calls, result, record = asyncio.run(scenario())
+    assert calls == 2
+    assert result == {"purchase": {"id": "purchase-2"}}
+    assert record["status"] == "completed"
+
+
+def test_final_rejections_are_replayed():
+    async def scenario():
+        store = make_store()
+        handler = Handler(HTTPException(status_code=400, detail="Insufficient token balance"))
+        errors = []
+        for _ in range(2):
+            try:
+                await store.run("transfer", "user-1", "key-1", {"amount": 5}, handler)
+            except HTTPException as e:
+                errors.append(e)
+        return handler.calls, errors
+
+    calls, errors = asyncio.run(scenario())
+    assert calls == 1
+    assert [e.status_code for e in errors] == [400, 400]
+    assert errors[1].headers == {"Idempotent-Replayed": "true"}
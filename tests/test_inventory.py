@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from inventory import TokenInventory, TokenNotReadyError, TokenDeploymentFailedError, UnknownTokenError
+
+ADDRESS = "0x" + "aa" * 20
+
+
+async def create_token(db, inventory, supply=100, **fields):
+    token = {
+        "id": "token-1",
+        "event_id": "event-1",
+        "contract_address": ADDRESS,
+        "initial_supply": supply,
+        "total_sold": 0,
+        "deployment_status": "deployed",
+        **fields
+    }
+    await db.tokens.insert_one(dict(token))
+    await inventory.initialize(token)
+    return token
+
+
+def test_sales_refused_until_standalone_token_is_deployed():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        inventory = TokenInventory(db, shards=2)
+        await create_token(db, inventory, deployment_status="pending", deployment_method="standalone")
+        with pytest.raises(TokenNotReadyError):
+            await inventory.reserve(ADDRESS, 1)
+
+        await db.tokens.update_one({"id": "token-1"}, {"$set": {"deployment_status": "deployed"}})
+        return await inventory.reserve(ADDRESS, 1)
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_create2_token_sells_while_deploying():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        inventory = TokenInventory(db, shards=2)
+        await create_token(db, inventory, deployment_status="queued", deployment_method="create2")
+        return await inventory.reserve(ADDRESS, 5)
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_create2_token_stops_selling_once_its_deployment_failed():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        inventory = TokenInventory(db, shards=2)
+        await create_token(db, inventory, deployment_status="pending", deployment_method="create2")
+        assert await inventory.reserve(ADDRESS, 1) is True
+
+        # The deployment queue gave up after CREATE2_MAX_ATTEMPTS
+        await db.tokens.update_one({"id": "token-1"}, {"$set": {"deployment_status": "failed"}})
+        await inventory.reserve(ADDRESS, 1)
+
+    with pytest.raises(TokenDeploymentFailedError):
+        asyncio.run(scenario())
+
+
+def test_unknown_token():
+    async def scenario():
+        inventory = TokenInventory(AsyncMongoMockClient()["test"])
+        await inventory.reserve(ADDRESS, 1)
+
+    with pytest.raises(UnknownTokenError):
+        asyncio.run(scenario())
+
+
+async def shard_totals(db):
+    rows = [row async for row in db.token_inventory.find({"token_id": "token-1"})]
+    return sum(row["sold"] for row in rows), rows
+
+
+def test_concurrent_reservations_never_oversell():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        inventory = TokenInventory(db, shards=4)
+        await create_token(db, inventory, supply=50)
+        amounts = [1, 2, 3] * 20
+        results = await asyncio.gather(*[inventory.reserve(ADDRESS, amount) for amount in amounts])
+        sold, rows = await shard_totals(db)
+        return amounts, results, sold, rows
+
+    amounts, results, sold, rows = asyncio.run(scenario())
+    reserved = sum(amount for amount, ok in zip(amounts, results) if ok)
+    assert sold == reserved
+    assert sold <= 50
+    # Supply is exhausted: whatever failed asked for more than was left
+    assert sold >= 50 - max(amounts)
+    assert all(0 <= row["sold"] <= row["capacity"] for row in rows)
+
+
+def test_concurrent_reserve_and_release_keep_counts_exact():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        inventory = TokenInventory(db, shards=4)
+        await create_token(db, inventory, supply=30)
+
+        async def sale(amount, fails):
+            if not await inventory.reserve(ADDRESS, amount):
+                return 0
+            if fails:
+                # The sale could not be recorded: give the supply back
+                await inventory.release(ADDRESS, amount)
+                return 0
+            return amount
+
+        kept = await asyncio.gather(*[sale(1 + index % 3, index % 4 == 0) for index in range(40)])
+        sold, rows = await shard_totals(db)
+        await inventory.flush()
+        token = await db.tokens.find_one({"id": "token-1"})
+        return sum(kept), sold, rows, token
+
+    kept, sold, rows, token = asyncio.run(scenario())
+    assert sold == kept
+    assert sold <= 30
+    assert token["total_sold"] == sold
+    assert all(0 <= row["sold"] <= row["capacity"] for row in rows)
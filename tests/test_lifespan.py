@@ -0,0 +1,81 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from crypto_executor import CryptoExecutor
+
+
+@pytest.fixture
+def app_without_chain(monkeypatch):
+    """The app on a mock database, with every chain client build failing"""
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(server, "db", db)
+    for component in (server.token_inventory, server.idempotency_store, server.abi_registry):
+        monkeypatch.setattr(component, "db", db)
+    monkeypatch.setattr(server, "crypto_executor", CryptoExecutor(max_workers=1))
+    monkeypatch.setattr(server, "WALLET_POOL_SIZE", 0)
+    monkeypatch.setattr(server, "HEALTH_PROBE_INTERVAL", 0.05)
+    monkeypatch.setattr(server, "CHAIN_INIT_MAX_BACKOFF", 0.05)
+    for key, value in (("chain_clients_ready", False), ("chain_init_attempts", 0), ("chain_init_error", None)):
+        monkeypatch.setitem(server.app_state, key, value)
+    monkeypatch.setattr(server, "health_snapshot", {})
+
+    def unreachable_rpc():
+        raise ConnectionError("RPC endpoint unreachable")
+
+    monkeypatch.setattr(server, "build_chain_clients", unreachable_rpc)
+    return db
+
+
+def wait_for(client, path, status, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get(path)
+        if response.status_code == status or time.monotonic() > deadline:
+            return response
+        time.sleep(0.02)
+
+
+def test_ready_and_live_while_chain_init_keeps_failing(app_without_chain):
+    with TestClient(server.app) as client:
+        live = client.get("/livez")
+        ready = wait_for(client, "/readyz", 200)
+        # Initialization keeps retrying in the background
+        while server.app_state["chain_init_attempts"] < 2:
+            time.sleep(0.02)
+
+    assert live.status_code == 200
+    assert live.json() == {"status": "alive"}
+    assert ready.status_code == 200
+    assert ready.json()["database_connected"] is True
+    assert ready.json()["blockchain_connected"] is False
+    assert server.app_state["chain_clients_ready"] is False
+    assert "unreachable" in server.app_state["chain_init_error"]
+
+
+def test_not_ready_without_database(app_without_chain, monkeypatch):
+    async def no_database(*args, **kwargs):
+        raise ConnectionError("no database")
+
+    monkeypatch.setattr(app_without_chain, "command", no_database)
+    with TestClient(server.app) as client:
+        # Give the prober a few rounds
+        time.sleep(0.2)
+        ready = client.get("/api/readyz")
+        live = client.get("/api/livez")
+
+    assert ready.status_code == 503
+    assert ready.json()["status"] == "not_ready"
+    assert live.status_code == 200
+
+
+def test_startup_fails_without_a_wallet_pool_encryption_key(app_without_chain, monkeypatch):
+    monkeypatch.setattr(server, "WALLET_POOL_SIZE", 10)
+    monkeypatch.setattr(server, "WALLET_POOL_ENCRYPTION_KEY", None)
+    with pytest.raises(RuntimeError, match="WALLET_POOL_ENCRYPTION_KEY"):
+        with TestClient(server.app):
+            pass
+    assert server.wallet_pool is None
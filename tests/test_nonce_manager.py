@@ -0,0 +1,123 @@
+import asyncio
+
+from web3.exceptions import TransactionNotFound
+
+from contracts.nonce_manager import NonceManager
+
+SENDER = "0x" + "55" * 20
+
+
+class FakeEth:
+    def __init__(self, pending):
+        self.pending = pending
+        self.known = set()
+        self.lookups = []
+
+    async def get_transaction_count(self, address, block_identifier):
+        return self.pending
+
+    async def get_transaction(self, tx_hash):
+        self.lookups.append(tx_hash)
+        if tx_hash not in self.known:
+            raise TransactionNotFound(f"Transaction {tx_hash} not found")
+        return {"hash": tx_hash}
+
+
+class FakeW3:
+    def __init__(self, pending=0):
+        self.eth = FakeEth(pending)
+
+
+def tx_hash(nonce):
+    return "0x" + f"{nonce:064x}"
+
+
+async def send(manager, count):
+    """Broadcast `count` transactions through the manager"""
+    for _ in range(count):
+        async with manager.reserve() as reservation:
+            reservation.mark_sent(tx_hash(reservation.nonce))
+
+
+def test_broadcast_nonces_survive_a_lagging_node():
+    async def scenario():
+        w3 = FakeW3(pending=0)
+        manager = NonceManager(w3, SENDER, drop_grace_seconds=0)
+        await send(manager, 3)
+        # The node has not seen the transactions yet but still knows them by hash
+        w3.eth.known = {tx_hash(n) for n in range(3)}
+        await manager.reconcile()
+        return await manager.allocate()
+
+    assert asyncio.run(scenario()) == 3
+
+
+def test_dropped_broadcast_nonce_is_reused():
+    async def scenario():
+        w3 = FakeW3(pending=0)
+        manager = NonceManager(w3, SENDER, drop_grace_seconds=0)
+        await send(manager, 3)
+        w3.eth.pending = 1  # nonce 0 mined, nonce 1 dropped, nonce 2 still known
+        w3.eth.known = {tx_hash(2)}
+        await manager.reconcile()
+        return await manager.allocate(), await manager.allocate(), w3.eth.lookups
+
+    first, second, lookups = asyncio.run(scenario())
+    assert (first, second) == (1, 3)
+    assert tx_hash(0) not in lookups
+
+
+def test_recent_broadcast_is_not_looked_up():
+    async def scenario():
+        w3 = FakeW3(pending=0)
+        manager = NonceManager(w3, SENDER, drop_grace_seconds=3600)
+        await send(manager, 2)
+        await manager.reconcile()
+        return await manager.allocate(), w3.eth.lookups
+
+    nonce, lookups = asyncio.run(scenario())
+    assert nonce == 2
+    assert lookups == []
+
+
+def test_unsent_nonces_are_freed():
+    async def scenario():
+        w3 = FakeW3(pending=0)
+        manager = NonceManager(w3, SENDER)
+        try:
+            async with manager.reserve():
+                raise RuntimeError("signing failed")
+        except RuntimeError:
+            pass
+        await manager.reconcile()
+        return await manager.allocate()
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_gap_being_filled_is_not_handed_out_by_a_concurrent_reconcile():
+    async def scenario():
+        w3 = FakeW3(pending=0)
+        manager = NonceManager(w3, SENDER, drop_grace_seconds=0)
+        await send(manager, 3)
+        w3.eth.pending = 1  # nonce 1 dropped, stranding nonce 2
+        w3.eth.known = {tx_hash(2)}
+        filler_started = asyncio.Event()
+        finish_filler = asyncio.Event()
+
+        async def send_filler(nonce):
+            filler_started.set()
+            await finish_filler.wait()
+            return "0x" + "f1" * 32
+
+        filling = asyncio.create_task(manager.fill_gaps(send_filler))
+        await filler_started.wait()
+        # A periodic reconcile runs while the filler is still being signed
+        await manager.reconcile()
+        during = await manager.allocate()
+        finish_filler.set()
+        return await filling, during
+
+    filled, during = asyncio.run(scenario())
+    assert filled == [1]
+    assert during == 3
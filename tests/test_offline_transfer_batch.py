@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from inventory import TokenInventory
+
+TOKEN = "0x" + "cc" * 20
+CASHIER = {"id": "cashier-1", "name": "Caixa 1", "email": "caixa@example.com", "wallet_address": "0x" + "c0" * 20}
+USERS = [
+    {"id": "user-1", "name": "Ana", "email": "ana@example.com", "wallet_address": "0x" + "a1" * 20},
+    {"id": "user-2", "name": "Bia", "email": "bia@example.com", "wallet_address": "0x" + "b2" * 20}
+]
+
+
+@pytest.fixture
+def batch(monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    inventory = TokenInventory(db, shards=2)
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "token_inventory", inventory)
+    monkeypatch.setattr(server.idempotency_store, "db", db)
+    server.app.dependency_overrides[server.get_current_user] = lambda: CASHIER
+
+    async def seed():
+        await db.users.insert_many([dict(user) for user in USERS])
+        token = {
+            "id": "token-1", "event_id": "event-1", "contract_address": TOKEN,
+            "initial_supply": 10, "total_sold": 0, "deployment_status": "deployed"
+        }
+        await db.tokens.insert_one(dict(token))
+        await inventory.initialize(token)
+
+    asyncio.run(seed())
+    client = TestClient(server.app)
+
+    def send(items, idempotency_key=None):
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
+        response = client.post("/api/transfer/offline/batch", headers=headers, json={"transfers": [
+            {"user_email": email, "token_address": TOKEN, "amount": amount, "cashier_id": "station-1"}
+            for email, amount in items
+        ]})
+        return response, db
+
+    yield send
+    server.app.dependency_overrides.clear()
+
+
+async def ledger(db):
+    return {row["wallet_address"]: row["balance"] async for row in db.balances.find({"token_address": TOKEN})}
+
+
+def test_batch_items_succeed_or_fail_on_their_own(batch):
+    response, db = batch([
+        ("ana@example.com", 2),
+        ("nobody@example.com", 1),
+        ("bia@example.com", 3),
+        ("ana@example.com", 4),
+        ("bia@example.com", 20)  # more than the whole supply
+    ])
+
+    async def stored():
+        return (
+            await db.offline_transfers.count_documents({}),
+            await db.purchases.count_documents({}),
+            await ledger(db)
+        )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [result["status"] for result in body["results"]] == ["completed", "failed", "completed", "completed", "failed"]
+    assert [result["index"] for result in body["results"]] == [0, 1, 2, 3, 4]
+    assert (body["completed"], body["failed"]) == (3, 2)
+    transfers, purchases, balances = asyncio.run(stored())
+    assert transfers == purchases == 3
+    # Same (wallet, token) pairs are summed into one ledger update
+    assert balances == {USERS[0]["wallet_address"]: 6, USERS[1]["wallet_address"]: 3}
+
+
+def test_batch_limits_are_validated(batch):
+    response, _ = batch([])
+    assert response.status_code == 422
+
+
+def test_batch_retried_with_the_same_key_is_applied_once(batch):
+    items = [("ana@example.com", 2), ("bia@example.com", 1)]
+    first, db = batch(items, idempotency_key="queue-7")
+    retry, _ = batch(items, idempotency_key="queue-7")
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert asyncio.run(db.offline_transfers.count_documents({})) == 2
+    assert asyncio.run(ledger(db)) == {USERS[0]["wallet_address"]: 2, USERS[1]["wallet_address"]: 1}
@@ -0,0 +1,135 @@
+import json
+import base64
+import asyncio
+import datetime
+
+import pytest
+from fastapi import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+from cache import TTLCache
+from server import decode_page_cursor, encode_page_cursor
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+def test_round_trip_parses_timestamps():
+    cursor = encode_page_cursor({"date": "2026-05-01T18:00:00", "id": "event-1"})
+    position = decode_page_cursor(cursor, required=("date", "id"), timestamps=("date",))
+    assert position["date"].isoformat() == "2026-05-01T18:00:00"
+    assert position["id"] == "event-1"
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64 json",
+    raw_cursor(["date", "id"]),
+    raw_cursor({"id": "event-1"}),
+    raw_cursor({"date": "2026-05-01T18:00:00"}),
+    raw_cursor({"date": "yesterday", "id": "event-1"}),
+    raw_cursor({"date": 20260501, "id": "event-1"}),
+])
+def test_public_events_cursor_rejected_with_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_page_cursor(cursor, required=("date", "id"), timestamps=("date",))
+    assert error.value.status_code == 400
+
+
+def test_public_events_endpoint_returns_400_for_incomplete_cursor():
+    from fastapi.testclient import TestClient
+    from server import app
+
+    response = TestClient(app).get("/api/events/public", params={"after": raw_cursor({"id": "event-1"})})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("position", [{"id": "tx-1"}, {"ts": "2026-05-01T18:00:00"}, {"ts": "soon", "id": "tx-1"}])
+def test_transactions_endpoint_returns_400_for_incomplete_cursor(position):
+    from fastapi.testclient import TestClient
+    from server import app, get_current_user
+
+    app.dependency_overrides[get_current_user] = lambda: {"id": "user-1", "wallet_address": "0x" + "a1" * 20}
+    try:
+        response = TestClient(app).get("/api/transactions", params={"before": raw_cursor(position)})
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 400
+
+
+USER_ID = "user-1"
+BASE = datetime.datetime(2026, 5, 1, 18, 0)
+
+
+@pytest.fixture
+def paged_db(monkeypatch):
+    import server
+
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "public_events_cache", TTLCache(ttl=60))
+    server.app.dependency_overrides[server.get_current_user] = lambda: {"id": USER_ID, "wallet_address": "0x" + "a1" * 20}
+    yield db
+    server.app.dependency_overrides.clear()
+
+
+def walk(client, path, cursor_param, key, limit):
+    """Follow next_cursor until the last page; returns the pages' items"""
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit, **({cursor_param: cursor} if cursor else {})}
+        body = client.get(path, params=params).json()
+        pages.append(body[key])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 50])
+def test_transaction_pages_merge_purchases_and_transfers_without_gaps(paged_db, limit):
+    from fastapi.testclient import TestClient
+    import server
+
+    # Runs of equal timestamps, some shared between the two collections,
+    # so the id tie-breaker decides order and page boundaries
+    purchases = [
+        {"id": f"p-{i:02d}", "user_id": USER_ID, "timestamp": BASE + datetime.timedelta(minutes=i // 3), "amount": 1}
+        for i in range(10)
+    ]
+    transfers = [
+        {"id": f"t-{i:02d}", "from_user_id": USER_ID, "timestamp": BASE + datetime.timedelta(minutes=i // 4), "amount": 1}
+        for i in range(8)
+    ]
+    other_user = {"id": "p-other", "user_id": "user-2", "timestamp": BASE, "amount": 1}
+    asyncio.run(paged_db.purchases.insert_many(purchases + [other_user]))
+    asyncio.run(paged_db.transfers.insert_many(transfers))
+
+    pages = walk(TestClient(server.app), "/api/transactions", "before", "transactions", limit)
+    ids = [tx["id"] for page in pages for tx in page]
+    expected = sorted(purchases + transfers, key=lambda tx: (tx["timestamp"], tx["id"]), reverse=True)
+
+    assert ids == [tx["id"] for tx in expected]
+    assert all(len(page) == limit for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= limit
+    types = {tx["id"]: tx["type"] for page in pages for tx in page}
+    assert {types["p-00"], types["t-00"]} == {"purchase", "transfer"}
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4, 50])
+def test_public_event_pages_cover_events_sharing_a_date(paged_db, limit):
+    from fastapi.testclient import TestClient
+    import server
+
+    events = [
+        {"id": f"event-{i:02d}", "name": f"Evento {i}", "is_active": True, "date": BASE + datetime.timedelta(days=i // 3)}
+        for i in range(9)
+    ]
+    inactive = {"id": "event-inactive", "name": "Cancelado", "is_active": False, "date": BASE}
+    # Inserted out of order so the sort, not insertion order, decides
+    asyncio.run(paged_db.events.insert_many(list(reversed(events)) + [inactive]))
+
+    pages = walk(TestClient(server.app), "/api/events/public", "after", "events", limit)
+    ids = [event["id"] for page in pages for event in page]
+
+    assert ids == [event["id"] for event in events]
+    assert all(len(page) == limit for page in pages[:-1])
@@ -0,0 +1,75 @@
+import asyncio
+import datetime
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+
+USER = {
+    "id": "user-1",
+    "name": "Ana",
+    "email": "ana@example.com",
+    "phone": None,
+    "created_at": datetime.datetime(2026, 1, 1),
+    "wallet_address": "0x" + "a1" * 20,
+    "profile_settings": {"language": "pt"}
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "PROFILE_SOURCE_TIMEOUT", 0.2)
+    server.app.dependency_overrides[server.get_current_user] = lambda: USER
+
+    async def seed():
+        await db.users.insert_one({"id": USER["id"], "wallet_private_key": "0xkey"})
+        await db.purchases.insert_one({
+            "id": "purchase-1", "user_id": USER["id"], "token_address": "0x" + "cc" * 20,
+            "amount": 3, "timestamp": datetime.datetime(2026, 5, 1)
+        })
+        await db.events.insert_one({"id": "event-1", "organizer_id": USER["id"], "name": "Festival", "tokens": []})
+
+    asyncio.run(seed())
+    yield TestClient(server.app)
+    server.app.dependency_overrides.clear()
+
+
+def test_slow_source_returns_partial_profile(client, monkeypatch):
+    async def stalled_chain(wallet_address, chain_timeout=None):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(server, "get_user_blockchain_assets", stalled_chain)
+    started = time.monotonic()
+    response = client.get("/api/profile")
+    elapsed = time.monotonic() - started
+
+    assert response.status_code == 200
+    profile = response.json()
+    assert elapsed < 2
+    assert profile["partial"] is True
+    assert profile["unavailable"] == ["wallet.assets"]
+    assert profile["wallet"]["assets"] == {"bnb_balance": "0", "tokens": []}
+    assert profile["wallet"]["private_key"] == "0xkey"
+    assert [tx["id"] for tx in profile["recent_transactions"]] == ["purchase-1"]
+    assert profile["settings"] == {"language": "pt"}
+
+
+def test_fields_limit_the_sources_loaded(client, monkeypatch):
+    async def unexpected(*args, **kwargs):
+        raise AssertionError("wallet assets were not requested")
+
+    monkeypatch.setattr(server, "get_user_blockchain_assets", unexpected)
+    response = client.get("/api/profile", params={"fields": "user,settings"})
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"user", "settings"}
+
+
+def test_unknown_fields_are_rejected(client):
+    response = client.get("/api/profile", params={"fields": "user,secrets"})
+    assert response.status_code == 400
@@ -0,0 +1,110 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from contracts.receipt_watcher import ReceiptWatcher
+
+TX_HASH = "0x" + "ab" * 32
+CONTRACT = "0x5aaeb6053f3e94c9b9a09f33669435e7ef1beaed"
+
+
+class FakeProvider:
+    def __init__(self):
+        self.receipts = {}
+
+    async def make_request(self, method, params):
+        assert method == "eth_getTransactionReceipt"
+        return {"result": self.receipts.get(params[0])}
+
+
+class FakeEth:
+    block_number_value = 100
+
+    @property
+    async def block_number(self):
+        return self.block_number_value
+
+
+class FakeW3:
+    def __init__(self):
+        self.provider = FakeProvider()
+        self.eth = FakeEth()
+
+
+def raw_receipt(**overrides):
+    receipt = {
+        "transactionHash": TX_HASH,
+        "status": "0x1",
+        "contractAddress": CONTRACT,
+        "gasUsed": "0x5208",
+        "blockNumber": "0x64",
+        "logs": []
+    }
+    receipt.update(overrides)
+    return receipt
+
+
+def test_receipt_contract_address_is_checksummed():
+    async def scenario():
+        w3 = FakeW3()
+        db = AsyncMongoMockClient()["test"]
+        watcher = ReceiptWatcher(w3, db=db)
+        await watcher.track(TX_HASH)
+        w3.provider.receipts[TX_HASH] = raw_receipt()
+
+        assert await watcher.check_pending() == 1
+        receipt = await watcher.wait(TX_HASH, timeout=1)
+        record = await db.pending_transactions.find_one({"_id": TX_HASH})
+        return receipt, record
+
+    receipt, record = asyncio.run(scenario())
+    assert receipt.contractAddress == "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed"
+    assert receipt.gasUsed == 21000
+    assert record["status"] == "mined"
+    assert record["contract_address"] == receipt.contractAddress
+
+
+def test_receipt_without_contract_address():
+    async def scenario():
+        w3 = FakeW3()
+        watcher = ReceiptWatcher(w3)
+        await watcher.track(TX_HASH)
+        w3.provider.receipts[TX_HASH] = raw_receipt(contractAddress=None)
+        waiter = asyncio.ensure_future(watcher.wait(TX_HASH, timeout=1))
+        await asyncio.sleep(0)
+        await watcher.check_pending()
+        receipt = await waiter
+        await watcher.stop()
+        return receipt
+
+    receipt = asyncio.run(scenario())
+    assert receipt.contractAddress is None
+    assert receipt.status == 1
+
+
+def test_expired_transaction_is_not_resumed_after_a_restart():
+    async def scenario():
+        w3 = FakeW3()
+        db = AsyncMongoMockClient()["test"]
+        watcher = ReceiptWatcher(w3, db=db, poll_interval=0.01, max_pending_age=0.05)
+        await watcher.track(TX_HASH)
+        waiter = asyncio.create_task(watcher.wait(TX_HASH))
+        try:
+            await asyncio.wait_for(waiter, timeout=2)
+        except TimeoutError as e:
+            error = e
+        await watcher.stop()
+        record = await db.pending_transactions.find_one({"_id": TX_HASH})
+
+        restarted = ReceiptWatcher(w3, db=db)
+        await restarted.start()
+        resumed = restarted.stats()["pending"]
+        await restarted.stop()
+        return error, record, watcher.expired, resumed
+
+    error, record, expired, resumed = asyncio.run(scenario())
+    assert "presumed dropped" in str(error)
+    assert record["status"] == "expired"
+    assert "resolved_at" in record
+    assert expired == 1
+    assert resumed == 0
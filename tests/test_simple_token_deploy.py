@@ -0,0 +1,82 @@
+import re
+import asyncio
+
+from contracts.simple_contract_manager import ContractManager
+from tests.fake_rpc import FakeRpcServer
+
+# Well-known development key (hardhat account #0); never funded outside dev chains
+DEPLOYER_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+OWNER = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+TOKEN = "0x" + "7b" * 20
+ADDRESS = re.compile(r"^0x[0-9a-fA-F]{40}$")
+TX_HASH = re.compile(r"^0x[0-9a-f]{64}$")
+
+
+class FakeChain:
+    """A node that mines every deployment at TOKEN"""
+
+    def __init__(self):
+        self.sent = []
+
+    def __call__(self, method, params):
+        if method == "eth_sendRawTransaction":
+            self.sent.append(params[0])
+            # Node answers in uppercase hex; stored hashes are normalized
+            return "0x" + "AB" * 32
+        if method == "eth_getTransactionReceipt":
+            return {
+                "transactionHash": "0x" + "ab" * 32, "status": "0x1", "contractAddress": TOKEN,
+                "gasUsed": "0xf4240", "blockNumber": "0x65", "logs": []
+            }
+        if method == "eth_feeHistory":
+            return {"oldestBlock": "0x64", "baseFeePerGas": ["0x3b9aca00", "0x3b9aca00"], "gasUsedRatio": [0.5], "reward": [["0x1", "0x2", "0x3"]]}
+        return {
+            "web3_clientVersion": "fake/v1",
+            "eth_chainId": "0x61",
+            "eth_blockNumber": "0x65",
+            "eth_getBalance": hex(10 ** 18),
+            "eth_maxPriorityFeePerGas": "0x1",
+            "eth_estimateGas": "0xf4240",
+            "eth_getTransactionCount": "0x0"
+        }[method]
+
+
+def run(scenario):
+    async def wrapper():
+        chain = FakeChain()
+        async with FakeRpcServer(chain) as rpc:
+            manager = ContractManager(rpc.url, DEPLOYER_KEY)
+            try:
+                return chain, await scenario(manager)
+            finally:
+                await manager.receipt_watcher.stop()
+                await manager.batch_reader.close()
+                await manager.w3.provider.disconnect()
+
+    return asyncio.run(wrapper())
+
+
+def test_deployment_reports_a_0x_prefixed_transaction_hash():
+    async def scenario(manager):
+        submitted = []
+
+        async def on_submitted(tx_hash):
+            submitted.append(tx_hash)
+
+        result = await manager.deploy_simple_token("Show - Cerveja", "CERV", 100, OWNER, on_submitted=on_submitted)
+        return result, submitted
+
+    chain, (result, submitted) = run(scenario)
+    assert result["success"] is True
+    assert result["contract_address"].lower() == TOKEN
+    assert TX_HASH.match(result["transaction_hash"])
+    assert submitted == [result["transaction_hash"]]
+    assert len(chain.sent) == 1
+
+
+def test_fallback_token_address_is_a_full_address():
+    async def scenario(manager):
+        return manager._create_fallback_token("Show - Cerveja", "CERV", 100, OWNER)
+
+    _, fallback = run(scenario)
+    assert ADDRESS.match(fallback["contract_address"])
@@ -0,0 +1,172 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+from web3 import AsyncWeb3
+
+from contracts.transfer_indexer import TransferIndexer, TRANSFER_TOPIC, STATE_ID
+
+TOKEN = AsyncWeb3.to_checksum_address("0x" + "aa" * 20)
+ALICE = AsyncWeb3.to_checksum_address("0x" + "a1" * 20)
+BOB = AsyncWeb3.to_checksum_address("0x" + "b0" * 20)
+ZERO = "0x" + "00" * 20
+DEPLOY_TX = "0x" + "de" * 32
+
+
+def topic(address):
+    return bytes(12) + bytes.fromhex(address[2:])
+
+
+class FakeChain:
+    """Blocks with replaceable hashes and Transfer logs, served like AsyncWeb3.eth"""
+
+    def __init__(self, head):
+        self.head = head
+        self.forks = {}
+        self.logs = []
+        self.log_queries = []
+
+    @property
+    async def block_number(self):
+        return self.head
+
+    def block_hash(self, number):
+        return bytes([self.forks.get(number, 0)]) + number.to_bytes(31, "big")
+
+    async def get_block(self, number):
+        return {"number": number, "hash": self.block_hash(number)}
+
+    async def get_transaction_receipt(self, tx_hash):
+        assert tx_hash == DEPLOY_TX
+        return {"blockNumber": 10}
+
+    async def get_logs(self, params):
+        self.log_queries.append((params["fromBlock"], params["toBlock"]))
+        return [
+            log for log in self.logs
+            if params["fromBlock"] <= log["blockNumber"] <= params["toBlock"] and log["address"] in params["address"]
+        ]
+
+    def transfer(self, block, sender, receiver, value, index=0):
+        self.logs.append({
+            "address": TOKEN,
+            "topics": [bytes.fromhex(TRANSFER_TOPIC[2:]), topic(sender), topic(receiver)],
+            "data": value.to_bytes(32, "big"),
+            "blockNumber": block,
+            "blockHash": self.block_hash(block),
+            "transactionHash": block.to_bytes(32, "big"),
+            "logIndex": index
+        })
+
+
+class FakeW3:
+    def __init__(self, chain):
+        self.eth = chain
+
+    @staticmethod
+    def to_checksum_address(value):
+        return AsyncWeb3.to_checksum_address(value)
+
+
+async def deployed_token(db):
+    await db.tokens.insert_one({
+        "id": "token-1",
+        "contract_address": TOKEN,
+        "deployment_status": "deployed",
+        "deployment_tx_hash": DEPLOY_TX
+    })
+
+
+async def holdings(db):
+    """Balances summed from the indexed transfers (mongomock cannot run the
+    Decimal128 holdings aggregation, so chain_transfers is checked directly)"""
+    balances = {}
+    async for transfer in db.chain_transfers.find({"token_address": TOKEN}):
+        value = int(transfer["value"].to_decimal())
+        for wallet, sign in ((transfer["from"], -1), (transfer["to"], 1)):
+            if wallet != AsyncWeb3.to_checksum_address(ZERO):
+                balances[wallet] = balances.get(wallet, 0) + sign * value
+    return balances
+
+
+async def run_until_caught_up(indexer):
+    while not await indexer.run_once():
+        pass
+
+
+def test_fresh_index_starts_at_confirmed_head_and_backfills_from_deployment():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        chain = FakeChain(head=1000)
+        chain.transfer(10, ZERO, ALICE, 100)
+        chain.transfer(500, ALICE, BOB, 30)
+        await deployed_token(db)
+        indexer = TransferIndexer(db, FakeW3(chain), confirmations=12, batch_blocks=200)
+        await run_until_caught_up(indexer)
+        state = await db.chain_indexer_state.find_one({"_id": STATE_ID})
+        token = await db.tokens.find_one({"id": "token-1"})
+        return chain, state, token, await holdings(db)
+
+    chain, state, token, balances = asyncio.run(scenario())
+    assert state["first_block"] == 989
+    assert state["last_block"] == 988
+    assert token["transfers_indexed_from"] == 10
+    # Nothing before the deployment block was scanned
+    assert min(start for start, _ in chain.log_queries) == 10
+    assert balances == {ALICE: 70, BOB: 30}
+
+
+def test_checkpoint_advances_in_batches_with_lease_renewed():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        chain = FakeChain(head=112)
+        await deployed_token(db)
+        indexer = TransferIndexer(db, FakeW3(chain), start_block=0, confirmations=12, batch_blocks=40)
+        renewals = []
+        original = indexer._acquire_lease
+
+        async def counting_lease():
+            renewals.append(True)
+            return await original()
+
+        indexer._acquire_lease = counting_lease
+        await indexer.run_once()  # backfill 10..-1 is empty, then blocks 0-39
+        first = (await db.chain_indexer_state.find_one({"_id": STATE_ID}))["last_block"]
+
+        chain.transfer(70, ZERO, BOB, 5)
+        await run_until_caught_up(indexer)
+        state = await db.chain_indexer_state.find_one({"_id": STATE_ID})
+        return first, state, len(renewals), await holdings(db)
+
+    first, state, renewals, balances = asyncio.run(scenario())
+    assert first == 39
+    assert state["last_block"] == 100
+    assert state["last_block_hash"] == "0x" + (100).to_bytes(32, "big").hex()
+    assert renewals == 3
+    assert balances == {BOB: 5}
+
+
+def test_reorg_rewinds_to_common_ancestor():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        chain = FakeChain(head=62)
+        chain.transfer(15, ZERO, ALICE, 100)
+        chain.transfer(45, ALICE, BOB, 40)
+        await deployed_token(db)
+        indexer = TransferIndexer(db, FakeW3(chain), start_block=0, confirmations=12, batch_blocks=10)
+        await run_until_caught_up(indexer)
+        before = await holdings(db)
+
+        # Blocks from 35 on are replaced; the transfer at 45 is gone
+        for number in range(35, 70):
+            chain.forks[number] = 1
+        chain.logs = [log for log in chain.logs if log["blockNumber"] < 35]
+        assert await indexer.run_once() is False
+        rewound = (await db.chain_indexer_state.find_one({"_id": STATE_ID}))["last_block"]
+        await run_until_caught_up(indexer)
+        return before, rewound, indexer.reorgs, await holdings(db)
+
+    before, rewound, reorgs, after = asyncio.run(scenario())
+    assert before == {ALICE: 60, BOB: 40}
+    assert rewound == 29
+    assert reorgs == 1
+    assert after == {ALICE: 100}
@@ -0,0 +1,55 @@
+import asyncio
+import datetime
+
+from cryptography.fernet import Fernet
+from eth_account import Account
+from mongomock_motor import AsyncMongoMockClient
+
+from wallet_pool import WalletPool, REFILL_LOCK_ID
+
+KEY = Fernet.generate_key()
+
+
+def make_pool(db, target_size=10):
+    # No process pool: key generation runs on the default thread executor
+    return WalletPool(db, KEY, target_size=target_size, batch_size=4)
+
+
+def test_workers_refilling_together_do_not_overfill():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        workers = [make_pool(db) for _ in range(3)]
+        await asyncio.gather(*[worker._refill() for worker in workers])
+        # A refill after the others finished only tops up what is missing
+        await workers[0].db.wallet_pool.delete_one({})
+        await workers[1]._refill()
+        return await db.wallet_pool.count_documents({}), await db.wallet_pool_locks.count_documents({})
+
+    assert asyncio.run(scenario()) == (10, 0)
+
+
+def test_refill_lock_abandoned_by_a_dead_worker_is_taken_over():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await db.wallet_pool_locks.insert_one({
+            "_id": REFILL_LOCK_ID, "owner": "dead-worker",
+            "locked_until": datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+        })
+        await make_pool(db)._refill()
+        return await db.wallet_pool.count_documents({})
+
+    assert asyncio.run(scenario()) == 10
+
+
+def test_popped_wallet_matches_its_encrypted_key():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        pool = make_pool(db, target_size=1)
+        await pool._refill()
+        stored = await db.wallet_pool.find_one({})
+        return stored, await pool.pop(), await pool.pop()
+
+    stored, wallet, empty = asyncio.run(scenario())
+    assert wallet["private_key"] not in stored["encrypted_key"]
+    assert Account.from_key(wallet["private_key"]).address == wallet["address"] == stored["address"]
+    assert empty is None